@@ -1,14 +1,93 @@
-from .apis import *
-from .apis.api_config import *
-from .channels import *
-from .dns import *
-from .mini_sdk import *
-from .pb2 import *
-from .pkg_tool import *
-from .tool import *
+"""UBTECH AlphaMini python sdk
+
+按需加载: import mini 只加载本文件, 访问 mini.connect、mini.Message 之类的名字时才导入对应模块
+
+旧版本通过 from .xxx import * 带出的标准库和第三方名字(mini.asyncio、mini.os、mini.logging、mini.websockets、
+mini.Optional、mini.wraps、mini.log等)不再导出, 请直接从原模块导入
+"""
+import importlib
 
 name = "mini"
 
+_SUBMODULES = ('apis', 'channels', 'pb2', 'dns', 'mini_sdk', 'pkg_tool', 'tool', 'metrics', 'tracing',
+               'telemetry', 'loop_monitor')
+
+_NESTED_MODULES = {
+    'api_action': 'apis.api_action',
+    'api_config': 'apis.api_config',
+    'api_expression': 'apis.api_expression',
+    'api_observe': 'apis.api_observe',
+    'api_sence': 'apis.api_sence',
+    'api_sound': 'apis.api_sound',
+    'base_api': 'apis.base_api',
+    'cmdid': 'apis.cmdid',
+    'errors': 'apis.errors',
+    'msg_utils': 'channels.msg_utils',
+    'websocket_client': 'channels.websocket_client',
+    'dns_browser': 'dns.dns_browser',
+    'zeroconf': 'dns.zeroconf',
+}
+"""旧版本经由星号导入带到mini下的子模块 -> 模块路径
+"""
+
+_EXPORTS = {
+    'apis': ('MiniApiResultType', 'MoveRobotDirection', 'RobotActionType', 'RobotAudioRecordControlType',
+             'RobotExpressionType', 'MouthLampColor', 'MouthLampMode', 'RobotPosture', 'HeadRacketType',
+             'ObjectRecogniseType', 'TakePictureType', 'TTSControlType', 'AudioStorageType', 'AudioSearchType',
+             'TimeoutPolicy', 'deadline', 'COMMON', 'SPEECH', 'VISION', 'CONTENT', 'MOTION', 'EXPRESS',
+             'get_common_error_str', 'get_vision_error_str', 'get_content_error_str', 'get_express_error_str',
+             'get_motion_error_str', 'get_speech_error_str'),
+    'apis.api_config': ('ServicePlatform', 'LanType', 'BaseApi', 'DEFAULT_TIMEOUT', 'GetRobotLanguage',
+                        'GetRobotLanguageRequest', 'GetRobotLanguageResponse', 'RobotLanguage', 'SetRobotLanguage',
+                        'SetRobotLanguageRequest', 'SetRobotLanguageResponse'),
+    'apis.api_sence': ('FaceAnalyzeResponse', 'FaceDetectResponse', 'FaceRecogniseResponse',
+                       'GetInfraredDistanceResponse', 'GetRegisterFacesResponse', 'RecogniseObjectResponse',
+                       'SpeechRecogniseResponse', 'TakePictureResponse'),
+    'apis.api_sound': ('GetAudioListResponse',),
+    'channels.msg_utils': ('Message', 'MessageHeader', 'parse_body_msg', 'parse_msg', 'build_request_msg',
+                           'build_response_msg', 'base64_encode', 'base64_decode', 'coroutine', 'id_generator'),
+    'dns.dns_browser': ('service_type',),
+    'mini_sdk': ('RobotType', 'RobotPool', 'WiFiDevice', 'WiFiDeviceListener', 'browser', 'websocket',
+                 'set_log_level', 'set_robot_type', 'get_device_by_name', 'get_device_list', 'connect', 'release',
+                 'enter_program', 'quit_program', 'play_action', 'stop_action', 'play_custom_action',
+                 'stop_custom_action', 'move', 'get_action_list', 'get_custom_action_list', 'wiki', 'translate',
+                 'play_expression', 'play_behavior', 'stop_behavior', 'set_MouthLamp_NormalMode',
+                 'set_MouthLamp_BreathMode', 'switch_MouthLamp', 'play_tts', 'stop_tts', 'play_online_audio',
+                 'play_local_audio', 'stop_audio', 'get_system_audio_list', 'get_custom_audio_list',
+                 'change_volume', 'face_detect', 'face_analysis', 'face_recognise', 'flower_recognise',
+                 'fruit_recognise', 'gesture_recognise', 'take_picture_immediately', 'take_picture',
+                 'get_register_faces', 'get_infrared_distance', 'speech_recognise'),
+    'pkg_tool': ('install_py_pkg', 'uninstall_py_pkg', 'run_py_pkg', 'query_py_pkg', 'list_py_pkg', 'setup_py_pkg',
+                 'switch_adb', 'upload_script'),
+}
+"""模块名 -> 该模块导出到mini的名字
+"""
+
+_INDEX = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        value = importlib.import_module(f'{__name__}.{name}')
+    elif name in _NESTED_MODULES:
+        value = importlib.import_module(f'{__name__}.{_NESTED_MODULES[name]}')
+    elif name in _INDEX:
+        value = getattr(importlib.import_module(f'{__name__}.{_INDEX[name]}'), name)
+    elif name.endswith('_pb2'):
+        # 兼容旧版本经由mini.pb2转出的消息模块
+        value = getattr(importlib.import_module(f'{__name__}.pb2'), name)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    if name != 'service_type':
+        # service_type会被set_robot_type修改, 每次重新读取
+        globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_NESTED_MODULES) | set(_INDEX))
+
+
 __all__ = [
     'apis',
     'channels',
@@ -22,6 +101,7 @@ __all__ = [
     'get_device_list',
     'connect',
     'release',
+    'RobotPool',
     'WiFiDevice',
     'WiFiDeviceListener',
     'install_py_pkg',
@@ -1,9 +1,54 @@
-from .cmdid import *
-from .errors import *
-from .base_api import MiniApiResultType
-from .api_action import MoveRobotDirection, RobotActionType
-from .api_expression import RobotExpressionType, MouthLampColor, MouthLampMode
-from .api_observe import RobotPosture, HeadRacketType
-from .api_sence import ObjectRecogniseType, TakePictureType
-from .api_sound import TTSControlType, AudioStorageType, AudioSearchType, RobotAudioRecordControlType
-from .api_config import ServicePlatform, LanType
+"""api模块
+
+按需加载: 访问 mini.apis.MiniApiResultType 之类的名字或 mini.apis.cmdid 之类的子模块时才导入对应的模块
+"""
+import importlib
+
+_EXPORTS = {
+    'errors': ('COMMON', 'SPEECH', 'VISION', 'CONTENT', 'MOTION', 'EXPRESS', 'get_common_error_str',
+               'get_vision_error_str', 'get_content_error_str', 'get_express_error_str', 'get_motion_error_str',
+               'get_speech_error_str'),
+    'base_api': ('MiniApiResultType',),
+    'timeout_policy': ('TimeoutPolicy', 'deadline'),
+    'event_stream': ('EventStream', 'StreamPolicy'),
+    'sampling': ('AdaptiveSampler',),
+    'handler_runner': ('HandlerPolicy',),
+    'api_action': ('MoveRobotDirection', 'RobotActionType'),
+    'api_expression': ('RobotExpressionType', 'MouthLampColor', 'MouthLampMode'),
+    'api_observe': ('RobotPosture', 'HeadRacketType'),
+    'api_sence': ('ObjectRecogniseType', 'TakePictureType'),
+    'api_sound': ('TTSControlType', 'AudioStorageType', 'AudioSearchType', 'RobotAudioRecordControlType'),
+    'api_config': ('ServicePlatform', 'LanType'),
+}
+"""模块名 -> 该模块导出到mini.apis的名字
+"""
+
+_INDEX = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_INDEX)
+
+
+def __getattr__(name: str):
+    module = _INDEX.get(name)
+    if module is None:
+        # 子模块, 例如 mini.apis.cmdid
+        return _import_submodule(name)
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def _import_submodule(name: str):
+    """导入本包的子模块, 导入后该模块成为包的属性; 不存在时抛出AttributeError
+    """
+    if not name.startswith('__'):
+        try:
+            return importlib.import_module(f'{__name__}.{name}')
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_INDEX))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import enum
 
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.codemao_getactionlist_pb2 import GetActionListRequest, GetActionListResponse
 from ..pb2.codemao_moverobot_pb2 import MoveRobotRequest, MoveRobotResponse
@@ -36,7 +36,7 @@ class PlayAction(BaseApi):
         self.__is_serial = is_serial
         self.__action_name = action_name
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送执行动作指令
 
         Returns:
@@ -44,29 +44,12 @@ class PlayAction(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = PlayActionRequest()
         request.actionName = self.__action_name
 
         cmd_id = _PCProgramCmdId.PLAY_ACTION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """解析回复指令
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            PlayActionResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = PlayActionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StopAllAction(BaseApi):
@@ -82,7 +65,7 @@ class StopAllAction(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         发送停止所有动作指令
 
@@ -91,34 +74,12 @@ class StopAllAction(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = StopActionRequest()
 
         cmd_id = _PCProgramCmdId.STOP_ACTION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            StopActionResponse
-
-            #StopCustomActionResponse.isSuccess : 是否成功
-
-            #StopCustomActionResponse.resultCode : 返回码
-
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = StopActionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -163,7 +124,7 @@ class MoveRobot(BaseApi):
         self.__direction = direction.value
         self.__step = step
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送机器人移动指令
 
         Returns:
@@ -171,31 +132,14 @@ class MoveRobot(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = MoveRobotRequest()
         request.direction = self.__direction
         request.step = self.__step
 
         cmd_id = _PCProgramCmdId.MOVE_ROBOT_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            MoveRobotResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = MoveRobotResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -235,7 +179,7 @@ class GetActionList(BaseApi):
         self.__is_serial = is_serial
         self.__action_type = action_type.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送获取机器人动作列表指令
 
         Returns:
@@ -243,31 +187,14 @@ class GetActionList(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = GetActionListRequest()
         request.actionType = self.__action_type
 
         cmd_id = _PCProgramCmdId.GET_ACTION_LIST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetActionListResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetActionListResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class PlayCustomAction(BaseApi):
@@ -292,7 +219,7 @@ class PlayCustomAction(BaseApi):
         self.__is_serial = is_serial
         self.__action_name = action_name
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送执行自定义动作指令
 
         Returns:
@@ -300,31 +227,13 @@ class PlayCustomAction(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = PlayCustomActionRequest()
         request.actionName = self.__action_name
 
         cmd_id = _PCProgramCmdId.PLAY_CUSTOM_ACTION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            PlayCustomActionResponse
-        """
-
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = PlayCustomActionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StopCustomAction(BaseApi):
@@ -347,7 +256,7 @@ class StopCustomAction(BaseApi):
         self.__is_serial = is_serial
         self.__action_name = action_name
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """执行停止自定义动作指令
 
         Returns:
@@ -355,28 +264,10 @@ class StopCustomAction(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = StopCustomActionRequest()
         request.actionName = self.__action_name
 
         cmd_id = _PCProgramCmdId.STOP_CUSTOM_ACTION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            StopCustomActionResponse
-        """
-
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = StopCustomActionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
@@ -2,7 +2,7 @@
 
 import enum
 
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.codemao_controlbehavior_pb2 import ControlBehaviorRequest, ControlBehaviorResponse
 from ..pb2.pccodemao_message_pb2 import Message
@@ -41,7 +41,7 @@ class StartBehavior(BaseApi):
         self.__name = name
         self.__event_type = _RobotBehaviorControlType.START.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行开始舞蹈指令
 
@@ -50,7 +50,7 @@ class StartBehavior(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlBehaviorRequest()
         request.name = self.__name
@@ -58,24 +58,7 @@ class StartBehavior(BaseApi):
 
         cmd_id = _PCProgramCmdId.CONTROL_BEHAVIOR_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlBehaviorResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlBehaviorResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StopBehavior(BaseApi):
@@ -95,7 +78,7 @@ class StopBehavior(BaseApi):
         self.__is_serial = is_serial
         self.__event_type = _RobotBehaviorControlType.START.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止舞蹈指令
 
@@ -104,31 +87,14 @@ class StopBehavior(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlBehaviorRequest()
         request.eventType = self.__event_type
 
         cmd_id = _PCProgramCmdId.CONTROL_BEHAVIOR_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlBehaviorResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlBehaviorResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 # class _ControlBehavior(BaseApi):
 #     """控制表现力api
@@ -152,7 +118,7 @@ class StopBehavior(BaseApi):
 #         self.__name = name
 #         self.__eventType = control_type.value
 #
-#     async def execute(self):
+#     async def execute(self, robot=None):
 #         """
 #         执行表现力控制指令
 #
@@ -161,7 +127,7 @@ class StopBehavior(BaseApi):
 #         """
 #         timeout = 0
 #         if self.__isSerial:
-#             timeout = DEFAULT_TIMEOUT
+#             timeout = AUTO_TIMEOUT
 #
 #         request = ControlBehaviorRequest()
 #         request.name = self.__name
@@ -169,7 +135,7 @@ class StopBehavior(BaseApi):
 #
 #         cmd_id = _PCProgramCmdId.CONTROL_BEHAVIOR_REQUEST.value
 #
-#         return await self.send(cmd_id, request, timeout)
+#         return await self.send(cmd_id, request, timeout, robot=robot)
 #
 #     def _parse_msg(self, message):
 #         """
@@ -1,10 +1,10 @@
 import enum
 
-from mini.apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from mini.apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from mini.apis.cmdid import _PCProgramCmdId
 from mini.pb2.pccodemao_getrobotlanguage_pb2 import GetRobotLanguageRequest, GetRobotLanguageResponse
-from ..pb2.pccodemao_message_pb2 import Message
 from ..pb2.pccodemao_setrobotlanguage_pb2 import SetRobotLanguageRequest, SetRobotLanguageResponse
+from ..pb2.pccodemao_message_pb2 import Message
 
 
 @enum.unique
@@ -92,7 +92,7 @@ class GetRobotLanguage(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__isSerial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """执行获取机器人语言
 
         Returns:
@@ -106,31 +106,13 @@ class GetRobotLanguage(BaseApi):
         """
         timeout = 0
         if self.__isSerial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = GetRobotLanguageRequest()
 
         cmd_id = _PCProgramCmdId.GET_ROBOT_LANGUAGE_MODE.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetRobotLanguageResponse
-
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetRobotLanguageResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -162,7 +144,7 @@ class SetRobotLanguage(BaseApi):
         self.__is_serial: bool = is_serial
         self.__language: RobotLanguage = language
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """执行设置机器人语言模型
 
         Returns:
@@ -180,29 +162,11 @@ class SetRobotLanguage(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = SetRobotLanguageRequest()
         request.language = self.__language.name
 
         cmd_id = _PCProgramCmdId.SET_ROBOT_LANGUAGE.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            SetRobotLanguageResponse
-
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = SetRobotLanguageResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 
 from ..apis.api_config import LanType, ServicePlatform
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.cloudtranslate_pb2 import Translate
 from ..pb2.cloudwiki_pb2 import WiKi
-from ..pb2.codemao_translate_pb2 import TranslateResponse, TranslateRequest
+from ..pb2.codemao_translate_pb2 import TranslateRequest, TranslateResponse
 from ..pb2.codemao_wiki_pb2 import WikiRequest, WikiResponse
 from ..pb2.pccodemao_message_pb2 import Message
 
@@ -30,7 +30,7 @@ class QueryWiKi(BaseApi):
         self.__query = query
         self.__platform = ServicePlatform.TENCENT.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行百科指令
 
@@ -40,7 +40,7 @@ class QueryWiKi(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         wiki = WiKi()
         wiki.query = self.__query
@@ -51,24 +51,7 @@ class QueryWiKi(BaseApi):
 
         cmd_id = _PCProgramCmdId.WIKI_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            WikiResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = WikiResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StartTranslate(BaseApi):
@@ -105,7 +88,7 @@ class StartTranslate(BaseApi):
         self.__to_lan = to_lan.value
         self.__platform = platform.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行翻译指令
 
@@ -114,7 +97,7 @@ class StartTranslate(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         translate = Translate()
         translate.query = self.__query
@@ -130,21 +113,4 @@ class StartTranslate(BaseApi):
         request.translate.CopyFrom(translate)
 
         cmd_id = _PCProgramCmdId.TRANSLATE_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            TranslateResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = TranslateResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
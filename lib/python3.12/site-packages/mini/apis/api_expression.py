@@ -2,7 +2,7 @@
 
 import enum
 
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.codemao_controlmouthlamp_pb2 import ControlMouthRequest, ControlMouthResponse
 from ..pb2.codemao_playexpression_pb2 import PlayExpressionRequest, PlayExpressionResponse
@@ -43,7 +43,7 @@ class PlayExpression(BaseApi):
         self.__express_name = express_name
         self.__dir_type = RobotExpressionType.INNER.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行播放表情指令
 
@@ -52,7 +52,7 @@ class PlayExpression(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = PlayExpressionRequest()
         request.expressName = self.__express_name
@@ -60,24 +60,7 @@ class PlayExpression(BaseApi):
 
         cmd_id: int = _PCProgramCmdId.PLAY_EXPRESSION_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            PlayExpressionResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = PlayExpressionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -143,7 +126,7 @@ class SetMouthLamp(BaseApi):
         self.__duration = duration
         self.__breath_duration = breath_duration
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行设置设置嘴巴灯指令
 
@@ -152,7 +135,7 @@ class SetMouthLamp(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = SetMouthLampRequest()
         request.model = self.__mode
@@ -166,24 +149,7 @@ class SetMouthLamp(BaseApi):
         request.breathDuration = self.__breath_duration
 
         cmd_id = _PCProgramCmdId.SET_MOUTH_LAMP_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            SetMouthLampResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = SetMouthLampResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class ControlMouthLamp(BaseApi):
@@ -205,7 +171,7 @@ class ControlMouthLamp(BaseApi):
         self.__is_serial = is_serial
         self.__is_open = is_open
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行控制嘴巴灯指令
 
@@ -214,28 +180,11 @@ class ControlMouthLamp(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlMouthRequest()
         request.isOpen = self.__is_open
 
         cmd_id = _PCProgramCmdId.SWITCH_MOUTH_LAMP_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlMouthResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlMouthResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
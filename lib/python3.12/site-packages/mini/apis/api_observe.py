@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-# 每种传感器做一个单例对象进行监听
+# 同一连接上每种传感器只有一个机器人端订阅, 多个监听对象共用, 最后一个停止时才通知机器人停止
 
 import asyncio
 import enum
@@ -14,7 +14,6 @@ from ..pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketRequest, Observ
 from ..pb2.codemao_observeinfrareddistance_pb2 import ObserveInfraredDistanceRequest, ObserveInfraredDistanceResponse
 from ..pb2.codemao_speechrecognise_pb2 import SpeechRecogniseRequest, SpeechRecogniseResponse
 from ..pb2.codemao_stopspeechrecognise_pb2 import StopSpeechRecogniseRequest, StopSpeechRecogniseResponse
-from ..pb2.pccodemao_message_pb2 import Message
 
 
 class ObserveSpeechRecognise(BaseEventApi):
@@ -30,7 +29,7 @@ class ObserveSpeechRecognise(BaseEventApi):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         pass
 
     def __init__(self):
@@ -41,34 +40,20 @@ class ObserveSpeechRecognise(BaseEventApi):
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=message)
 
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            SpeechRecogniseResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = SpeechRecogniseResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+    def stop(self) -> bool:
         """
         停止语音识别,停止监听语音识别
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopSpeechRecognise().execute())
+        last = super().stop()
 
-        super().stop()
+        if last:
+            asyncio.create_task(_StopSpeechRecognise().execute(robot=self.robot))
+
+        return last
 
 
 class _StopSpeechRecognise(BaseApiNoNeedResponse):
@@ -79,7 +64,7 @@ class _StopSpeechRecognise(BaseApiNoNeedResponse):
     #StopSpeechRecogniseResponse.resultCode : 返回码
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止语音识别指令
 
@@ -91,24 +76,7 @@ class _StopSpeechRecognise(BaseApiNoNeedResponse):
 
         cmd_id = _PCProgramCmdId.STOP_SPEECH_RECOGNISE_REQUEST.value
 
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            StopSpeechRecogniseResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = StopSpeechRecogniseResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
 
 
 class ObserveFaceDetect(BaseEventApi):
@@ -116,29 +84,38 @@ class ObserveFaceDetect(BaseEventApi):
 
     监听人脸个数事件,机器人上报检测到的人脸个数
 
-    单次检测超时时间1s,侦测间隔1s
+    默认单次检测超时时间1s,侦测间隔1s
 
     # FaceDetectTaskResponse.count(int) : 人脸个数
 
     # FaceDetectTaskResponse.isSuccess : 是否成功
 
     # FaceDetectTaskResponse.resultCode : 返回码
+
+    Args:
+        period (int): 侦测间隔(毫秒),默认为1000
+        timeout (int): 单次侦测超时时间(毫秒),默认为1000
     """
 
-    async def execute(self):
+    _telemetry_name = 'face_count'
+
+    def _telemetry_value(self, event):
+        return event.count
+
+    async def execute(self, robot=None):
         pass
 
-    def __init__(self):
+    def __init__(self, period: int = 1000, timeout: int = 1000):
 
         cmd_id = _PCProgramCmdId.FACE_DETECT_TASK_REQUEST.value
 
         request = FaceDetectTaskRequest()
 
         # 单次侦测超时时间
-        request.timeout = 1000
+        request.timeout = timeout
 
         # 侦测间隔时间
-        request.period = 1000
+        request.period = period
 
         # 任务延时时间
         request.delay = 0
@@ -148,34 +125,37 @@ class ObserveFaceDetect(BaseEventApi):
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=request)
 
-    def _parse_msg(self, message):
+    @property
+    def sampling_period(self) -> int:
+        """当前的检测周期(毫秒)
         """
+        return self.request.period
 
-        Args:
-            message (Message):待解析的Message对象
+    def set_sampling_period(self, period: int):
+        """修改检测周期, 监听中时重新发送订阅请求
 
-        Returns:
-            FaceDetectTaskResponse
+        Args:
+            period (int): 检测周期(毫秒)
         """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceDetectTaskResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+        request = type(self.request)()
+        request.CopyFrom(self.request)
+        request.period = period
+        self.update_request(request)
+
+    def stop(self) -> bool:
         """
         停止人脸个数检测,停止监听人脸个数
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopFaceDetect().execute())
+        last = super().stop()
 
-        super().stop()
+        if last:
+            asyncio.create_task(_StopFaceDetect().execute(robot=self.robot))
+
+        return last
 
 
 class _StopFaceDetect(BaseApiNoNeedResponse):
@@ -183,7 +163,7 @@ class _StopFaceDetect(BaseApiNoNeedResponse):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止人脸个数检测指令
 
@@ -198,24 +178,7 @@ class _StopFaceDetect(BaseApiNoNeedResponse):
 
         cmd_id = _PCProgramCmdId.FACE_DETECT_TASK_REQUEST.value
 
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            FaceDetectTaskResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceDetectTaskResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
 
 
 class ObserveFaceRecognise(BaseEventApi):
@@ -227,7 +190,7 @@ class ObserveFaceRecognise(BaseEventApi):
 
     如果是陌生人,返回 name: "stranger"
 
-    单次检测超时时间1s,侦测间隔1s
+    默认单次检测超时时间1s,侦测间隔1s
 
     # FaceRecogniseTaskResponse.faceInfos: [FaceInfoResponse] 人脸信息数组
 
@@ -237,22 +200,25 @@ class ObserveFaceRecognise(BaseEventApi):
 
     # FaceRecogniseTaskResponse.resultCode：返回码
 
+    Args:
+        period (int): 侦测间隔(毫秒),默认为1000
+        timeout (int): 单次侦测超时时间(毫秒),默认为1000
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         pass
 
-    def __init__(self):
+    def __init__(self, period: int = 1000, timeout: int = 1000):
 
         cmd_id = _PCProgramCmdId.FACE_RECOGNISE_TASK_REQUEST.value
 
         request = FaceRecogniseTaskRequest()
 
         # 单次侦测超时时间
-        request.timeout = 1000
+        request.timeout = timeout
 
         # 侦测间隔时间
-        request.period = 1000
+        request.period = period
 
         # 任务延时时间
         request.delay = 0
@@ -262,34 +228,37 @@ class ObserveFaceRecognise(BaseEventApi):
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=request)
 
-    def _parse_msg(self, message):
+    @property
+    def sampling_period(self) -> int:
+        """当前的检测周期(毫秒)
         """
+        return self.request.period
 
-        Args:
-            message (Message):待解析的Message对象
+    def set_sampling_period(self, period: int):
+        """修改检测周期, 监听中时重新发送订阅请求
 
-        Returns:
-            FaceRecogniseTaskResponse
+        Args:
+            period (int): 检测周期(毫秒)
         """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceRecogniseTaskResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+        request = type(self.request)()
+        request.CopyFrom(self.request)
+        request.period = period
+        self.update_request(request)
+
+    def stop(self) -> bool:
         """
         停止人脸识别,停止监听人脸识别
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopFaceRecognise().execute())
+        last = super().stop()
+
+        if last:
+            asyncio.create_task(_StopFaceRecognise().execute(robot=self.robot))
 
-        super().stop()
+        return last
 
 
 class _StopFaceRecognise(BaseApiNoNeedResponse):
@@ -297,7 +266,7 @@ class _StopFaceRecognise(BaseApiNoNeedResponse):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止人脸识别指令
 
@@ -312,24 +281,7 @@ class _StopFaceRecognise(BaseApiNoNeedResponse):
 
         cmd_id = _PCProgramCmdId.FACE_RECOGNISE_TASK_REQUEST.value
 
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            FaceRecogniseTaskResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceRecogniseTaskResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
 
 
 class ObserveInfraredDistance(BaseEventApi):
@@ -337,57 +289,67 @@ class ObserveInfraredDistance(BaseEventApi):
 
     监听红外距离事件,机器人上报检测到的与面前最近障碍物的红外距离
 
-    检测周期1s
+    默认检测周期1s
 
     # ObserveInfraredDistanceResponse.distance：红外距离
 
+    Args:
+        sampling_period (int): 检测周期(毫秒),默认为1000
     """
 
-    async def execute(self):
+    _telemetry_name = 'infrared_distance'
+
+    def _telemetry_value(self, event):
+        return event.distance
+
+    async def execute(self, robot=None):
         pass
 
-    def __init__(self):
+    def __init__(self, sampling_period: int = 1000):
 
         cmd_id = _PCProgramCmdId.SUBSCRIBE_INFRARED_DISTANCE_REQUEST.value
 
         request = ObserveInfraredDistanceRequest()
 
         # 检测周期
-        request.samplingPeriod = 1000
+        request.samplingPeriod = sampling_period
 
         # 检测开关
         request.isSubscribe = True
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=request)
 
-    def _parse_msg(self, message):
+    @property
+    def sampling_period(self) -> int:
+        """当前的检测周期(毫秒)
         """
+        return self.request.samplingPeriod
 
-        Args:
-            message (Message):待解析的Message对象
+    def set_sampling_period(self, period: int):
+        """修改检测周期, 监听中时重新发送订阅请求
 
-        Returns:
-            ObserveInfraredDistanceResponse
+        Args:
+            period (int): 检测周期(毫秒)
         """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveInfraredDistanceResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+        request = type(self.request)()
+        request.CopyFrom(self.request)
+        request.samplingPeriod = period
+        self.update_request(request)
+
+    def stop(self) -> bool:
         """
         停止红外距离检测,停止监听红外距离
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopObserveInfraredDistance().execute())
+        last = super().stop()
 
-        super().stop()
+        if last:
+            asyncio.create_task(_StopObserveInfraredDistance().execute(robot=self.robot))
+
+        return last
 
 
 class _StopObserveInfraredDistance(BaseApiNoNeedResponse):
@@ -395,7 +357,7 @@ class _StopObserveInfraredDistance(BaseApiNoNeedResponse):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止红外监测指令
 
@@ -408,26 +370,9 @@ class _StopObserveInfraredDistance(BaseApiNoNeedResponse):
         # 检测开关
         request.isSubscribe = False
 
-        cmd_id = _PCProgramCmdId.FACE_RECOGNISE_TASK_REQUEST.value
-
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
+        cmd_id = _PCProgramCmdId.SUBSCRIBE_INFRARED_DISTANCE_REQUEST.value
 
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ObserveInfraredDistanceResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveInfraredDistanceResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
 
 
 @enum.unique
@@ -479,7 +424,12 @@ class ObserveRobotPosture(BaseEventApi):
 
     """
 
-    async def execute(self):
+    _telemetry_name = 'posture'
+
+    def _telemetry_value(self, event):
+        return event.status
+
+    async def execute(self, robot=None):
         pass
 
     def __init__(self):
@@ -493,34 +443,20 @@ class ObserveRobotPosture(BaseEventApi):
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=request)
 
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ObserveFallClimbResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveFallClimbResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+    def stop(self) -> bool:
         """
         停止机器人姿势检测,停止监听机器人姿势
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopObserveRobotPosture().execute())
+        last = super().stop()
+
+        if last:
+            asyncio.create_task(_StopObserveRobotPosture().execute(robot=self.robot))
 
-        super().stop()
+        return last
 
 
 class _StopObserveRobotPosture(BaseApiNoNeedResponse):
@@ -528,7 +464,7 @@ class _StopObserveRobotPosture(BaseApiNoNeedResponse):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止机器人姿态监测
 
@@ -543,24 +479,7 @@ class _StopObserveRobotPosture(BaseApiNoNeedResponse):
 
         cmd_id = _PCProgramCmdId.SUBSCRIBE_ROBOT_POSTURE_REQUEST.value
 
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ObserveFallClimbResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveFallClimbResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
 
 
 @enum.unique
@@ -588,7 +507,7 @@ class ObserveHeadRacket(BaseEventApi):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         pass
 
     def __init__(self):
@@ -602,34 +521,20 @@ class ObserveHeadRacket(BaseEventApi):
 
         BaseEventApi.__init__(self, cmd_id=cmd_id, message=message)
 
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ObserveHeadRacketResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveHeadRacketResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
-
-    def stop(self):
+    def stop(self) -> bool:
         """
         停止机器人拍头事件检测,停止监听机器人拍头事件
 
         Returns:
-            None
+            bool: 是否为最后一个监听器
         """
 
-        asyncio.create_task(_StopObserveHeadRacket().execute())
+        last = super().stop()
 
-        super().stop()
+        if last:
+            asyncio.create_task(_StopObserveHeadRacket().execute(robot=self.robot))
+
+        return last
 
 
 class _StopObserveHeadRacket(BaseApiNoNeedResponse):
@@ -637,7 +542,7 @@ class _StopObserveHeadRacket(BaseApiNoNeedResponse):
 
     """
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止拍头事件监测指令
 
@@ -650,23 +555,6 @@ class _StopObserveHeadRacket(BaseApiNoNeedResponse):
         # 检测开关
         request.isSubscribe = False
 
-        cmd_id = _PCProgramCmdId.SUBSCRIBE_ROBOT_POSTURE_REQUEST.value
-
-        return await self.send(cmd_id, request)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
+        cmd_id = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
 
-        Returns:
-            ObserveHeadRacketResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ObserveHeadRacketResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, robot=robot)
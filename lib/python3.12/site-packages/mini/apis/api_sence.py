@@ -4,7 +4,7 @@ import enum
 
 from mini.pb2.codemao_speechrecognise_pb2 import SpeechRecogniseRequest, SpeechRecogniseResponse
 
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.codemao_faceanalyze_pb2 import FaceAnalyzeRequest, FaceAnalyzeResponse
 from ..pb2.codemao_facedetect_pb2 import FaceDetectRequest, FaceDetectResponse
@@ -38,7 +38,7 @@ class FaceDetect(BaseApi):
         self.__is_serial = is_serial
         self.__timeout = timeout
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行检测人脸个数指令
 
@@ -47,30 +47,13 @@ class FaceDetect(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = FaceDetectRequest()
         request.timeout = self.__timeout
 
         cmd_id = _PCProgramCmdId.FACE_DETECT_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            FaceDetectResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceDetectResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class FaceAnalysis(BaseApi):
@@ -108,7 +91,7 @@ class FaceAnalysis(BaseApi):
         self.__is_serial = is_serial
         self.__timeout = timeout
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行人脸分析指令
 
@@ -117,29 +100,12 @@ class FaceAnalysis(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = FaceAnalyzeRequest()
         request.timeout = self.__timeout
 
         cmd_id = _PCProgramCmdId.FACE_ANALYSIS_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            FaceAnalyzeResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceAnalyzeResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -184,7 +150,7 @@ class ObjectRecognise(BaseApi):
         self.__object_type = object_type.value
         self.__timeout = timeout
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行物体识别指令
 
@@ -193,7 +159,7 @@ class ObjectRecognise(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = RecogniseObjectRequest()
         request.objectType = self.__object_type
@@ -201,24 +167,7 @@ class ObjectRecognise(BaseApi):
 
         cmd_id = _PCProgramCmdId.RECOGNISE_OBJECT_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            RecogniseObjectResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = RecogniseObjectResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class FaceRecognise(BaseApi):
@@ -248,7 +197,7 @@ class FaceRecognise(BaseApi):
         self.__is_serial = is_serial
         self.__timeout = timeout
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行人脸识别指令
 
@@ -257,29 +206,12 @@ class FaceRecognise(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = FaceRecogniseRequest()
         request.timeout = self.__timeout
 
         cmd_id = _PCProgramCmdId.FACE_RECOGNISE_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            FaceRecogniseResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = FaceRecogniseResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -317,7 +249,7 @@ class TakePicture(BaseApi):
         self.__is_serial = is_serial
         self.__type = take_picture_type.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行拍照指令
 
@@ -326,29 +258,12 @@ class TakePicture(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = TakePictureRequest()
         request.type = self.__type
 
         cmd_id = _PCProgramCmdId.TAKE_PICTURE_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            TakePictureResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = TakePictureResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class GetInfraredDistance(BaseApi):
@@ -366,7 +281,7 @@ class GetInfraredDistance(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行获取红外距离的指令
 
@@ -375,28 +290,11 @@ class GetInfraredDistance(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = GetInfraredDistanceRequest()
 
         cmd_id = _PCProgramCmdId.GET_INFRARED_DISTANCE_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetInfraredDistanceResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetInfraredDistanceResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class GetRegisterFaces(BaseApi):
@@ -422,7 +320,7 @@ class GetRegisterFaces(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行获取已注册人脸列表指令
 
@@ -431,28 +329,11 @@ class GetRegisterFaces(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = GetRegisterFacesRequest()
 
         cmd_id = _PCProgramCmdId.GET_REGISTER_FACES_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetRegisterFacesResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetRegisterFacesResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StartSpeechRecognise(BaseApi):
@@ -479,7 +360,7 @@ class StartSpeechRecognise(BaseApi):
         self.__timeLimit = time_limit
         self.__asrText = asr_text
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行语音识别指令
 
@@ -488,28 +369,11 @@ class StartSpeechRecognise(BaseApi):
         """
         timeout = 0
         if self.__isSerial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = SpeechRecogniseRequest()
         request.timeLimit = self.__timeLimit
         request.asrText = self.__asrText
         cmd_id = _PCProgramCmdId.SPEECH_RECOGNISE.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            SpeechRecogniseResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = SpeechRecogniseResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
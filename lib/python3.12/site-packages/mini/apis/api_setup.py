@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2.codemao_revertorigin_pb2 import RevertOriginRequest, RevertOriginResponse
 from ..pb2.pccodemao_disconnection_pb2 import DisconnectionRequest, DisconnectionResponse
@@ -26,7 +26,7 @@ class StartRunProgram(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行进入编程模式指令
 
@@ -35,29 +35,12 @@ class StartRunProgram(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = GetAppVersionRequest()
 
         cmd_id = _PCProgramCmdId.GET_ROBOT_VERSION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetAppVersionResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetAppVersionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StopRunProgram(BaseApi):
@@ -72,7 +55,7 @@ class StopRunProgram(BaseApi):
     def __init__(self, is_serial: bool = True, ):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行退出编程模式指令
 
@@ -81,21 +64,12 @@ class StopRunProgram(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = DisconnectionRequest()
 
         cmd_id = _PCProgramCmdId.DISCONNECTION_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = DisconnectionResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class RevertOrigin(BaseApi):
@@ -114,7 +88,7 @@ class RevertOrigin(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行机器人复位指令
 
@@ -123,27 +97,10 @@ class RevertOrigin(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = RevertOriginRequest()
 
         cmd_id = _PCProgramCmdId.REVERT_ORIGIN_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            RevertOriginResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = RevertOriginResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
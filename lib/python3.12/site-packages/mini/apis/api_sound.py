@@ -2,10 +2,9 @@
 
 import enum
 
-from mini.pb2.codemao_speechrecognise_pb2 import SpeechRecogniseRequest, SpeechRecogniseResponse
 
 from ..apis.api_config import ServicePlatform
-from ..apis.base_api import BaseApi, DEFAULT_TIMEOUT
+from ..apis.base_api import BaseApi, AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..apis.cmdid import _PCProgramCmdId
 from ..pb2 import cloudstorageurls_pb2
 from ..pb2.codemao_changerobotvolume_pb2 import ChangeRobotVolumeRequest, ChangeRobotVolumeResponse
@@ -15,6 +14,7 @@ from ..pb2.codemao_getaudiolist_pb2 import GetAudioListRequest, GetAudioListResp
 from ..pb2.codemao_playaudio_pb2 import PlayAudioRequest, PlayAudioResponse
 from ..pb2.codemao_playonlinemusic_pb2 import MusicRequest, MusicResponse
 from ..pb2.codemao_stopaudio_pb2 import StopAudioRequest, StopAudioResponse
+from ..pb2.codemao_speechrecognise_pb2 import SpeechRecogniseRequest, SpeechRecogniseResponse
 from ..pb2.pccodemao_message_pb2 import Message
 
 
@@ -51,7 +51,7 @@ class StartPlayTTS(BaseApi):
         self.__text = text
         self.__type = TTSControlType.START.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行开始播放TTS指令
 
@@ -61,7 +61,7 @@ class StartPlayTTS(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlTTSRequest()
         request.text = self.__text
@@ -69,24 +69,7 @@ class StartPlayTTS(BaseApi):
 
         cmd_id = _PCProgramCmdId.PLAY_TTS_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlTTSResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlTTSResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 
@@ -107,7 +90,7 @@ class StopPlayTTS(BaseApi):
         self.__isSerial = is_serial
         self.__type = TTSControlType.STOP.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止播放TTS指令
 
@@ -117,32 +100,14 @@ class StopPlayTTS(BaseApi):
         """
         timeout = 0
         if self.__isSerial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlTTSRequest()
         request.type = self.__type
 
         cmd_id = _PCProgramCmdId.PLAY_TTS_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlTTSResponse
-
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlTTSResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class _PlayTTS(BaseApi):
@@ -168,7 +133,7 @@ class _PlayTTS(BaseApi):
         self.__text = text
         self.__type = control_type.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行控制TTS指令
 
@@ -177,7 +142,7 @@ class _PlayTTS(BaseApi):
         """
         timeout = 0
         if self.__isSerial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ControlTTSRequest()
         request.text = self.__text
@@ -185,24 +150,7 @@ class _PlayTTS(BaseApi):
 
         cmd_id = _PCProgramCmdId.PLAY_TTS_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlTTSResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlTTSResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -253,7 +201,7 @@ class PlayAudio(BaseApi):
         self.__volume = volume
         self.__cloudStorageType = storage_type.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行播放音频指令
 
@@ -262,7 +210,7 @@ class PlayAudio(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         cloud = cloudstorageurls_pb2.CloudStorage()
         cloud.type = self.__cloudStorageType
@@ -275,24 +223,7 @@ class PlayAudio(BaseApi):
 
         cmd_id = _PCProgramCmdId.PLAY_AUDIO_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            PlayAudioResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = PlayAudioResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class StopAllAudio(BaseApi):
@@ -312,7 +243,7 @@ class StopAllAudio(BaseApi):
     def __init__(self, is_serial: bool = True):
         self.__is_serial = is_serial
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行停止所有音频指令
 
@@ -321,30 +252,13 @@ class StopAllAudio(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = StopAudioRequest()
 
         cmd_id = _PCProgramCmdId.STOP_AUDIO_REQUEST.value
 
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            StopAudioResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = StopAudioResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -387,7 +301,7 @@ class FetchAudioList(BaseApi):
         self.__is_serial = is_serial
         self.__search_type = search_type.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行获取音频列表指令
 
@@ -396,31 +310,14 @@ class FetchAudioList(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = GetAudioListRequest()
 
         request.searchType = self.__search_type
 
         cmd_id = _PCProgramCmdId.GET_AUDIO_LIST_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            GetAudioListResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = GetAudioListResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class __PlayOnlineMusic(BaseApi):
@@ -444,7 +341,7 @@ class __PlayOnlineMusic(BaseApi):
         self.__name = name
         self.__platform = ServicePlatform.TENCENT.value
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """
         执行播放在线歌曲指令
 
@@ -453,7 +350,7 @@ class __PlayOnlineMusic(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = MusicRequest()
 
@@ -461,24 +358,7 @@ class __PlayOnlineMusic(BaseApi):
         request.name = self.__name
 
         cmd_id = _PCProgramCmdId.PLAY_ONLINE_MUSIC_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            MusicResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = MusicResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class ChangeRobotVolume(BaseApi):
@@ -502,7 +382,7 @@ class ChangeRobotVolume(BaseApi):
         self.__is_serial = is_serial
         self.__volume = volume
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送设置机器人音量指令
 
         Returns:
@@ -510,30 +390,13 @@ class ChangeRobotVolume(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
 
         request = ChangeRobotVolumeRequest()
         request.volume = self.__volume
 
         cmd_id = _PCProgramCmdId.CHANGE_ROBOT_VOLUME_REQUEST.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ChangeRobotVolumeResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ChangeRobotVolumeResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 @enum.unique
@@ -580,7 +443,7 @@ class ControlRobotAudioRecord(BaseApi):
         self.__id = file_name
         self.__newId = new_file_name
 
-    async def execute(self):
+    async def execute(self, robot=None):
         """发送控制录音指令
 
         Returns:
@@ -588,7 +451,7 @@ class ControlRobotAudioRecord(BaseApi):
         """
         timeout = 0
         if self.__is_serial:
-            timeout = DEFAULT_TIMEOUT
+            timeout = AUTO_TIMEOUT
         request = ControlRobotRecordRequest()
         request.type = self.__control_type
         request.timeLimit = self.__timeLimit
@@ -600,24 +463,7 @@ class ControlRobotAudioRecord(BaseApi):
             request.newId = self.__newId
 
         cmd_id = _PCProgramCmdId.CONTROL_ROBOT_AUDIO_RECORD.value
-        return await self.send(cmd_id, request, timeout)
-
-    def _parse_msg(self, message):
-        """
-
-        Args:
-            message (Message):待解析的Message对象
-
-        Returns:
-            ControlRobotRecordResponse
-        """
-        if isinstance(message, Message):
-            data = message.bodyData
-            response = ControlRobotRecordResponse()
-            response.ParseFromString(data)
-            return response
-        else:
-            return None
+        return await self.send(cmd_id, request, timeout, robot=robot)
 
 
 class RobotAudioStartRecord(ControlRobotAudioRecord):
@@ -5,11 +5,19 @@ import enum
 from abc import ABC
 from typing import Callable, Union
 
+from .. import telemetry
+from .. import tracing
+from . import registry
+from . import timeout_policy as _timeout_policy
+from .event_stream import EventStream, StreamPolicy
+from .handler_runner import DEFAULT_BACKLOG, HandlerPolicy, HandlerRunner
+from .timeout_policy import AUTO_TIMEOUT, DEFAULT_TIMEOUT
 from ..channels.websocket_client import ubt_websocket as _UBTWebSocket, AbstractMsgHandler
+from ..pb2.pccodemao_message_pb2 import Message
 
-DEFAULT_TIMEOUT = 300
+log = tracing.get_logger(__name__)
 
-socket = _UBTWebSocket()
+socket = _UBTWebSocket.default()
 
 
 @enum.unique
@@ -33,7 +41,7 @@ class BaseApi(abc.ABC):
     """消息api基类
     """
 
-    async def send(self, cmd_id: int, message, timeout: int) -> Union[object, bool]:
+    async def send(self, cmd_id: int, message, timeout: int, robot: _UBTWebSocket = None) -> Union[object, bool]:
         """发送消息方法
 
         注意:由子类函数内部调用,子类实例不可调用。
@@ -42,6 +50,9 @@ class BaseApi(abc.ABC):
             cmd_id (int): 支持的命令id,例如:mini.apis.cmdid.PLAY_ACTION_REQUEST
             message (Message): 支持的消息实体,例如:mini.pb2.PlayActionRequest
             timeout (int): 超时时间,当timeout<=0时,表示不需要等待机器人回复,当timeout>0时,表示需要等待机器人回复,
+                为AUTO_TIMEOUT时由timeout_policy.policy按命令决定,且不超过timeout_policy.deadline()的剩余时间;
+                registry中登记为不回复(expects_reply为False)的命令在timeout为AUTO_TIMEOUT时不等待回复
+            robot (_UBTWebSocketClient): 目标机器人连接,例如RobotPool中的一个成员,默认为None,表示使用默认连接
 
         Returns:
             如果不支持该指令,返回tuple(MiniApiResultType.Unsupported,None)
@@ -50,38 +61,58 @@ class BaseApi(abc.ABC):
 
             当timeout<=0时,返回bool,表示消息是否发送成功
 
-            当timeout>0时
+            当timeout>0或为AUTO_TIMEOUT时
 
             如果消息超时或者发送失败,则返回tuple(MiniApiResultType.Timeout,None)
 
+            如果是不回复的命令且timeout为AUTO_TIMEOUT,发送成功后返回tuple(MiniApiResultType.Success,None)
+
             如果消息有回复,则返回tuple(MiniApiResultType.Success,result),result为相应的回复消息
 
+        Raises:
+            RobotSaturatedError: 连接的发送队列已满且设置了raise_when_saturated
+
         """
         assert cmd_id >= 0, 'cmdId should not be negative number in BaseApi'
         assert message is not None, 'message should not be none in BaseApi'
+        client = robot or socket
         # 通用的发送消息逻辑
-        if timeout <= 0:
-            return await socket.send_msg0(cmd_id, message)
+        spec = registry.get(cmd_id)
+        if timeout is not AUTO_TIMEOUT and timeout <= 0:
+            return await client.send_msg0(cmd_id, message)
+        elif timeout is AUTO_TIMEOUT and spec is not None and not spec.expects_reply:
+            # 机器人不回复, 不注册等待, 保持tuple返回值
+            if await client.send_msg0(cmd_id, message):
+                return MiniApiResultType.Success, None
+            return MiniApiResultType.Timeout, None
         else:
-            result = await socket.send_msg(cmd_id, message, timeout)
+            timeout = _timeout_policy.policy.resolve(cmd_id, timeout, message, client)
+            if timeout <= 0:
+                # 已超过deadline
+                client.metrics.record_timeout(cmd_id)
+                return MiniApiResultType.Timeout, None
+            result = await client.send_msg(cmd_id, message, timeout)
             if result:
                 if result.header.target == -1:
-                    import logging
-                    log = logging.getLogger(__name__)
-                    log.addHandler(logging.StreamHandler())
-                    log.setLevel(logging.WARNING)
-                    log.warning(f'当前机器人版本不支持命令:cmd={message.header.command}, 请升级机器人系统版本.')
+                    log.warning('当前机器人版本不支持命令:cmd=%s, 请升级机器人系统版本.', result.header.command)
                     return MiniApiResultType.Unsupported, None
                 else:
-                    return MiniApiResultType.Success, self._parse_msg(result)
+                    response = self._parse_msg(result)
+                    code = getattr(response, 'resultCode', 0)
+                    if code:
+                        client.metrics.record_error(cmd_id, code)
+                    return MiniApiResultType.Success, response
             else:
                 return MiniApiResultType.Timeout, None
 
-    async def execute(self):
+    async def execute(self, robot: _UBTWebSocket = None):
         """发送指令
 
         将支持的message序列化后,写入socket
         由子类实现
+
+        Args:
+            robot (_UBTWebSocketClient): 目标机器人连接,默认为None,表示使用默认连接
         """
         raise NotImplementedError()
 
@@ -89,11 +120,16 @@ class BaseApi(abc.ABC):
         """解析回复指令
 
         将收到的Message对象包含的消息数据反序列化为相应的response
-        由子类实现,仅供子类内部调用
+        默认按registry中该命令的回复类型解析,回复类型不同的子类可覆盖,仅供子类内部调用
         Args:
             message: Message对象
+
+        Returns:
+            回复对象,命令未在registry中注册时返回None
         """
-        raise NotImplementedError()
+        if isinstance(message, Message):
+            return registry.parse(message.header.command, message.bodyData)
+        return None
 
 
 class BaseApiNeedResponse(BaseApi, abc.ABC):
@@ -101,27 +137,72 @@ class BaseApiNeedResponse(BaseApi, abc.ABC):
     需要回复的消息api基类,timeout不能为空
     """
 
-    async def send(self, cmd_id, data, timeout: int):
+    async def send(self, cmd_id, data, timeout: int, robot: _UBTWebSocket = None):
         """重写父类方法
 
         校验timeout,必须>0
         """
 
-        assert timeout > 0, 'timeout should be Positive number in BaseApiNeedResponse'
-        return await super().send(cmd_id, data, timeout)
+        assert timeout is AUTO_TIMEOUT or timeout > 0, 'timeout should be Positive number in BaseApiNeedResponse'
+        return await super().send(cmd_id, data, timeout, robot=robot)
 
 
 class BaseApiNoNeedResponse(BaseApi, ABC):
     """不需要回复的消息api基类
     """
 
-    async def send(self, cmd_id, message, timeout: int = 0):
+    async def send(self, cmd_id, message, timeout: int = 0, robot: _UBTWebSocket = None):
         """重写父类方法
 
         将timeout设置为0
         """
 
-        return await super().send(cmd_id, message, 0)
+        return await super().send(cmd_id, message, 0, robot=robot)
+
+
+class LazyResponse(object):
+    """延迟解析的事件回复
+
+    持有Message的header与未解析的bodyData, 第一次访问回复字段时才解析,
+    之后的访问直接使用解析结果。handler只关心部分事件时可省去其余事件的解析
+    """
+    __slots__ = ('header', 'raw', '__message', '__parse', '__value', '__decoded')
+
+    def __init__(self, message, parse: 'Callable[..., object]'):
+        """
+        Args:
+            message (Message): 收到的消息
+            parse (Callable): 解析函数, parse(message)返回回复对象
+        """
+        self.header = message.header
+        self.raw: bytes = message.bodyData
+        self.__message = message
+        self.__parse = parse
+        self.__value = None
+        self.__decoded = False
+
+    @property
+    def decoded(self) -> bool:
+        """是否已经解析
+        """
+        return self.__decoded
+
+    def decode(self):
+        """解析并返回回复对象, 解析结果可能为None(例如未登记回复类型的命令)
+        """
+        if not self.__decoded:
+            self.__value = self.__parse(self.__message)
+            self.__decoded = True
+            self.__message = None
+        return self.__value
+
+    def __getattr__(self, name):
+        return getattr(self.decode(), name)
+
+    def __repr__(self):
+        if not self.__decoded:
+            return '{}(cmd={!r}, {} bytes)'.format(type(self).__name__, self.header.command, len(self.raw))
+        return repr(self.__value)
 
 
 class BaseEventApi(BaseApiNoNeedResponse, AbstractMsgHandler, ABC):
@@ -147,42 +228,170 @@ class BaseEventApi(BaseApiNoNeedResponse, AbstractMsgHandler, ABC):
         self.__request = message
         self.__is_repeat = is_repeat
         self.__timeout = timeout
-        self.__handler = handler
+        self.__runner = HandlerRunner(handler, cmd=cmd_id) if handler is not None else None
+        self.__robot = None
+        self.__lazy = False
+        self.__event_filter = None
+        self.__streams = []
+        self.__running = False
+        self.__started_by_stream = False
 
         if is_repeat:
             self.__repeatCount = -1
         else:
             self.__repeatCount = 1
 
-    def set_handler(self, handler: 'Callable[..., None]' = None):
+    def set_handler(self, handler: 'Callable[..., None]' = None,
+                    policy: Union[str, HandlerPolicy] = HandlerPolicy.INLINE, maxsize: int = DEFAULT_BACKLOG,
+                    overflow: Union[str, StreamPolicy] = StreamPolicy.DROP_OLDEST):
         """设置事件消息处理器
 
         Args:
-            handler (Callable): 事件消息处理器,f(message)
+            handler (Callable): 事件消息处理器,f(message),policy为ASYNC时为协程函数
+            policy (str/HandlerPolicy): 执行方式,'inline','thread','process'或'async',默认在接收循环中直接调用,
+                见HandlerPolicy; 非inline方式下事件按到达顺序依次执行
+            maxsize (int): 非inline方式下等待执行的事件上限,默认为256
+            overflow (str/StreamPolicy): 等待执行的事件达到上限时的策略,'drop_oldest'或'latest'
 
         """
-        self.__handler = handler
+        if handler is None:
+            self.__runner = None
+            return
+        self.__runner = HandlerRunner(handler, policy, cmd=self.__cmd_id, maxsize=maxsize, overflow=overflow)
+        if self.__running:
+            self.__runner.metrics = (self.__robot or socket).metrics
+
+    @property
+    def runner(self) -> HandlerRunner:
+        """事件处理器的执行器, 包含分发延迟和执行耗时统计, 没有处理器时为None
+        """
+        return self.__runner
+
+    def set_lazy(self, lazy: bool = True):
+        """设置是否延迟解析事件
+
+        为True时handler收到LazyResponse, 访问字段时才解析消息体
+
+        Args:
+            lazy (bool): 是否延迟解析
+
+        """
+        self.__lazy = lazy
+
+    def set_event_filter(self, event_filter: 'Callable[..., bool]' = None):
+        """设置事件过滤器, 在解析消息体之前调用
+
+        f(message)返回False的事件直接丢弃, 不解析、不计入监听次数, message为未解析bodyData的Message
+
+        Args:
+            event_filter (Callable): 事件过滤器,f(message) -> bool, None表示不过滤
+
+        """
+        self.__event_filter = event_filter
+
+    def stream(self, maxsize: int = 64, policy: Union[str, StreamPolicy] = StreamPolicy.DROP_OLDEST,
+               robot: _UBTWebSocket = None) -> EventStream:
+        """以异步迭代的方式读取事件
+
+        事件放入有界缓冲区, 接收循环不执行用户代码; 监听器未启动时自动启动,
+        最后一个由此启动的事件流关闭时自动停止
+
+        Args:
+            maxsize (int): 缓冲区大小,默认为64
+            policy (str/StreamPolicy): 缓冲区满时的策略,'drop_oldest','latest'或'block',见StreamPolicy
+            robot (_UBTWebSocketClient): 监听器未启动时使用的机器人连接,默认为None,表示使用默认连接
+
+        Returns:
+            EventStream: 可用于async for和async with, 溢出计数见EventStream.dropped
 
-    def start(self):
-        """启动监听器
         """
+        if not self.__running:
+            self.start(robot)
+            self.__started_by_stream = True
+        client = self.__robot or socket
+        stream = EventStream(maxsize, policy, hold=client.pause_reading, on_close=self.__close_stream)
+        self.__streams.append(stream)
+        return stream
+
+    def __close_stream(self, stream: EventStream):
+        if stream in self.__streams:
+            self.__streams.remove(stream)
+        if not self.__streams and self.__started_by_stream:
+            self.stop()
+
+    @property
+    def request(self):
+        """发送给机器人的订阅消息
+        """
+        return self.__request
 
-        # 发送消息
-        asyncio.create_task(self.send(cmd_id=self.__cmd_id, message=self.__request))
-        # 注册监听
-        socket.register_msg_handler(cmd=self.__cmd_id, handler=self)
+    def update_request(self, message):
+        """修改订阅消息, 监听中时重新发送, 同一连接上共用该订阅的监听器一并生效
 
-    def stop(self):
+        Args:
+            message (Message): 新的订阅消息
+        """
+        self.__request = message
+        if self.__running:
+            client = self.__robot or socket
+            client.update_subscription(self.__cmd_id, message)
+            asyncio.create_task(self.send(cmd_id=self.__cmd_id, message=message, robot=self.__robot))
+
+    @property
+    def robot(self) -> _UBTWebSocket:
+        """监听器所在的机器人连接, None表示默认连接
+        """
+        return self.__robot
+
+    @property
+    def running(self) -> bool:
+        """监听器是否已启动
+        """
+        return self.__running
+
+    def start(self, robot: _UBTWebSocket = None):
+        """启动监听器
+
+        Args:
+            robot (_UBTWebSocketClient): 目标机器人连接,默认为None,表示使用默认连接
+        """
+        self.__robot = robot
+        self.__running = True
+        client = robot or socket
+        if self.__runner is not None:
+            self.__runner.metrics = client.metrics
+        # 注册监听, 断线重连后自动重新订阅; 同一连接上相同命令的监听器共用机器人端的订阅
+        client.register_msg_handler(cmd=self.__cmd_id, handler=self)
+        if client.add_subscription(self, self.__cmd_id, self.__request):
+            # 第一个监听器才发送订阅消息
+            asyncio.create_task(self.send(cmd_id=self.__cmd_id, message=self.__request, robot=robot))
+
+    def stop(self) -> bool:
         """停止监听器
 
-        子类需要通知机器人停止事件上报
+        同一连接上还有其它同类监听器时只移除本监听器; 子类只在本监听器是该命令的最后一个监听器时通知机器人停止事件上报
+
+        Returns:
+            bool: 是否为最后一个监听器
         """
 
+        client = self.__robot or socket
         # 移除消息监听
-        socket.unregister_msg_handler(cmd=self.__cmd_id, handler=self)
+        client.unregister_msg_handler(cmd=self.__cmd_id, handler=self)
+        last = client.remove_subscription(self, self.__cmd_id)
+        self.__running = False
+        self.__started_by_stream = False
+        if self.__runner is not None:
+            self.__runner.close()
+        # 结束所有事件流
+        for stream in tuple(self.__streams):
+            stream.close()
+        return last
 
     # AbstractMsgHandler
     def handle_msg(self, message):
+        if self.__event_filter is not None and not self.__event_filter(message):
+            return
         # 处理监听次数
         if self.__repeatCount > 0:
             # 有监听次数
@@ -194,11 +403,26 @@ class BaseEventApi(BaseApiNoNeedResponse, AbstractMsgHandler, ABC):
 
     def __handle_msg(self, message):
         if message.header.target == -1:
-            import logging
-            log = logging.getLogger(__name__)
-            log.addHandler(logging.StreamHandler())
-            log.setLevel(logging.WARNING)
-            log.warning(f'当前机器人版本不支持命令:cmd={message.header.command}, 请升级机器人系统版本.')
+            log.warning('当前机器人版本不支持命令:cmd=%s, 请升级机器人系统版本.', message.header.command)
+            return
+        store = telemetry.get(self.__robot or socket) if self._telemetry_name is not None else None
+        if self.__runner is None and not self.__streams and store is None:
             return
-        if self.__handler is not None:
-            self.__handler(self._parse_msg(message))
+        if self.__lazy:
+            event = LazyResponse(message, self._parse_msg)
+        else:
+            event = self._parse_msg(message)
+        if self.__runner is not None:
+            self.__runner.submit(event, self.received_at)
+        for stream in self.__streams:
+            stream.put(event)
+        if store is not None:
+            store.record(self._telemetry_name, self._telemetry_value(event))
+
+    _telemetry_name = None
+    """开启telemetry时记录的序列名, None表示不记录"""
+
+    def _telemetry_value(self, event):
+        """从事件中取出telemetry记录的数值, 由记录telemetry的子类实现
+        """
+        raise NotImplementedError()
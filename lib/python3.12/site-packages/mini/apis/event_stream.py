@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import asyncio
+import collections
+import enum
+from typing import Callable, Deque, Optional, Union
+
+
+@enum.unique
+class StreamPolicy(enum.Enum):
+    """
+    事件流缓冲区满时的处理策略
+
+    DROP_OLDEST : 丢弃最早的未读事件
+
+    LATEST : 只保留最新的一个事件, 未读的旧事件被覆盖, 适合只关心当前状态的传感器
+
+    BLOCK : 不丢弃事件, 暂停读取连接直到消费者取走事件, 暂停期间同一连接上的其它消息也会延迟
+
+    """
+    DROP_OLDEST = 'drop_oldest'
+    LATEST = 'latest'
+    BLOCK = 'block'
+
+
+class EventStream(object):
+    """事件监听器的异步迭代接口, 由BaseEventApi.stream创建
+
+    接收循环只把事件放入有界缓冲区, 不执行用户代码::
+
+        async with ObserveRobotPosture().stream(maxsize=16, policy='latest') as events:
+            async for event in events:
+                ...
+
+    """
+
+    def __init__(self, maxsize: int = 64, policy: Union[str, StreamPolicy] = StreamPolicy.DROP_OLDEST,
+                 hold: Callable[[asyncio.Future], None] = None,
+                 on_close: Callable[['EventStream'], None] = None):
+        """
+        Args:
+            maxsize (int): 缓冲区大小, 必须大于0
+            policy (str/StreamPolicy): 缓冲区满时的策略, 'drop_oldest', 'latest' 或 'block'
+            hold (Callable): BLOCK策略下暂停读取连接, f(future), future完成后恢复
+            on_close (Callable): 关闭时的回调, f(stream)
+        """
+        assert maxsize > 0, 'maxsize should be positive in EventStream'
+        self.maxsize = maxsize
+        self.policy = StreamPolicy(policy)
+        self.received = 0
+        """收到的事件数"""
+        self.dropped = 0
+        """因缓冲区满被丢弃或覆盖的事件数"""
+        self.paused = 0
+        """BLOCK策略下暂停读取连接的次数"""
+        self.high_watermark = 0
+        """缓冲区的最大深度"""
+        self.__buffer: Deque = collections.deque()
+        self.__hold = hold
+        self.__on_close = on_close
+        self.__waiter: Optional[asyncio.Future] = None
+        self.__pause: Optional[asyncio.Future] = None
+        self.__closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def put(self, event):
+        """放入一个事件, 由接收循环调用, 不会阻塞
+
+        Args:
+            event: 解析后的事件
+        """
+        if self.__closed:
+            return
+        self.received += 1
+        buffer = self.__buffer
+        if self.policy == StreamPolicy.LATEST:
+            self.dropped += len(buffer)
+            buffer.clear()
+        elif self.policy == StreamPolicy.DROP_OLDEST and len(buffer) >= self.maxsize:
+            buffer.popleft()
+            self.dropped += 1
+        buffer.append(event)
+        if len(buffer) > self.high_watermark:
+            self.high_watermark = len(buffer)
+        if self.policy == StreamPolicy.BLOCK and len(buffer) >= self.maxsize and self.__pause is None \
+                and self.__hold is not None:
+            self.__pause = asyncio.get_running_loop().create_future()
+            self.paused += 1
+            self.__hold(self.__pause)
+        self.__wakeup()
+
+    async def get(self):
+        """取出下一个事件, 没有事件时等待
+
+        Raises:
+            StopAsyncIteration: 流已关闭且缓冲区为空
+        """
+        while not self.__buffer:
+            if self.__closed:
+                raise StopAsyncIteration
+            self.__waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.__waiter
+            finally:
+                self.__waiter = None
+        event = self.__buffer.popleft()
+        if self.__pause is not None and len(self.__buffer) < self.maxsize:
+            self.__resume()
+        return event
+
+    def close(self):
+        """关闭事件流, 缓冲区中剩余的事件仍可读出, 之后迭代结束
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__resume()
+        self.__wakeup()
+        if self.__on_close is not None:
+            self.__on_close(self)
+
+    def __wakeup(self):
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(None)
+
+    def __resume(self):
+        if self.__pause is not None:
+            if not self.__pause.done():
+                self.__pause.set_result(None)
+            self.__pause = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return '{}(policy={}, size={}/{}, received={}, dropped={})'.format(
+            type(self).__name__, self.policy.value, len(self.__buffer), self.maxsize, self.received, self.dropped)
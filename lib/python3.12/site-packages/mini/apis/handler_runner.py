@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import asyncio
+import collections
+import concurrent.futures
+import enum
+import importlib
+import time
+from typing import Callable, Deque, Dict, Optional, Tuple, Union
+
+from google.protobuf import message as _message
+
+from .. import tracing
+from ..metrics import Histogram, MetricsRegistry
+from .event_stream import StreamPolicy
+
+log = tracing.get_logger(__name__)
+
+DEFAULT_BACKLOG = 256
+"""非INLINE方式下等待执行的事件上限
+"""
+
+
+@enum.unique
+class HandlerPolicy(enum.Enum):
+    """
+    事件处理器的执行方式
+
+    INLINE : 在接收循环中直接调用(默认), 处理器阻塞时同一连接上的所有消息都会延迟
+
+    THREAD : 在共用的线程池中执行, 适合会释放GIL的IO或图像处理
+
+    PROCESS : 在共用的进程池中执行, 处理器需要可以pickle(模块级函数), 适合CPU密集的计算
+
+    ASYNC : 处理器为协程函数, 作为task执行
+
+    """
+    INLINE = 'inline'
+    THREAD = 'thread'
+    PROCESS = 'process'
+    ASYNC = 'async'
+
+
+_executors: Dict[HandlerPolicy, concurrent.futures.Executor] = {}
+
+
+def set_executor(policy: Union[str, HandlerPolicy], executor: concurrent.futures.Executor):
+    """替换THREAD或PROCESS方式共用的执行器
+
+    Args:
+        policy (str/HandlerPolicy): HandlerPolicy.THREAD 或 HandlerPolicy.PROCESS
+        executor (Executor): 执行器
+    """
+    policy = HandlerPolicy(policy)
+    assert policy in (HandlerPolicy.THREAD, HandlerPolicy.PROCESS), 'only thread/process policy has an executor'
+    _executors[policy] = executor
+
+
+def get_executor(policy: Union[str, HandlerPolicy]) -> concurrent.futures.Executor:
+    """THREAD或PROCESS方式共用的执行器, 第一次使用时创建
+    """
+    policy = HandlerPolicy(policy)
+    executor = _executors.get(policy)
+    if executor is None:
+        if policy == HandlerPolicy.THREAD:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='mini-handler')
+        elif policy == HandlerPolicy.PROCESS:
+            executor = concurrent.futures.ProcessPoolExecutor()
+        else:
+            raise ValueError(f'{policy} has no executor')
+        _executors[policy] = executor
+    return executor
+
+
+def _process_call(handler: Callable, event) -> tuple:
+    if hasattr(event, 'decode'):
+        # LazyResponse
+        event = event.decode()
+    if isinstance(event, _message.Message):
+        # pb2生成的类不能按模块路径pickle, 以类名和序列化后的字节传给子进程
+        return _call_with_message, handler, type(event).__name__, event.SerializeToString()
+    return handler, event
+
+
+def _call_with_message(handler: Callable, name: str, data: bytes):
+    """在子进程中重新解析事件后调用处理器
+    """
+    return handler(getattr(importlib.import_module('mini.pb2'), name).FromString(data))
+
+
+class HandlerRunner(object):
+    """按执行方式调用一个事件处理器
+
+    非INLINE方式下事件进入有界队列, 由一个按需创建的task依次执行, 同一订阅的事件保持到达顺序,
+    接收循环只负责入队; 处理器跟不上时按overflow丢弃事件, 不会无限占用内存
+    """
+
+    def __init__(self, handler: Callable, policy: Union[str, HandlerPolicy] = HandlerPolicy.INLINE,
+                 cmd: int = None, metrics: MetricsRegistry = None, maxsize: int = DEFAULT_BACKLOG,
+                 overflow: Union[str, StreamPolicy] = StreamPolicy.DROP_OLDEST):
+        """
+        Args:
+            handler (Callable): 事件处理器, ASYNC方式下为协程函数
+            policy (str/HandlerPolicy): 执行方式
+            cmd (int): 事件的命令id, 用于记录统计
+            metrics (MetricsRegistry): 记录分发延迟的统计表
+            maxsize (int): 等待执行的事件上限, 必须大于0
+            overflow (str/StreamPolicy): 队列满时的策略, 'drop_oldest'丢弃最早的事件, 'latest'只保留最新的事件
+        """
+        assert maxsize > 0, 'maxsize should be positive in HandlerRunner'
+        self.handler = handler
+        self.policy = HandlerPolicy(policy)
+        self.cmd = cmd
+        self.metrics = metrics
+        self.maxsize = maxsize
+        self.overflow = StreamPolicy(overflow)
+        assert self.overflow != StreamPolicy.BLOCK, 'HandlerRunner can not block the receive loop'
+        self.latency = Histogram()
+        """事件从收到到开始执行的延迟"""
+        self.duration = Histogram()
+        """处理器的执行耗时"""
+        self.errors = 0
+        self.dropped = 0
+        """因队列满被丢弃的事件数"""
+        self.__queue: Deque[Tuple[object, float]] = collections.deque()
+        self.__worker: Optional[asyncio.Task] = None
+
+    @property
+    def backlog(self) -> int:
+        """等待执行的事件数
+        """
+        return len(self.__queue)
+
+    def submit(self, event, received_at: float = None):
+        """提交一个事件, 由接收循环调用
+
+        Args:
+            event: 解析后的事件
+            received_at (float): 收到该帧时的loop时间, 默认为提交时
+        """
+        if self.policy == HandlerPolicy.INLINE:
+            started = time.monotonic()
+            self.__record(0.0 if received_at is None else asyncio.get_running_loop().time() - received_at)
+            try:
+                self.handler(event)
+            except Exception as e:
+                # 处理器的异常不能中断接收循环
+                self.errors += 1
+                log.exception('event handler failed: handler=%r, error=%r', self.handler, e)
+            finally:
+                self.duration.record(time.monotonic() - started)
+            return
+        if received_at is None:
+            received_at = asyncio.get_running_loop().time()
+        queue = self.__queue
+        if self.overflow == StreamPolicy.LATEST:
+            self.dropped += len(queue)
+            queue.clear()
+        elif len(queue) >= self.maxsize:
+            queue.popleft()
+            self.dropped += 1
+        queue.append((event, received_at))
+        if self.__worker is None or self.__worker.done():
+            self.__worker = asyncio.create_task(self.__drain())
+
+    def close(self):
+        """丢弃未执行的事件, 正在执行的处理器不受影响
+        """
+        self.__queue.clear()
+
+    async def __drain(self):
+        loop = asyncio.get_running_loop()
+        while self.__queue:
+            event, received_at = self.__queue.popleft()
+            started = time.monotonic()
+            self.__record(loop.time() - received_at)
+            try:
+                if self.policy == HandlerPolicy.ASYNC:
+                    await self.handler(event)
+                elif self.policy == HandlerPolicy.PROCESS:
+                    await loop.run_in_executor(get_executor(self.policy), *_process_call(self.handler, event))
+                else:
+                    await loop.run_in_executor(get_executor(self.policy), self.handler, event)
+            except Exception as e:
+                self.errors += 1
+                log.exception('event handler failed: handler=%r, error=%r', self.handler, e)
+            self.duration.record(time.monotonic() - started)
+
+    def __record(self, latency: float):
+        self.latency.record(latency)
+        if self.metrics is not None and self.cmd is not None:
+            self.metrics.record_dispatch(self.cmd, latency)
+
+    def __repr__(self):
+        return '{}({!r}, policy={}, backlog={}, dropped={})'.format(type(self).__name__, self.handler,
+                                                                    self.policy.value, len(self.__queue),
+                                                                    self.dropped)
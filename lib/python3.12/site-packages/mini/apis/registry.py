@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import importlib
+from typing import Callable, Dict, Iterator, Optional
+
+from .cmdid import _PCProgramCmdId
+
+
+class CommandSpec(object):
+    """一个命令的描述: 请求/回复类型, 是否幂等, 是否需要回复
+
+    请求与回复类在第一次访问时才导入, 不影响mini.pb2的按需加载
+    """
+    __slots__ = ('cmd', 'request_name', 'response_name', 'idempotent', 'expects_reply', 'subscription',
+                 '_request', '_response', '_parser')
+
+    def __init__(self, cmd: int, request_name: str, response_name: Optional[str], idempotent: bool = False,
+                 expects_reply: bool = True, subscription: bool = False):
+        """
+        Args:
+            cmd (int): 命令id
+            request_name (str): mini.pb2中的请求类名
+            response_name (str): mini.pb2中的回复类名, 没有回复时为None
+            idempotent (bool): 重复发送是否安全(查询、停止、设置为某个值)
+            expects_reply (bool): 机器人是否回复
+            subscription (bool): 是否为订阅类命令, 机器人会持续推送回复
+        """
+        self.cmd = cmd
+        self.request_name = request_name
+        self.response_name = response_name
+        self.idempotent = idempotent
+        self.expects_reply = expects_reply
+        self.subscription = subscription
+        self._request = None
+        self._response = None
+        self._parser = None
+
+    @property
+    def name(self) -> str:
+        try:
+            return _PCProgramCmdId(self.cmd).name
+        except ValueError:
+            return str(self.cmd)
+
+    @property
+    def request(self) -> type:
+        if self._request is None:
+            self._request = _resolve(self.request_name)
+        return self._request
+
+    @property
+    def response(self) -> Optional[type]:
+        if self._response is None and self.response_name is not None:
+            self._response = _resolve(self.response_name)
+        return self._response
+
+    @property
+    def parser(self) -> Optional[Callable[[bytes], object]]:
+        """回复类的FromString, 解析时复用
+        """
+        if self._parser is None and self.response is not None:
+            self._parser = self.response.FromString
+        return self._parser
+
+    def __repr__(self):
+        return '{}({}, {!r}, {!r})'.format(type(self).__name__, self.name, self.request_name, self.response_name)
+
+
+def _resolve(name: str) -> type:
+    return getattr(importlib.import_module('mini.pb2'), name)
+
+
+_specs: Dict[int, CommandSpec] = {}
+
+
+def register(spec: CommandSpec):
+    """注册或替换一个命令的描述, 可用于扩展命令或模拟器
+
+    Args:
+        spec (CommandSpec): 命令描述
+    """
+    _specs[spec.cmd] = spec
+
+
+def get(cmd: int) -> Optional[CommandSpec]:
+    """命令id对应的描述, 未注册时返回None
+    """
+    return _specs.get(cmd)
+
+
+def specs() -> Iterator[CommandSpec]:
+    """所有已注册的命令描述
+    """
+    return iter(tuple(_specs.values()))
+
+
+def parse(cmd: int, body: bytes):
+    """按命令的回复类型解析消息体
+
+    Args:
+        cmd (int): 命令id
+        body (bytes): Message.bodyData
+
+    Returns:
+        回复对象, 未注册或没有回复类型时返回None
+    """
+    spec = _specs.get(cmd)
+    if spec is None:
+        return None
+    parser = spec.parser
+    if parser is None:
+        return None
+    return parser(body)
+
+
+def _build():
+    _id = _PCProgramCmdId
+    table = (
+        # cmd, request, response, idempotent, subscription
+        (_id.PLAY_ACTION_REQUEST, 'PlayActionRequest', 'PlayActionResponse', False, False),
+        (_id.MOVE_ROBOT_REQUEST, 'MoveRobotRequest', 'MoveRobotResponse', False, False),
+        (_id.STOP_ACTION_REQUEST, 'StopActionRequest', 'StopActionResponse', True, False),
+        (_id.PLAY_TTS_REQUEST, 'ControlTTSRequest', 'ControlTTSResponse', False, False),
+        (_id.FACE_DETECT_REQUEST, 'FaceDetectRequest', 'FaceDetectResponse', True, False),
+        (_id.FACE_ANALYSIS_REQUEST, 'FaceAnalyzeRequest', 'FaceAnalyzeResponse', True, False),
+        (_id.RECOGNISE_OBJECT_REQUEST, 'RecogniseObjectRequest', 'RecogniseObjectResponse', True, False),
+        (_id.FACE_RECOGNISE_REQUEST, 'FaceRecogniseRequest', 'FaceRecogniseResponse', True, False),
+        (_id.TAKE_PICTURE_REQUEST, 'TakePictureRequest', 'TakePictureResponse', False, False),
+        (_id.PLAY_EXPRESSION_REQUEST, 'PlayExpressionRequest', 'PlayExpressionResponse', False, False),
+        (_id.SET_MOUTH_LAMP_REQUEST, 'SetMouthLampRequest', 'SetMouthLampResponse', True, False),
+        (_id.SUBSCRIBE_INFRARED_DISTANCE_REQUEST, 'ObserveInfraredDistanceRequest',
+         'ObserveInfraredDistanceResponse', True, True),
+        (_id.SUBSCRIBE_ROBOT_POSTURE_REQUEST, 'ObserveFallClimbRequest', 'ObserveFallClimbResponse', True, True),
+        (_id.SUBSCRIBE_HEAD_RACKET_REQUEST, 'ObserveHeadRacketRequest', 'ObserveHeadRacketResponse', True, True),
+        (_id.CONTROL_BEHAVIOR_REQUEST, 'ControlBehaviorRequest', 'ControlBehaviorResponse', False, False),
+        (_id.GET_ROBOT_VERSION_REQUEST, 'GetAppVersionRequest', 'GetAppVersionResponse', True, False),
+        (_id.GET_INFRARED_DISTANCE_REQUEST, 'GetInfraredDistanceRequest', 'GetInfraredDistanceResponse', True,
+         False),
+        (_id.REVERT_ORIGIN_REQUEST, 'RevertOriginRequest', 'RevertOriginResponse', True, False),
+        (_id.DISCONNECTION_REQUEST, 'DisconnectionRequest', 'DisconnectionResponse', True, False),
+        (_id.SWITCH_MOUTH_LAMP_REQUEST, 'ControlMouthRequest', 'ControlMouthResponse', True, False),
+        (_id.PLAY_AUDIO_REQUEST, 'PlayAudioRequest', 'PlayAudioResponse', False, False),
+        (_id.STOP_AUDIO_REQUEST, 'StopAudioRequest', 'StopAudioResponse', True, False),
+        (_id.GET_AUDIO_LIST_REQUEST, 'GetAudioListRequest', 'GetAudioListResponse', True, False),
+        (_id.TRANSLATE_REQUEST, 'TranslateRequest', 'TranslateResponse', False, False),
+        (_id.WIKI_REQUEST, 'WikiRequest', 'WikiResponse', False, False),
+        (_id.CHANGE_ROBOT_VOLUME_REQUEST, 'ChangeRobotVolumeRequest', 'ChangeRobotVolumeResponse', True, False),
+        (_id.PLAY_ONLINE_MUSIC_REQUEST, 'MusicRequest', 'MusicResponse', False, False),
+        (_id.FACE_DETECT_TASK_REQUEST, 'FaceDetectTaskRequest', 'FaceDetectTaskResponse', True, True),
+        (_id.GET_REGISTER_FACES_REQUEST, 'GetRegisterFacesRequest', 'GetRegisterFacesResponse', True, False),
+        (_id.FACE_RECOGNISE_TASK_REQUEST, 'FaceRecogniseTaskRequest', 'FaceRecogniseTaskResponse', True, True),
+        (_id.GET_ACTION_LIST, 'GetActionListRequest', 'GetActionListResponse', True, False),
+        (_id.CONTROL_ROBOT_AUDIO_RECORD, 'ControlRobotRecordRequest', 'ControlRobotRecordResponse', False, False),
+        (_id.SPEECH_RECOGNISE, 'SpeechRecogniseRequest', 'SpeechRecogniseResponse', True, True),
+        (_id.PLAY_CUSTOM_ACTION_REQUEST, 'PlayCustomActionRequest', 'PlayCustomActionResponse', False, False),
+        (_id.STOP_CUSTOM_ACTION_REQUEST, 'StopCustomActionRequest', 'StopCustomActionResponse', True, False),
+        (_id.STOP_SPEECH_RECOGNISE_REQUEST, 'StopSpeechRecogniseRequest', 'StopSpeechRecogniseResponse', True,
+         False),
+        (_id.GET_ROBOT_LANGUAGE_MODE, 'GetRobotLanguageRequest', 'GetRobotLanguageResponse', True, False),
+        (_id.SET_ROBOT_LANGUAGE, 'SetRobotLanguageRequest', 'SetRobotLanguageResponse', True, False),
+    )
+    # 不等待回复的命令: 订阅的回复是持续推送的事件, 由事件监听处理, 停止语音识别只在监听停止时发出
+    no_reply = (
+        _id.SUBSCRIBE_INFRARED_DISTANCE_REQUEST,
+        _id.SUBSCRIBE_ROBOT_POSTURE_REQUEST,
+        _id.SUBSCRIBE_HEAD_RACKET_REQUEST,
+        _id.FACE_DETECT_TASK_REQUEST,
+        _id.FACE_RECOGNISE_TASK_REQUEST,
+        _id.STOP_SPEECH_RECOGNISE_REQUEST,
+    )
+    for cmd, request, response, idempotent, subscription in table:
+        register(CommandSpec(cmd.value, request, response, idempotent=idempotent,
+                             expects_reply=cmd not in no_reply, subscription=subscription))
+
+
+_build()
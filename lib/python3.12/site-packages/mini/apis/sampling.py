@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import asyncio
+from typing import Optional
+
+from .. import tracing
+from ..channels.link_quality import LinkState
+from ..channels.websocket_client import ubt_websocket as _UBTWebSocket
+from .base_api import BaseEventApi, socket
+from .event_stream import EventStream
+
+log = tracing.get_logger(__name__)
+
+
+class AdaptiveSampler(object):
+    """按需调整监听器的检测周期
+
+    活跃时(如机器人移动中)以min_period采样, 空闲时降到idle_period, 减少机器人CPU和Wi-Fi占用;
+    消费者跟不上(事件流积压或丢弃)、连接RTT接近采样周期或连接质量下降时周期加倍,
+    恢复后逐步减半回到目标周期; 没有积压时切换活跃/空闲立即生效
+
+    监听器需要提供sampling_period和set_sampling_period, 如ObserveInfraredDistance::
+
+        observer = ObserveInfraredDistance()
+        events = observer.stream(maxsize=8, policy='latest')
+        sampler = AdaptiveSampler(observer, stream=events)
+        sampler.start()
+        sampler.active = True  # 开始移动
+
+    """
+
+    def __init__(self, observer: BaseEventApi, stream: EventStream = None, min_period: int = 100,
+                 idle_period: int = 5000, max_period: int = 10000, interval: float = 1.0, rtt_factor: float = 4,
+                 robot: _UBTWebSocket = None):
+        """
+        Args:
+            observer (BaseEventApi): 监听器
+            stream (EventStream): 消费者读取的事件流, 用于判断积压, 默认为None
+            min_period (int): 活跃时的检测周期(毫秒)
+            idle_period (int): 空闲时的检测周期(毫秒)
+            max_period (int): 周期上限(毫秒)
+            interval (float): 调整间隔(秒)
+            rtt_factor (float): 平滑RTT的多少倍超过周期时认为连接跟不上
+            robot (_UBTWebSocketClient): 判断连接质量的机器人连接, 默认为监听器启动时所在的连接
+        """
+        assert 0 < min_period <= idle_period <= max_period, 'expect 0 < min_period <= idle_period <= max_period'
+        self.observer = observer
+        self.stream = stream
+        self.min_period = min_period
+        self.idle_period = idle_period
+        self.max_period = max_period
+        self.interval = interval
+        self.rtt_factor = rtt_factor
+        self.robot = robot
+        self.active = False
+        """是否处于活跃状态, 由使用者设置"""
+        self.changes = 0
+        """周期调整次数"""
+        self.__dropped = stream.dropped if stream is not None else 0
+        self.__backoff = False
+        self.__task: Optional[asyncio.Task] = None
+
+    @property
+    def period(self) -> int:
+        return self.observer.sampling_period
+
+    @property
+    def client(self) -> Optional[_UBTWebSocket]:
+        """判断连接质量的机器人连接
+
+        未指定robot时为监听器所在的连接; 监听器未启动时为None, 不借用默认连接(连接池中可能是另一台机器人)
+        """
+        if self.robot is not None:
+            return self.robot
+        if self.observer.robot is not None:
+            return self.observer.robot
+        return socket if self.observer.running else None
+
+    def congested(self) -> bool:
+        """消费者或连接是否跟不上当前周期
+        """
+        stream = self.stream
+        if stream is not None:
+            dropped, self.__dropped = stream.dropped - self.__dropped, stream.dropped
+            if dropped > 0 or len(stream) * 2 > stream.maxsize:
+                return True
+        client = self.client
+        if client is None:
+            return False
+        if client.link_state != LinkState.GOOD:
+            return True
+        srtt = client.link.srtt
+        return srtt is not None and srtt * self.rtt_factor * 1000 > self.period
+
+    def evaluate(self) -> int:
+        """计算下一个检测周期
+
+        Returns:
+            int: 检测周期(毫秒)
+        """
+        target = self.min_period if self.active else self.idle_period
+        period = self.period
+        if self.congested():
+            self.__backoff = True
+            return min(self.max_period, max(period * 2, target))
+        if self.__backoff and period > target:
+            return max(target, period // 2)
+        self.__backoff = False
+        return target
+
+    def update(self) -> bool:
+        """立即调整一次, 周期变化小于10%时不重新订阅
+
+        Returns:
+            bool: 是否修改了周期
+        """
+        period = self.evaluate()
+        current = self.period
+        if abs(period - current) * 10 < current:
+            return False
+        log.info('sampling period %d -> %d ms, observer=%r', current, period, self.observer)
+        self.observer.set_sampling_period(period)
+        self.changes += 1
+        return True
+
+    def start(self):
+        """开始周期性调整
+        """
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.create_task(self.__run())
+
+    def stop(self):
+        """停止调整, 保持当前周期
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    async def __run(self):
+        while True:
+            self.update()
+            await asyncio.sleep(self.interval)
+
+    def __repr__(self):
+        return '{}(period={}, active={}, changes={})'.format(type(self).__name__, self.period, self.active,
+                                                            self.changes)
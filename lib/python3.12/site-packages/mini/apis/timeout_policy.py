@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+import contextlib
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Set
+
+from .cmdid import _PCProgramCmdId
+from .. import metrics as _metrics
+
+DEFAULT_TIMEOUT = 300
+"""没有其它依据时的超时(秒)
+"""
+
+AUTO_TIMEOUT = object()
+"""BaseApi.send的timeout取该值时由TimeoutPolicy按命令决定超时
+"""
+
+_deadline: ContextVar[Optional[float]] = ContextVar('mini_deadline', default=None)
+
+_QUICK_COMMANDS = (
+    _PCProgramCmdId.STOP_ACTION_REQUEST,
+    _PCProgramCmdId.SET_MOUTH_LAMP_REQUEST,
+    _PCProgramCmdId.SUBSCRIBE_INFRARED_DISTANCE_REQUEST,
+    _PCProgramCmdId.SUBSCRIBE_ROBOT_POSTURE_REQUEST,
+    _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST,
+    _PCProgramCmdId.GET_ROBOT_VERSION_REQUEST,
+    _PCProgramCmdId.GET_INFRARED_DISTANCE_REQUEST,
+    _PCProgramCmdId.REVERT_ORIGIN_REQUEST,
+    _PCProgramCmdId.SWITCH_MOUTH_LAMP_REQUEST,
+    _PCProgramCmdId.STOP_AUDIO_REQUEST,
+    _PCProgramCmdId.GET_AUDIO_LIST_REQUEST,
+    _PCProgramCmdId.CHANGE_ROBOT_VOLUME_REQUEST,
+    _PCProgramCmdId.GET_REGISTER_FACES_REQUEST,
+    _PCProgramCmdId.GET_ACTION_LIST,
+    _PCProgramCmdId.GET_SERVER_INFO,
+    _PCProgramCmdId.STOP_CUSTOM_ACTION_REQUEST,
+    _PCProgramCmdId.STOP_SPEECH_RECOGNISE_REQUEST,
+    _PCProgramCmdId.GET_ROBOT_LANGUAGE_MODE,
+    _PCProgramCmdId.SET_ROBOT_LANGUAGE,
+)
+"""查询和停止类命令, 机器人应立即回复
+"""
+
+_VISION_COMMANDS = (
+    _PCProgramCmdId.FACE_DETECT_REQUEST,
+    _PCProgramCmdId.FACE_ANALYSIS_REQUEST,
+    _PCProgramCmdId.RECOGNISE_OBJECT_REQUEST,
+    _PCProgramCmdId.FACE_RECOGNISE_REQUEST,
+    _PCProgramCmdId.TAKE_PICTURE_REQUEST,
+)
+"""视觉类命令, 请求中的timeout字段另外计入
+"""
+
+_VARIABLE_DURATION_COMMANDS = (
+    _PCProgramCmdId.PLAY_ACTION_REQUEST,
+    _PCProgramCmdId.MOVE_ROBOT_REQUEST,
+    _PCProgramCmdId.PLAY_TTS_REQUEST,
+    _PCProgramCmdId.CONTROL_BEHAVIOR_REQUEST,
+    _PCProgramCmdId.PLAY_AUDIO_REQUEST,
+    _PCProgramCmdId.PLAY_ONLINE_MUSIC_REQUEST,
+    _PCProgramCmdId.CONTROL_ROBOT_AUDIO_RECORD,
+    _PCProgramCmdId.SPEECH_RECOGNISE,
+    _PCProgramCmdId.PLAY_CUSTOM_ACTION_REQUEST,
+)
+"""执行时长取决于内容(动作、语音长度等)的命令, 历史耗时不能代表下一次, 默认不学习
+"""
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """为当前任务内的所有api调用设置截止时间
+
+    嵌套使用时取更早的截止时间, asyncio.create_task创建的子任务会继承
+
+    用法:
+        with deadline(5):
+            await PlayAction(action_name='010').execute()
+            await GetInfraredDistance().execute()
+
+    Args:
+        seconds (float): 从现在起的秒数
+
+    Yields:
+        float: 截止时间(time.monotonic())
+    """
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and current < at:
+        at = current
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """当前截止时间的剩余秒数, 没有设置截止时间时返回None
+    """
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+class TimeoutPolicy(object):
+    """按命令决定请求超时
+
+    优先级: set_timeout设置的值 > 由耗时分布学习的值(p99 * k) 与 内置默认值 中较小者 > default,
+    最后受当前deadline限制
+    """
+
+    def __init__(self, default: float = DEFAULT_TIMEOUT, k: float = 4, floor: float = 5,
+                 min_samples: int = 20, source: _metrics.MetricsRegistry = None):
+        """
+        Args:
+            default (float): 没有其它依据时的超时(秒)
+            k (float): 学习值为完成耗时p99的k倍
+            floor (float): 学习值与内置默认值的下限(秒)
+            min_samples (int): 至少有多少次完成的请求才使用学习值
+            source (MetricsRegistry): 耗时分布来源, 默认为请求所用连接的统计表(mini.metrics.registry或RobotPool中各机器人的统计表)
+        """
+        self.default = default
+        self.k = k
+        self.floor = floor
+        self.min_samples = min_samples
+        self.adaptive = True
+        """是否使用耗时分布学习超时"""
+        self.variable: Set[int] = {cmd.value for cmd in _VARIABLE_DURATION_COMMANDS}
+        """不学习超时的命令"""
+        self.__source = source
+        self.__overrides: Dict[int, float] = {}
+        self.__defaults: Dict[int, float] = {}
+        for cmd in _QUICK_COMMANDS:
+            self.__defaults[cmd.value] = 10
+        for cmd in _VISION_COMMANDS:
+            self.__defaults[cmd.value] = 30
+
+    @property
+    def source(self) -> _metrics.MetricsRegistry:
+        return self.__source or _metrics.registry
+
+    def set_timeout(self, cmd: int, seconds: Optional[float]):
+        """固定某个命令的超时, seconds为None时恢复自动
+
+        Args:
+            cmd (int): 命令id
+            seconds (float): 超时(秒)
+        """
+        if seconds is None:
+            self.__overrides.pop(cmd, None)
+        else:
+            self.__overrides[cmd] = seconds
+
+    def learned_timeout(self, cmd: int, robot=None) -> Optional[float]:
+        """由该命令的完成耗时分布得到的超时, 样本不足时返回None
+
+        Args:
+            cmd (int): 命令id
+            robot (_UBTWebSocketClient): 连接, 未指定source时使用它的统计表
+        """
+        if cmd in self.variable:
+            return None
+        source = self.__source or getattr(robot, 'metrics', None) or _metrics.registry
+        metrics = source.get(cmd)
+        if metrics is None or metrics.completion.count < self.min_samples:
+            return None
+        return max(self.floor, metrics.completion.percentile(0.99) * self.k)
+
+    def timeout_for(self, cmd: int, message=None, robot=None) -> float:
+        """命令的超时, 不考虑deadline
+
+        Args:
+            cmd (int): 命令id
+            message: 请求, 其timeout字段(机器人端执行时长, 秒)会计入
+            robot (_UBTWebSocketClient): 连接, 其心跳RTT会计入
+
+        Returns:
+            float: 超时(秒)
+        """
+        timeout = self.__overrides.get(cmd)
+        if timeout is not None:
+            return timeout
+        timeout = self.__defaults.get(cmd, self.default)
+        if self.adaptive:
+            learned = self.learned_timeout(cmd, robot)
+            if learned is not None:
+                timeout = min(timeout, learned)
+        request_timeout = getattr(message, 'timeout', 0)
+        if isinstance(request_timeout, int) and request_timeout > 0:
+            timeout = max(timeout, request_timeout + self.floor)
+        if robot is not None and hasattr(robot, 'suggested_timeout'):
+            link_timeout = robot.suggested_timeout(self.k, self.floor)
+            if link_timeout is not None:
+                timeout = max(timeout, link_timeout)
+        return timeout
+
+    def resolve(self, cmd: int, timeout: float = AUTO_TIMEOUT, message=None, robot=None) -> float:
+        """BaseApi.send使用的最终超时
+
+        timeout为AUTO_TIMEOUT时由timeout_for决定, 其它值(包括300)保持不变, 然后受当前deadline限制
+
+        Returns:
+            float: 超时(秒), <=0表示已经超过deadline
+        """
+        if timeout is AUTO_TIMEOUT:
+            timeout = self.timeout_for(cmd, message, robot)
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        return timeout
+
+
+policy = TimeoutPolicy()
+"""BaseApi.send使用的默认策略
+"""
@@ -0,0 +1,60 @@
+import binascii
+import logging
+from typing import Union
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+if log.level == logging.NOTSET:
+    log.setLevel(logging.WARN)
+
+FRAME_TERMINATOR = b'&'
+"""帧结束符, 机器人以 base64(protobuf) + '&' 作为一帧
+"""
+
+_BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def encode(data: _BytesLike) -> bytes:
+    """把protobuf序列化后的字节编码成一帧
+
+    直接输出ascii字节, 可以作为websocket文本帧写出, 不再经过str的格式化和切片
+
+    Args:
+        data (bytes/bytearray/memoryview): 消息字节
+
+    Returns:
+        bytes: base64编码并带结束符的帧
+    """
+    frame = binascii.b2a_base64(data, newline=False) + FRAME_TERMINATOR
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('encode frame: %d bytes -> %d bytes', len(data), len(frame))
+    return frame
+
+
+def encode_text(data: _BytesLike) -> str:
+    """同encode, 返回str, 用于只接受str作为文本帧的发送接口
+
+    Args:
+        data (bytes/bytearray/memoryview): 消息字节
+
+    Returns:
+        str: base64编码并带结束符的帧
+    """
+    return encode(data).decode('ascii')
+
+
+def decode(frame: Union[str, _BytesLike]) -> bytes:
+    """把收到的一帧解码成protobuf字节
+
+    结束符不在base64字符表中, 解码时会被忽略, 因此无需先切片复制
+
+    Args:
+        frame (str/bytes/bytearray/memoryview): 收到的帧
+
+    Returns:
+        bytes: 消息字节
+    """
+    data = binascii.a2b_base64(frame)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('decode frame: %d bytes -> %d bytes', len(frame), len(data))
+    return data
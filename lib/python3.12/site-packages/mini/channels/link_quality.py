@@ -0,0 +1,84 @@
+import enum
+from typing import Optional
+
+from ..metrics import Histogram
+
+
+@enum.unique
+class LinkState(enum.Enum):
+    """
+    连接质量状态
+
+    GOOD : 心跳正常
+
+    DEGRADED : 平滑RTT超过阈值, 或有心跳未收到回复
+
+    LOST : 连续多次心跳未收到回复, 或连接已断开
+    """
+    GOOD = 1
+    DEGRADED = 2
+    LOST = 3
+
+
+class RttEstimator(object):
+    """按RFC 6298估算平滑RTT与抖动, 同时保留RTT分布用于分位数
+    """
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        """平滑RTT(秒)"""
+        self.rttvar: Optional[float] = None
+        """RTT抖动(秒)"""
+        self.last: Optional[float] = None
+        """最近一次RTT(秒)"""
+        self.missed = 0
+        """连续未收到回复的心跳数"""
+        self.histogram = Histogram()
+
+    def update(self, rtt: float):
+        """记录一次心跳的RTT
+
+        Args:
+            rtt (float): 往返时间(秒)
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.last = rtt
+        self.missed = 0
+        self.histogram.record(rtt)
+
+    def miss(self):
+        """记录一次未收到回复的心跳
+        """
+        self.missed += 1
+
+    @property
+    def rto(self) -> Optional[float]:
+        """RFC 6298的重传超时: srtt + 4 * rttvar
+        """
+        if self.srtt is None:
+            return None
+        return self.srtt + 4 * self.rttvar
+
+    def suggested_timeout(self, k: float = 4, floor: float = 1.0, default: float = None) -> Optional[float]:
+        """根据RTT分布给出请求超时建议: p99 RTT * k, 不小于floor
+
+        Args:
+            k (float): p99 RTT的倍数
+            floor (float): 最小超时(秒), 覆盖机器人处理命令本身所需的时间
+            default (float): 还没有RTT样本时的返回值
+
+        Returns:
+            float: 超时(秒)
+        """
+        if self.histogram.count == 0:
+            return default
+        return max(floor, self.histogram.percentile(0.99) * k)
+
+    def __repr__(self):
+        return '{}(srtt={!r}, rttvar={!r}, missed={!r})'.format(type(self).__name__, self.srtt, self.rttvar,
+                                                                self.missed)
@@ -1,9 +1,11 @@
-import base64
+import binascii
 import logging
 from functools import wraps
+from typing import Dict, Tuple
 
 from google.protobuf import message as _message
 
+from . import frame_codec
 from ..pb2.pccodemao_message_pb2 import Message
 from ..pb2.pccodemao_messageheader_pb2 import MessageHeader
 
@@ -24,6 +26,118 @@ def build_request_msg(cmd: int, send_serial: int, request: _message.Message) ->
     return msg
 
 
+TEMPLATE_CACHE_SIZE = 256
+"""请求模板缓存的最大条目数
+"""
+
+TEMPLATE_BODY_LIMIT = 4096
+"""超过此长度的请求体不缓存模板
+"""
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _b64(data: bytes) -> bytes:
+    return binascii.b2a_base64(data, newline=False)
+
+
+class _RequestTemplate(object):
+    """预先序列化的请求帧, 只有header.id随请求变化
+
+    Message: field 1 header, field 2 bodyData; MessageHeader: field 1 id 排在最前,
+    因此 header 除id外的部分和 bodyData 部分都是常量。
+
+    base64按3字节一组编码, 常量部分的起始位置随id长度变化, 因此按 前缀长度 % 3
+    缓存常量部分三种对齐方式的编码结果, 拼接时只编码变化的前缀和跨越边界的一组。
+    """
+    __slots__ = ('header_rest', 'body_field', 'tails', 'frame0')
+
+    def __init__(self, cmd: int, body: bytes):
+        header = MessageHeader()
+        header.command = cmd
+        self.header_rest = header.SerializeToString()
+        self.body_field = b'\x12' + _varint(len(body)) + body if body else b''
+        self.tails = tuple(_b64(self.body_field[start:]) for start in range(3))
+        self.frame0 = None
+
+    def serialize(self, identify: str) -> bytes:
+        """等同于build_request_msg(...).SerializeToString()
+        """
+        return self.__prefix(identify.encode('utf-8')) + self.body_field
+
+    def frame(self, identify: str) -> bytes:
+        """等同于frame_codec.encode(self.serialize(identify))
+        """
+        if identify == '0':
+            if self.frame0 is None:
+                self.frame0 = self.__frame(b'0')
+            return self.frame0
+        return self.__frame(identify.encode('utf-8'))
+
+    def __prefix(self, identify: bytes) -> bytes:
+        header = b'\x0a' + _varint(len(identify)) + identify + self.header_rest
+        return b'\x0a' + _varint(len(header)) + header
+
+    def __frame(self, identify: bytes) -> bytes:
+        prefix = self.__prefix(identify)
+        aligned = len(prefix) - len(prefix) % 3
+        if aligned == len(prefix):
+            return _b64(prefix) + self.tails[0] + frame_codec.FRAME_TERMINATOR
+        fill = 3 - (len(prefix) - aligned)
+        return (_b64(prefix[:aligned]) + _b64(prefix[aligned:] + self.body_field[:fill]) + self.tails[fill]
+                + frame_codec.FRAME_TERMINATOR)
+
+
+_templates: Dict[Tuple[int, bytes], _RequestTemplate] = {}
+
+
+def _template(cmd: int, body: bytes) -> _RequestTemplate:
+    key = (cmd, body)
+    template = _templates.get(key)
+    if template is None:
+        if len(_templates) >= TEMPLATE_CACHE_SIZE:
+            del _templates[next(iter(_templates))]
+        template = _templates[key] = _RequestTemplate(cmd, body)
+    return template
+
+
+def build_request_frame(cmd: int, send_serial: int, request: _message.Message) -> bytes:
+    """构造请求并编码成一帧, 结果与 frame_codec.encode(build_request_msg(...).SerializeToString()) 相同
+
+    同一命令、同一请求内容(如停止、查询类命令)的帧模板会被缓存, 再次发送时只填入id,
+    不再创建Message/MessageHeader, 常量部分的base64编码也会复用
+
+    Args:
+        cmd (int): 命令id
+        send_serial (int): 消息id
+        request (Message): 请求
+
+    Returns:
+        bytes: base64编码并带结束符的帧
+    """
+    body = request.SerializeToString()
+    if len(body) > TEMPLATE_BODY_LIMIT:
+        msg = Message()
+        msg.bodyData = body
+        msg.header.command = cmd
+        msg.header.id = str(send_serial)
+        return frame_codec.encode(msg.SerializeToString())
+    return _template(cmd, body).frame(str(send_serial))
+
+
+def clear_templates():
+    """清空请求模板缓存
+    """
+    _templates.clear()
+
+
 def build_response_msg(cmd: int, send_serial: int, response: _message.Message) -> Message:
     msg = Message()
     msg.bodyData = response.SerializeToString()
@@ -47,13 +161,11 @@ def parse_body_msg(recv: bytes, clazz: type(_message.Message)) -> _message.Messa
 
 
 def base64_encode(b: bytes) -> str:
-    log.debug("{0} -----> {1}".format(str(b), str(base64.b64encode(b))))
-    return "{0}&".format(str(base64.b64encode(b))[2:-1])
+    return frame_codec.encode_text(b)
 
 
-def base64_decode(b: str) -> str:
-    log.debug("{0}".format(str(b)))
-    return base64.b64decode(b[:-1])
+def base64_decode(b: str) -> bytes:
+    return frame_codec.decode(b)
 
 
 def coroutine(func):
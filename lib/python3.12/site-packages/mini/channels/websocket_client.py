@@ -1,25 +1,72 @@
 import abc
 import asyncio
+import enum
 import logging
+import random
 import threading
 from asyncio import Future
 
 import websockets
 import websockets.exceptions
 from google.protobuf import message as _message
-from typing import Type, Any
+from typing import Type, Any, Optional, Dict, Tuple, Callable, List
 from websockets.exceptions import ConnectionClosed, ConnectionClosedOK
+from websockets.frames import OP_TEXT
 
 from ..channels import msg_utils as msg_utils
+from ..channels import frame_codec
+from ..channels.link_quality import LinkState, RttEstimator
+from .. import loop_monitor
+from .. import metrics as _metrics
+from .. import tracing
 from ..pb2.pccodemao_message_pb2 import Message
 
-log = logging.getLogger(__name__)
-log.addHandler(logging.StreamHandler())
-if log.level == logging.NOTSET:
-    log.setLevel(logging.WARNING)
+log = tracing.get_logger(__name__)
+
+DEFAULT_SEND_QUEUE_SIZE = 256
+"""发送队列默认长度
+"""
+
+_MAX_BATCH_FRAMES = 32
+"""写协程一次合并写入的最大帧数
+"""
+
+_COALESCE_FRAME_SIZE = 4096
+"""小于该长度的帧合并写入后统一drain
+"""
+
+DEFAULT_SWEEP_INTERVAL = 30
+"""清理过期请求的周期(秒)
+"""
+
+DEFAULT_KEEPALIVE_INTERVAL = 5
+"""心跳周期(秒), 0表示不发心跳
+"""
+
+
+@enum.unique
+class PendingPolicy(enum.Enum):
+    """连接断开时, 对还在等待回复的请求的处理策略
+
+    FAIL : 立即失败, 调用方得到MiniApiResultType.Timeout
+
+    RETRY : 保留请求, 重连成功后重新发送, 仍受调用方超时时间约束
+    """
+    FAIL = 1
+    RETRY = 2
+
+
+class RobotSaturatedError(Exception):
+    """发送队列已满, 机器人处理不过来
+
+    仅当_UBTWebSocketClient.raise_when_saturated为True时抛出, 否则发送方等待队列空闲
+    """
+    pass
 
 
 class AbstractMsgHandler(abc.ABC):
+    received_at = None
+    """正在处理的消息收到时的loop时间, 由_MessageDispatcher在handle_msg之前设置"""
 
     def __init__(self, identify=0, msg_clazz: type(_message.Message) = Message):
         if issubclass(msg_clazz, _message.Message):
@@ -56,96 +103,249 @@ class AbstractMsgHandler(abc.ABC):
 class DefaultMsgHandler(AbstractMsgHandler):
 
     def handle_msg(self, message: _message.Message):
-        log.warning(f'handle msg: {message}')
+        log.warning('handle msg: %s', message)
 
 
 class _CoroutineHandler(AbstractMsgHandler):
 
-    def __init__(self, identify, future: Future):
+    def __init__(self, identify, future: Future, cmd: int = 0, frame=None, deadline: float = None):
         super().__init__(identify)
         self.coroutine = None
+        self.cmd = cmd
+        self.frame = frame
+        self.deadline = deadline
+        self.received_at = None
+        self.received_size = 0
         self.__future = future
 
+    @property
+    def done(self) -> bool:
+        return self.__future.done()
+
+    def fail(self, error: Exception):
+        if self.__future.cancelled() or self.__future.done():
+            return
+        self.__future.set_exception(error)
+
     def handle_msg(self, message: _message.Message):
-        log.debug(f'receiver message = {message}')
+        log.debug('receiver message = %s', message)
         if self.__future.cancelled() or self.__future.done():
             return
         self.__future.set_result(message)
 
 
 class _MessageDispatcher(object):
+    """消息分发器
+
+    请求/回复(_CoroutineHandler)按消息id保存在pending表中, O(1)查找, 同一命令的多个请求可以同时等待回复;
+
+    事件订阅等长期监听器按命令号保存在handlers表中
+    """
 
     def __init__(self):
         self.__handlers = {}
+        self.__pending = {}
+        self.orphaned_count = 0
+        """被清理器回收的请求累计数"""
 
     def add_handler(self, cmd, msg_handler: AbstractMsgHandler = DefaultMsgHandler(Message)):
-        if isinstance(msg_handler, AbstractMsgHandler):
+        if isinstance(msg_handler, _CoroutineHandler):
+            msg_handler.cmd = cmd
+            self.add_pending(msg_handler)
+        elif isinstance(msg_handler, AbstractMsgHandler):
             self.handlers.setdefault(cmd, []).append(msg_handler)
         else:
             class_name = type(msg_handler).__name__
             raise Exception(f'{class_name} is not instance of {AbstractMsgHandler.__name__}')
 
+    def add_pending(self, msg_handler: _CoroutineHandler):
+        self.__pending[str(msg_handler.identify)] = msg_handler
+
+    def remove_pending(self, identify) -> Optional[_CoroutineHandler]:
+        return self.__pending.pop(str(identify), None)
+
+    def sweep(self, now: float) -> int:
+        """回收已完成、已取消或超过截止时间的请求
+
+        Args:
+            now (float): 当前loop时间
+
+        Returns:
+            int: 本次回收的数量
+        """
+        orphans = [key for key, handler in self.__pending.items()
+                   if handler.done or (handler.deadline is not None and handler.deadline < now)]
+        for key in orphans:
+            del self.__pending[key]
+        self.orphaned_count += len(orphans)
+        return len(orphans)
+
     def remove_handler(self, cmd):
-        del self.handlers[cmd]
+        self.handlers.pop(cmd, None)
 
     def remove_handler0(self, cmd, handler: AbstractMsgHandler):
-        self.handlers.get(cmd).remove(handler)
+        if isinstance(handler, _CoroutineHandler):
+            self.remove_pending(handler.identify)
+            return
+        handler_list = self.handlers.get(cmd)
+        if handler_list is not None and handler in handler_list:
+            handler_list.remove(handler)
+            if not handler_list:
+                del self.handlers[cmd]
 
     def __len__(self):
         return len(self.handlers)
 
     def __iter__(self):
-        return tuple(self.handlers)
+        return iter(tuple(self.handlers))
 
     @property
     def handlers(self):
         return self.__handlers
 
+    @property
+    def pending(self):
+        return self.__pending
+
     def __repr__(self):
-        return '{}({!r})'.format(*self)
+        return '{}({!r}, pending={!r})'.format(type(self).__name__, tuple(self.handlers), len(self.__pending))
 
-    def dispatch(self, message: Message):
+    def dispatch(self, message: Message, received_at: float = None) -> Optional[_CoroutineHandler]:
+        """分发一条消息
+
+        Args:
+            message (Message): 收到的消息
+            received_at (float): 收到该帧时的loop时间
+
+        Returns:
+            _CoroutineHandler: 命中的请求, 事件推送时为None
+        """
         header = message.header
+        # 1. 请求的回复: 按消息id直接命中
+        handler = self.__pending.get(header.id)
+        if handler is not None and handler.cmd == header.command:
+            del self.__pending[header.id]
+            handler.received_at = received_at
+            log.debug('find pending handler = %r', handler)
+            if header.target == -1:
+                log.warning('cmd=%s is unsupported by current robot.', header.command)
+            # 不支持的命令也交给等待方, 由BaseApi返回MiniApiResultType.Unsupported
+            handler.handle_msg(message)
+            return handler
+        # 2. 事件推送: 交给该命令的所有监听器
         handler_list = self.handlers.get(header.command)
         if handler_list is not None:
             found: bool = False
-            for handler in handler_list:
+            for handler in tuple(handler_list):
                 if header.id == str(handler.identify):
-                    log.debug(f'find handler = {handler}')
+                    log.debug('find handler = %r', handler)
                     found = True
                     if header.target == -1:
-                        log.warning(f"cmd={header.command} is unsupported by current robot.")
+                        log.warning('cmd=%s is unsupported by current robot.', header.command)
                     else:
-                        handler.handle_msg(message)
-                    if isinstance(handler, _CoroutineHandler):
-                        log.debug(f'remove cmd={header.command} handlers.')
-                        self.remove_handler(header.command)
+                        previous = loop_monitor.enter(handler)
+                        try:
+                            handler.received_at = received_at
+                            handler.handle_msg(message)
+                        except Exception:
+                            # 监听器的异常只影响它自己, 不能中断接收循环
+                            log.exception('msg handler failure: %r', handler)
+                        finally:
+                            loop_monitor.leave(previous)
             if not found:
-                log.warning(f'1.ignore: cmd={header.command}, cmd no handlers')
+                log.warning('1.ignore: cmd=%s, cmd no handlers', header.command)
         else:
-            log.warning(f'2.ignore:cmd={header.command}, cmd no handlers.')
+            log.warning('2.ignore:cmd=%s, cmd no handlers.', header.command)
+        return None
 
 
 class _UBTWebSocketClient(object):
-    __init_flag = False
+    """一个机器人的websocket连接
+
+    每个实例拥有独立的消息分发器和消息id生成器, create()创建的独立连接可以让一个进程同时连接多台机器人(参见mini_sdk.RobotPool);
+
+    mini_sdk及未指定robot的api共用default()返回的默认连接, 无参数构造ubt_websocket()也返回该连接
+    """
     _instance_lock = threading.Lock()
 
+    # 单例: 无参数构造返回default(), 独立的连接由create()创建
+    def __new__(cls):
+        return cls.default()
+
     def __init__(self):
-        if not _UBTWebSocketClient.__init_flag:
-            _UBTWebSocketClient.__init_flag = True
-            log.info(f'init {_UBTWebSocketClient.__name__}')
-            self._client = None
-            self.__ip = 'localhost'
-            self.__port = 8800
-            self.__dispatcher = _MessageDispatcher()
-            self.__generator = msg_utils.id_generator()
+        pass
 
-    def __new__(cls, *args, **kwargs):
-        if not hasattr(_UBTWebSocketClient, "_instance"):
-            with _UBTWebSocketClient._instance_lock:
-                if not hasattr(_UBTWebSocketClient, "_instance"):
-                    _UBTWebSocketClient._instance = object.__new__(cls)
-        return _UBTWebSocketClient._instance
+    @classmethod
+    def create(cls, send_queue_size: int = DEFAULT_SEND_QUEUE_SIZE, raise_when_saturated: bool = False,
+               auto_reconnect: bool = True,
+               pending_policy: PendingPolicy = PendingPolicy.FAIL) -> '_UBTWebSocketClient':
+        """创建一个独立的连接, 例如RobotPool中的一个成员
+
+        Args:
+            send_queue_size (int): 发送队列长度, 队列满时对发送方施加背压
+            raise_when_saturated (bool): 队列满时是否抛出RobotSaturatedError, 默认False表示等待
+            auto_reconnect (bool): 连接异常断开后是否自动重连, 并恢复已启动的事件监听
+            pending_policy (PendingPolicy): 连接断开时对等待回复的请求的处理策略
+
+        Returns:
+            _UBTWebSocketClient
+        """
+        self = object.__new__(cls)
+        self.__setup(send_queue_size, raise_when_saturated, auto_reconnect, pending_policy)
+        return self
+
+    @classmethod
+    def default(cls) -> '_UBTWebSocketClient':
+        """进程内的默认连接
+        """
+        if '_instance' not in cls.__dict__:
+            with cls._instance_lock:
+                if '_instance' not in cls.__dict__:
+                    cls._instance = cls.create()
+        return cls._instance
+
+    def __setup(self, send_queue_size: int, raise_when_saturated: bool, auto_reconnect: bool,
+                pending_policy: PendingPolicy):
+        log.info(f'init {_UBTWebSocketClient.__name__}')
+        self._client = None
+        self.__ip = 'localhost'
+        self.__port = 8800
+        self.__dispatcher = _MessageDispatcher()
+        self.__generator = msg_utils.id_generator()
+        self.send_queue_size = send_queue_size
+        self.raise_when_saturated = raise_when_saturated
+        self.auto_reconnect = auto_reconnect
+        self.pending_policy = pending_policy
+        self.reconnect_base_delay = 0.5
+        """重连退避的初始时长(秒)"""
+        self.reconnect_max_delay = 30
+        """重连退避的最大时长(秒)"""
+        self.reconnect_max_attempts = 0
+        """最大重连次数, 0表示不限"""
+        self.sweep_interval = DEFAULT_SWEEP_INTERVAL
+        self.metrics = _metrics.registry
+        """请求耗时与错误统计, 默认为mini.metrics.registry"""
+        self.keepalive_interval = DEFAULT_KEEPALIVE_INTERVAL
+        """心跳(websocket ping)周期(秒), 0表示关闭, 此时使用websockets库自带的心跳"""
+        self.keepalive_timeout = 2
+        """单次心跳等待pong的时长(秒)"""
+        self.degraded_rtt = 0.5
+        """平滑RTT超过该值(秒)时认为连接质量下降"""
+        self.lost_after = 3
+        """连续多少次心跳无回复时认为连接丢失, 并断开连接以触发重连"""
+        self.link = RttEstimator()
+        """心跳RTT估计"""
+        self.__link_state = LinkState.GOOD
+        self.__link_listeners: List[Callable[[LinkState, RttEstimator], None]] = []
+        self.__keepalive = None
+        self.__send_queue = None
+        self.__carried = []
+        self.__writer = None
+        self.__sweeper = None
+        self.__closing = False
+        self.__reconnecting = False
+        self.__subscriptions: Dict[AbstractMsgHandler, Tuple[int, _message.Message]] = {}
+        self.__holds: List[Future] = []
 
     @property
     def ip(self):
@@ -172,12 +372,14 @@ class _UBTWebSocketClient(object):
         return await asyncio.wait_for(self.__connect(), timeout)
 
     async def __connect(self) -> bool:
+        self.__closing = False
         if self.alive:
             await self._client.close(reason='exit for reconnecting.')
         try:
             log.info(f'connect begin')
-            self._client = await websockets.connect('ws://{}:{!r}'.format(self.ip, self.port))
+            self._client = await self.__open()
             log.info(f'connect success')
+            self.__start_writer()
             asyncio.create_task(self.__loop())
             # threading.Thread(target=self.__loop()).start()
             return True
@@ -185,56 +387,424 @@ class _UBTWebSocketClient(object):
             log.error(f'WebSocket server no startUp: error{error}')
             return False
 
+    def __open(self):
+        if self.keepalive_interval > 0:
+            # 由__keepalive_loop发送心跳, 关闭库自带的ping
+            return websockets.connect('ws://{}:{!r}'.format(self.ip, self.port), ping_interval=None)
+        return websockets.connect('ws://{}:{!r}'.format(self.ip, self.port))
+
+    @property
+    def link_state(self) -> LinkState:
+        """当前连接质量
+        """
+        return self.__link_state
+
+    def add_link_listener(self, listener: Callable[[LinkState, RttEstimator], None]):
+        """监听连接质量变化, 状态改变时回调listener(state, link)
+
+        Args:
+            listener (Callable[[LinkState, RttEstimator], None]): 回调
+        """
+        self.__link_listeners.append(listener)
+
+    def remove_link_listener(self, listener: Callable[[LinkState, RttEstimator], None]):
+        if listener in self.__link_listeners:
+            self.__link_listeners.remove(listener)
+
+    def suggested_timeout(self, k: float = 4, floor: float = 1.0, default: float = None) -> Optional[float]:
+        """根据心跳RTT给出的请求超时建议, 见RttEstimator.suggested_timeout
+        """
+        return self.link.suggested_timeout(k, floor, default)
+
+    def __set_link_state(self, state: LinkState):
+        if state == self.__link_state:
+            return
+        log.warning('link state %s -> %s, %r', self.__link_state.name, state.name, self.link)
+        self.__link_state = state
+        for listener in tuple(self.__link_listeners):
+            try:
+                listener(state, self.link)
+            except Exception:
+                log.exception('link listener failure')
+
+    async def __keepalive_loop(self, client):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            start = loop.time()
+            try:
+                pong = await client.ping()
+                await asyncio.wait_for(pong, self.keepalive_timeout)
+            except asyncio.TimeoutError:
+                self.link.miss()
+                if self.link.missed >= self.lost_after:
+                    self.__set_link_state(LinkState.LOST)
+                    # 断开连接, 由__loop触发重连
+                    client.transport.abort()
+                    return
+                self.__set_link_state(LinkState.DEGRADED)
+                continue
+            except ConnectionClosed:
+                return
+            self.link.update(loop.time() - start)
+            self.__set_link_state(LinkState.DEGRADED if self.link.srtt > self.degraded_rtt else LinkState.GOOD)
+
     async def __loop(self):
         log.debug(f'begin loop.')
+        client = self._client
         try:
-            while self.alive:
+            while not client.closed:
                 _data = None
                 # _data = await self._client.recv()
                 # _data = asyncio.run(self._client.recv())
-                _data = await self._client.recv()
-                # do parse
-                _bytes = msg_utils.base64_decode(_data)
-                msg = msg_utils.parse_msg(_bytes)
-                log.info(f"recv msg: {msg}")
-                # do dispatch
-                self.__dispatch(msg)
+                _data = await client.recv()
+                received_at = asyncio.get_running_loop().time()
+                try:
+                    # do parse
+                    _bytes = frame_codec.decode(_data)
+                    msg = msg_utils.parse_msg(_bytes)
+                    log.info('recv msg: %s', msg)
+                    tracing.dump_payload('recv', msg.header.command, msg.header.id, msg)
+                    # do dispatch
+                    self.__dispatch(msg, received_at, len(_data))
+                except Exception as e:
+                    # 无法解析的帧或分发时的异常只丢弃这一帧, 连接本身没有断开
+                    log.exception('drop frame: %r', e)
+                if self.__holds:
+                    await self.__wait_holds()
+        except ConnectionClosedOK:
+            log.warning("connection closed ok!")
+            # shutdown或重新connect时关闭的旧连接无需处理, 其它情况是机器人主动关闭了连接
+            if client is self._client:
+                self.__on_closed()
+        except (ConnectionClosed, OSError) as e:
+            log.warning('recv fail : %r', e)
+            if client is self._client:
+                self.__on_closed()
         except Exception as e:
-            if isinstance(e, ConnectionClosedOK):
-                log.warning("connection closed ok!")
-                if self._client:
-                    asyncio.get_running_loop().call_later(3, asyncio.get_running_loop().stop)
-            else:
-                log.exception('recv fail : %r', e)
+            log.exception('recv loop failure : %r', e)
         log.debug(f'end loop.')
 
-    def __dispatch(self, message: Message):
-        self.__dispatcher.dispatch(message)
+    def __on_closed(self):
+        """当前连接断开后的处理, 只影响本连接, 不停止事件循环(同一个loop中可能还有其它机器人的连接)
+        """
+        if self.__closing or self.__reconnecting:
+            return
+        if self.auto_reconnect:
+            asyncio.create_task(self.__reconnect())
+            return
+        self.__stop_writer()
+        self.__set_link_state(LinkState.LOST)
+        self.__fail_pending(ConnectionError('connection closed'))
 
-    async def send_msg0(self, cmd, message: _message.Message) -> bool:
-        if self.alive:
-            client = self._client
-            identify = 0
-            pccode_mao_message: Message = msg_utils.build_request_msg(cmd, send_serial=identify, request=message)
+    def pause_reading(self, until: Future):
+        """在until完成之前不再读取和分发后续消息
 
-            async def send0():
+        用于事件流的背压: 接收循环停止读取后, websockets的接收缓冲区写满即停止读socket,
+        机器人端随之被TCP流控阻塞。暂停期间同一连接上的回复和事件都会延迟。
+
+        Args:
+            until (Future): 完成后恢复读取
+        """
+        self.__holds.append(until)
+
+    async def __wait_holds(self):
+        closed = asyncio.ensure_future(self._client.wait_closed())
+        try:
+            while self.__holds and not closed.done():
+                hold = self.__holds[0]
+                await asyncio.wait((hold, closed), return_when=asyncio.FIRST_COMPLETED)
+                if hold.done() and self.__holds and self.__holds[0] is hold:
+                    self.__holds.pop(0)
+        finally:
+            closed.cancel()
+
+    @property
+    def reconnecting(self) -> bool:
+        return self.__reconnecting
+
+    def add_subscription(self, handler: AbstractMsgHandler, cmd: int, request: _message.Message) -> bool:
+        """记录一个已启动的事件监听, 重连后重新发送其订阅请求
+
+        同一命令的多个监听共用机器人端的一个订阅, 以第一个监听的订阅请求为准
+
+        Returns:
+            bool: 是否为该命令的第一个监听, 为True时调用方需要发送订阅请求
+        """
+        first = self.subscriber_count(cmd) == 0
+        self.__subscriptions[handler] = (cmd, request)
+        return first
+
+    def remove_subscription(self, handler: AbstractMsgHandler, cmd: int = None) -> bool:
+        """移除一个事件监听
+
+        Args:
+            handler (AbstractMsgHandler): 监听器
+            cmd (int): 监听器未记录时用于判断的命令id
+
+        Returns:
+            bool: 该命令是否已没有监听, 为True时调用方需要通知机器人停止上报
+        """
+        entry = self.__subscriptions.pop(handler, None)
+        if entry is not None:
+            cmd = entry[0]
+        return cmd is not None and self.subscriber_count(cmd) == 0
+
+    def update_subscription(self, cmd: int, request: _message.Message):
+        """替换命令的订阅请求, 重连后按新的请求重新订阅
+        """
+        for handler, (subscribed, _) in tuple(self.__subscriptions.items()):
+            if subscribed == cmd:
+                self.__subscriptions[handler] = (cmd, request)
+
+    def subscriber_count(self, cmd: int) -> int:
+        """命令的本地监听数
+        """
+        return sum(1 for subscribed, _ in self.__subscriptions.values() if subscribed == cmd)
+
+    async def __reconnect(self) -> bool:
+        """连接异常断开后, 按带随机抖动的指数退避重连, 成功后恢复会话
+        """
+        self.__reconnecting = True
+        self.__set_link_state(LinkState.LOST)
+        try:
+            # RETRY时保留还在发送队列中的帧, 重连后在新连接上按原顺序写出
+            self.__stop_writer(keep=self.pending_policy == PendingPolicy.RETRY)
+            self.__abort(self._client)
+            if self.pending_policy == PendingPolicy.FAIL:
+                self.__fail_pending(ConnectionError('connection lost'))
+            attempt = 0
+            while self.auto_reconnect and not self.__closing:
+                attempt += 1
+                # full jitter: [0, min(max, base * 2^n)]
+                delay = min(self.reconnect_max_delay, self.reconnect_base_delay * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, delay))
+                if self.__closing:
+                    break
                 try:
-                    await client.send(msg_utils.base64_encode(pccode_mao_message.SerializeToString()))
-                    log.info(
-                        'send cmd={!r}, identify={!r}, message={!r}'.format(pccode_mao_message.header.command,
-                                                                            pccode_mao_message.header.id,
-                                                                            message))
-                    return True
-                except (ConnectionClosed, ConnectionClosedOK) as close:
-                    log.warning(f'Waring: connect is closed: {close}')
-                    return False
-                except (ConnectionError, ConnectionResetError, ConnectionAbortedError, ConnectionRefusedError) as error:
-                    log.warning(f'Waring: connect error: {error}')
-                    return False
+                    log.info(f'reconnect begin, attempt={attempt}')
+                    self._client = await self.__open()
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake) as error:
+                    log.warning(f'reconnect failure, attempt={attempt}: {error}')
+                    if 0 < self.reconnect_max_attempts <= attempt:
+                        break
+                    continue
+                log.info(f'reconnect success, attempt={attempt}')
+                queued = {frame for frame, _ in self.__carried}
+                self.__start_writer()
+                asyncio.create_task(self.__loop())
+                await self.__restore_session(queued)
+                return True
+            log.warning(f'give up reconnecting {self!r}')
+            self.__fail_pending(ConnectionError('connection lost'))
+            return False
+        finally:
+            self.__reconnecting = False
+            self.__release(self.__carried)
+            self.__carried = []
+
+    @staticmethod
+    def __abort(client):
+        """断开旧连接, 重连前调用, 保证同一时间只有一个socket
+        """
+        if client is not None and not client.closed:
+            client.transport.abort()
+
+    async def __restore_session(self, queued=frozenset()):
+        # 重新订阅事件, 每个命令只发送第一个监听的订阅请求
+        sent = set()
+        for cmd, request in tuple(self.__subscriptions.values()):
+            if cmd in sent:
+                continue
+            sent.add(cmd)
+            await self.send_msg0(cmd, request)
+        # 重发仍在等待回复的请求, 已在发送队列中的不再重复发送
+        for handler in tuple(self.__dispatcher.pending.values()):
+            if handler.frame is not None and handler.frame not in queued:
+                asyncio.create_task(self.__enqueue(handler.frame))
+        log.info(f'session restored: subscriptions={len(sent)}, pending={len(self.__dispatcher.pending)}')
+
+    def __fail_pending(self, error: Exception):
+        for handler in tuple(self.__dispatcher.pending.values()):
+            self.__dispatcher.remove_pending(handler.identify)
+            handler.fail(error)
+
+    def __dispatch(self, message: Message, received_at: float = None, size: int = 0):
+        header = message.header
+        if header.target == -1:
+            self.metrics.record_unsupported(header.command)
+        handler = self.__dispatcher.dispatch(message, received_at)
+        if handler is not None:
+            handler.received_size = size
+        else:
+            self.metrics.record_event(header.command, size)
+
+    def __start_writer(self):
+        self.__stop_writer()
+        self.__send_queue = asyncio.Queue(maxsize=self.send_queue_size)
+        # 重连前保留的帧先于新的帧写出
+        carried, self.__carried = self.__carried, []
+        for item in carried:
+            if self.__send_queue.full():
+                asyncio.create_task(self.__put(self.__send_queue, item))
+            else:
+                self.__send_queue.put_nowait(item)
+        self.__writer = asyncio.create_task(self.__write_loop(self._client, self.__send_queue))
+        if self.__sweeper is None or self.__sweeper.done():
+            self.__sweeper = asyncio.create_task(self.__sweep_loop())
+        # 新连接重新计数, 旧连接上未回复的心跳不计入
+        self.link.missed = 0
+        self.__set_link_state(LinkState.GOOD)
+        if self.keepalive_interval > 0:
+            self.__keepalive = asyncio.create_task(self.__keepalive_loop(self._client))
+
+    async def __sweep_loop(self):
+        """周期性回收泄漏的请求, 保证长时间运行时pending表不会增长
+        """
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            count = self.__dispatcher.sweep(asyncio.get_running_loop().time())
+            if count:
+                self.metrics.record_orphaned(count)
+                log.warning(f'sweep {count} orphaned handlers, total={self.__dispatcher.orphaned_count}')
+
+    @property
+    def pending_count(self) -> int:
+        """等待回复的请求数
+        """
+        return len(self.__dispatcher.pending)
 
+    @property
+    def orphaned_count(self) -> int:
+        """被清理器回收的请求累计数
+        """
+        return self.__dispatcher.orphaned_count
+
+    def __stop_writer(self, keep: bool = False):
+        """停止写协程和心跳
+
+        Args:
+            keep (bool): 是否保留发送队列中的帧到下一次__start_writer, 为False时唤醒还在排队的发送方
+        """
+        if self.__writer is not None:
+            self.__writer.cancel()
+            self.__writer = None
+        if self.__keepalive is not None:
+            self.__keepalive.cancel()
+            self.__keepalive = None
+        queued = []
+        if self.__send_queue is not None:
+            while not self.__send_queue.empty():
+                queued.append(self.__send_queue.get_nowait())
+            self.__send_queue = None
+        if keep:
+            self.__carried.extend(queued)
+        else:
+            self.__release(queued)
+
+    @staticmethod
+    def __release(items):
+        # 唤醒未写出的帧的发送方, 发送结果为失败
+        for _, waiter in items:
+            if not waiter.done():
+                waiter.set_result(False)
+
+    @property
+    def send_queue_depth(self) -> int:
+        """发送队列中等待写入的帧数
+        """
+        return self.__send_queue.qsize() if self.__send_queue is not None else 0
+
+    async def __write_loop(self, client, queue: asyncio.Queue):
+        """唯一的写协程, 按入队顺序把帧写入socket
+
+        队列中积压的小帧连续写入transport后只drain一次
+        """
+        log.debug(f'begin write loop.')
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < _MAX_BATCH_FRAMES and not queue.empty():
+                batch.append(queue.get_nowait())
+            # 发送方已超时或取消的帧不再写入
+            batch = [(frame, waiter) for (frame, waiter) in batch if not waiter.done()]
+            if not batch:
+                continue
+            try:
+                await self.__write_batch(client, batch)
+                result = True
+            except asyncio.CancelledError:
+                # 写到一半被停止, 这一批不确定是否已写出, 按失败通知发送方
+                self.__release(batch)
+                raise
+            except (ConnectionClosed, ConnectionClosedOK) as close:
+                log.warning(f'Waring: connect is closed: {close}')
+                result = False
+            except (ConnectionError, ConnectionResetError, ConnectionAbortedError, ConnectionRefusedError) as error:
+                log.warning(f'Waring: connect error: {error}')
+                result = False
+            except Exception as e:
+                log.warning(f'send message failure: {e}')
+                result = False
+            for _, waiter in batch:
+                if not waiter.done():
+                    waiter.set_result(result)
+
+    @staticmethod
+    async def __write_batch(client, batch):
+        if not hasattr(client, 'write_frame_sync'):
+            for frame, _ in batch:
+                await client.send(frame.decode('ascii'))
+            return
+        await client.ensure_open()
+        # 帧已是ascii字节, 直接作为文本帧写出, 省去str编码的复制
+        for frame, _ in batch:
+            client.write_frame_sync(True, OP_TEXT, frame)
+            if len(frame) > _COALESCE_FRAME_SIZE:
+                await client.drain()
+        await client.drain()
+
+    async def __enqueue(self, frame) -> bool:
+        """把一帧交给写协程, 队列满时等待或抛出RobotSaturatedError
+
+        Returns:
+            bool: 是否写入成功
+        """
+        queue = self.__send_queue
+        if queue is None:
+            return False
+        if self.raise_when_saturated and queue.full():
+            raise RobotSaturatedError(f'send queue is full: size={queue.maxsize}, robot={self!r}')
+        waiter = asyncio.get_running_loop().create_future()
+        await self.__put(queue, (frame, waiter))
+        return await waiter
+
+    async def __put(self, queue: asyncio.Queue, item):
+        """放入发送队列, 等待期间写协程已停止时转交给重连后的队列
+        """
+        await queue.put(item)
+        if queue is self.__send_queue:
+            return
+        # 帧进入的是不再读取的旧队列
+        if self.__reconnecting and self.pending_policy == PendingPolicy.RETRY:
+            self.__carried.append(item)
+        elif self.__send_queue is not None:
+            await self.__put(self.__send_queue, item)
+        else:
+            self.__release([item])
+
+    async def send_msg0(self, cmd, message: _message.Message) -> bool:
+        if self.alive:
+            identify = 0
             try:
-                await asyncio.create_task(send0())
+                frame = msg_utils.build_request_frame(cmd, send_serial=identify, request=message)
+                if not await self.__enqueue(frame):
+                    return False
+                self.metrics.record_sent(cmd, len(frame))
+                log.info('send cmd=%r, identify=%r, message=%r', cmd, identify, message)
+                tracing.dump_payload('send', cmd, identify, message)
                 return True
+            except RobotSaturatedError:
+                raise
             except Exception as e:
                 log.warning(f'receiver response failure: {e}')
                 return False
@@ -253,49 +823,70 @@ class _UBTWebSocketClient(object):
 
     async def send_msg(self, cmd, message: _message.Message, timeout) -> Any:
         if self.alive:
-            client = self._client
             identify = self.generate_id()
-            pccode_mao_message: Message = msg_utils.build_request_msg(cmd, send_serial=identify, request=message)
-            future = asyncio.get_running_loop().create_future()
-            handler = _CoroutineHandler(identify, future)
-            log.debug(f'register cmd={pccode_mao_message.header.command} handler={handler}')
-            self.register_msg_handler(pccode_mao_message.header.command, handler)
+            frame = msg_utils.build_request_frame(cmd, send_serial=identify, request=message)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            sent = start
+            future = loop.create_future()
+            handler = _CoroutineHandler(identify, future, cmd, frame,
+                                        deadline=start + timeout)
+            log.debug('register cmd=%s handler=%r', cmd, handler)
+            self.__dispatcher.add_pending(handler)
 
             async def send1():
-                try:
-                    await client.send(msg_utils.base64_encode(pccode_mao_message.SerializeToString()))
-                    log.info(
-                        'send cmd={!r}, identify={!r}, message={!r}'.format(pccode_mao_message.header.command,
-                                                                            pccode_mao_message.header.id,
-                                                                            message))
-                    return await future
-                except (
-                        ConnectionClosed, ConnectionClosedOK, ConnectionError, ConnectionResetError,
-                        ConnectionAbortedError,
-                        ConnectionRefusedError) as close:
-                    log.warning(f'connect close. {close}')
-                except Exception as e2:
-                    log.warning(f'send message failure: {e2}')
+                nonlocal sent
+                if not await self.__enqueue(frame) and not self.__retry_on_reconnect():
+                    return None
+                sent = loop.time()
+                log.info('send cmd=%r, identify=%r, message=%r', cmd, identify, message)
+                tracing.dump_payload('send', cmd, identify, message)
+                return await future
 
             try:
-                return await asyncio.wait_for(send1(), timeout)
+                result = await asyncio.wait_for(send1(), timeout)
+                if result is not None:
+                    first_byte = None if handler.received_at is None else handler.received_at - start
+                    self.metrics.record_request(cmd, sent - start, first_byte, loop.time() - start,
+                                                len(frame), handler.received_size)
+                return result
+            except RobotSaturatedError:
+                raise
+            except asyncio.TimeoutError as e:
+                self.metrics.record_timeout(cmd)
+                log.warning(f'recv response  failure: {e!r}')
+                return None
             except Exception as e:
                 log.warning(f'recv response  failure: {e}')
                 return None
+            finally:
+                # 超时、取消、断线时注销, 避免pending表泄漏
+                self.__dispatcher.remove_pending(identify)
         else:
             log.warning(f'client is not alive')
             raise RuntimeError("no connection!")
 
+    def __retry_on_reconnect(self) -> bool:
+        # 写入失败时, 如果会重连并重发, 则继续等待回复
+        return self.auto_reconnect and not self.__closing and self.pending_policy == PendingPolicy.RETRY
+
     def generate_id(self) -> int:
         return self.__generator.send(0)
 
     async def shutdown(self):
+        self.__closing = True
         if self.alive:
             self.__generator.close()
+            self.__generator = msg_utils.id_generator()
+            self.__stop_writer()
+            if self.__sweeper is not None:
+                self.__sweeper.cancel()
+                self.__sweeper = None
             await self._client.close(reason="client closed")
             self._client = None
         else:
             log.warning(f'client is not alive.')
+        self.__fail_pending(ConnectionError('client closed'))
 
 
 ubt_websocket: Type[_UBTWebSocketClient] = _UBTWebSocketClient
@@ -4,6 +4,7 @@ from typing import Union
 import websockets
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosed, ConnectionClosedError
 
+from ..channels import frame_codec
 from ..channels import msg_utils as msg_utils
 from ..channels.msg_utils import build_request_msg, parse_msg
 from ..pb2 import codemao_playaction_pb2
@@ -25,7 +26,7 @@ async def check_permit(_socket: websockets.WebSocketServerProtocol):
 async def recv_msg(_socket: websockets.WebSocketServerProtocol):
     while True:
         recv_text = await _socket.recv()
-        msg = parse_msg(recv_text)
+        msg = parse_msg(frame_codec.decode(recv_text))
         # response_text = f"your submit content:{request.actionName}"
         if msg.header.commandId == 1:
             request = codemao_playaction_pb2.PlayActionRequest()
@@ -38,7 +39,7 @@ async def recv_msg(_socket: websockets.WebSocketServerProtocol):
         else:
             print(f'unsupported msg={msg}')
 
-        await _socket.send(msg.SerializeToString())
+        await _socket.send(frame_codec.encode_text(msg.SerializeToString()))
 
 
 async def main_logic(_socket: websockets.WebSocketServerProtocol, address: str):
@@ -1,2 +1,15 @@
+import importlib
+
 from .dns_browser import service_type
 from ..dns import *
+
+
+def __getattr__(name: str):
+    # 未预先导入的子模块, 例如 mini.channels.websocket_client, 访问时导入
+    if not name.startswith('__'):
+        try:
+            return importlib.import_module(f'{__name__}.{name}')
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
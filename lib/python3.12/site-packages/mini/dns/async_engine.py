@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""基于asyncio的mDNS服务发现
+
+收发和记录缓存都在sdk的事件循环中完成, 不创建线程::
+
+    engine = async_engine.shared()
+    browser = AsyncServiceBrowser(engine, service_type, listener)
+    ...
+    browser.cancel()
+
+报文解析、缓存和ServiceInfo沿用zeroconf中的实现, 每个发现的服务在独立的task中并发查询SRV/TXT/A记录,
+查询完成后才通知ServiceListener, 通知时listener可以用engine.get_service_info从缓存中直接取得服务信息
+
+shared()返回当前loop共用的引擎, 扫描结束后引擎不关闭, 记录缓存保留到TTL过期, 再次扫描时已缓存的服务立即通知
+"""
+import asyncio
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from .. import tracing
+from .zeroconf import (
+    _BROWSER_BACKOFF_LIMIT,
+    _BROWSER_TIME,
+    _CLASS_IN,
+    _FLAGS_QR_QUERY,
+    _LISTENER_TIME,
+    _MAX_MSG_ABSOLUTE,
+    _MDNS_ADDR,
+    _MDNS_ADDR6,
+    _MDNS_PORT,
+    _TYPE_A,
+    _TYPE_AAAA,
+    _TYPE_ANY,
+    _TYPE_PTR,
+    _TYPE_SRV,
+    _TYPE_TXT,
+    DNSAddress,
+    DNSEntry,
+    DNSIncoming,
+    DNSOutgoing,
+    DNSPointer,
+    DNSQuestion,
+    DNSRecord,
+    DNSCache,
+    InterfaceChoice,
+    InterfacesType,
+    IPVersion,
+    NameFilter,
+    RecordUpdateListener,
+    ServiceInfo,
+    ServiceListener,
+    create_sockets,
+    current_time_millis,
+)
+
+log = tracing.get_logger(__name__)
+
+_REAPER_INTERVAL = 10  # s
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, on_datagram: Optional[Callable[[bytes, tuple], None]] = None):
+        self.__on_datagram = on_datagram
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        if self.__on_datagram is not None:
+            self.__on_datagram(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        log.debug('mdns socket error: %r', exc)
+
+
+class AsyncEngine(object):
+    """mDNS的收发和记录缓存
+
+    监听socket和各网卡的发送socket由zeroconf.create_sockets创建, 通过loop.create_datagram_endpoint读写,
+    过期记录由loop中的task定期清理; 接口与Zeroconf中浏览相关的部分一致(cache, add_listener, send等),
+    因此可以直接使用zeroconf的ServiceInfo
+    """
+
+    def __init__(self, interfaces: InterfacesType = InterfaceChoice.All, ip_version: IPVersion = IPVersion.V4Only):
+        """
+        Args:
+            interfaces (InterfaceChoice/list): 使用的网卡, 见zeroconf.Zeroconf
+            ip_version (IPVersion): IP版本, 默认为只使用IPv4
+        """
+        self.cache = DNSCache()
+        self.listeners: List[RecordUpdateListener] = []
+        self.name_filter = NameFilter()
+        """浏览或解析过的服务类型, 解析报文时跳过名字不属于这些类型(及其主机)的记录"""
+        self.__interfaces = interfaces
+        self.__ip_version = ip_version
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__sockets: List[socket.socket] = []
+        self.__listen: Optional[asyncio.DatagramTransport] = None
+        self.__senders: List[asyncio.DatagramTransport] = []
+        self.__waiters: Set[asyncio.Future] = set()
+        self.__opening: Optional[asyncio.Future] = None
+        self.__reaper: Optional[asyncio.Task] = None
+        self.__closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """引擎所在的事件循环, start之前为None
+        """
+        return self.__loop
+
+    async def start(self):
+        """打开socket并开始接收, 可以重复调用, 需要在loop中调用
+        """
+        if self.__closed:
+            raise RuntimeError('AsyncEngine is closed')
+        if self.__opening is None:
+            self.__loop = asyncio.get_running_loop()
+            self.__opening = asyncio.ensure_future(self.__open())
+        await asyncio.shield(self.__opening)
+
+    async def __open(self):
+        loop = asyncio.get_running_loop()
+        listen_socket, respond_sockets = create_sockets(self.__interfaces, ip_version=self.__ip_version)
+        self.__sockets = [listen_socket] + respond_sockets
+        listen_socket.setblocking(False)
+        self.__listen, _ = await loop.create_datagram_endpoint(lambda: _DatagramProtocol(self.handle_datagram),
+                                                               sock=listen_socket)
+        for respond_socket in respond_sockets:
+            respond_socket.setblocking(False)
+            # 发送socket同样绑定在5353端口, 收到的组播报文与监听socket重复, 直接丢弃
+            transport, _ = await loop.create_datagram_endpoint(_DatagramProtocol, sock=respond_socket)
+            self.__senders.append(transport)
+        if self.__closed:
+            self.__close_transports()
+            return
+        self.__reaper = asyncio.create_task(self.__reap())
+        log.debug('mdns engine started, interfaces=%d', len(self.__senders))
+
+    def close(self):
+        """关闭socket, 唤醒所有等待中的查询
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        if self.__loop is not None and self.__loop.is_closed():
+            # loop已经关闭, transport和task无法再调度, 直接关闭socket
+            for sock in self.__sockets:
+                sock.close()
+            self.__sockets.clear()
+            self.listeners.clear()
+            return
+        if self.__reaper is not None:
+            self.__reaper.cancel()
+            self.__reaper = None
+        self.__close_transports()
+        self.listeners.clear()
+        self.notify_all()
+
+    def __close_transports(self):
+        self.__sockets.clear()
+        if self.__listen is not None:
+            self.__listen.close()
+            self.__listen = None
+        for transport in self.__senders:
+            transport.close()
+        self.__senders.clear()
+
+    def send(self, out: DNSOutgoing):
+        """从所有网卡组播发送
+        """
+        packet = out.packet()
+        if len(packet) > _MAX_MSG_ABSOLUTE:
+            log.warning('dropping over-sized mdns packet (%d bytes)', len(packet))
+            return
+        for transport in self.__senders:
+            sock = transport.get_extra_info('socket')
+            addr = _MDNS_ADDR6 if sock is not None and sock.family == socket.AF_INET6 else _MDNS_ADDR
+            transport.sendto(packet, (addr, _MDNS_PORT))
+
+    def handle_datagram(self, data: bytes, addr: tuple):
+        # 只做服务发现, 不回答其它主机的查询, 按报文头的QR位直接丢弃查询报文
+        if len(data) < 12 or not data[2] & 0x80:
+            return
+        msg = DNSIncoming(data, self.name_filter or None)
+        if msg.valid and msg.answers:
+            self.handle_response(msg)
+
+    def handle_response(self, msg: DNSIncoming):
+        """更新缓存并通知监听者, 与Zeroconf.handle_response相同
+        """
+        now = current_time_millis()
+        for record in msg.answers:
+            updated = True
+            if record.unique:
+                for entry in self.cache.entries_with_name(record.name).copy():
+                    if entry == record:
+                        updated = False
+                    if (record.created - entry.created > 1000) and DNSEntry.__eq__(entry, record):
+                        self.cache.remove(entry)
+
+            expired = record.is_expired(now)
+            maybe_entry = self.cache.get(record)
+            if not expired:
+                if maybe_entry is not None:
+                    maybe_entry.reset_ttl(record)
+                else:
+                    self.cache.add(record)
+                if updated:
+                    self.update_record(now, record)
+            elif maybe_entry is not None:
+                self.update_record(now, record)
+                self.cache.remove(maybe_entry)
+
+    def add_listener(self, listener: RecordUpdateListener, question: Optional[DNSQuestion]):
+        """添加记录监听者, 缓存中已有的匹配记录会立即通知
+        """
+        now = current_time_millis()
+        self.listeners.append(listener)
+        if question is not None:
+            for record in self.cache.entries_with_name(question.name):
+                if question.answered_by(record) and not record.is_expired(now):
+                    listener.update_record(self, now, record)
+        self.notify_all()
+
+    def remove_listener(self, listener: RecordUpdateListener):
+        try:
+            self.listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def update_record(self, now: float, record: DNSRecord):
+        for listener in list(self.listeners):
+            listener.update_record(self, now, record)
+        self.notify_all()
+
+    def notify_all(self):
+        """唤醒所有wait中的task
+        """
+        waiters, self.__waiters = self.__waiters, set()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait(self, timeout: float):
+        """等待新记录或超时
+
+        Args:
+            timeout (float): 超时时间(秒)
+        """
+        if self.__closed:
+            return
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self.__waiters.add(waiter)
+        handle = loop.call_later(max(0.0, timeout), _set_done, waiter)
+        try:
+            await waiter
+        finally:
+            handle.cancel()
+            self.__waiters.discard(waiter)
+
+    def get_service_info(self, type_: str, name: str, timeout: int = 0) -> Optional[ServiceInfo]:
+        """从缓存中取得服务信息, 不发送查询也不等待
+
+        与Zeroconf.get_service_info的参数相同, 便于ServiceListener在通知中使用, timeout被忽略
+
+        Returns:
+            ServiceInfo: 缓存中没有SRV或地址记录时为None
+        """
+        info = ServiceInfo(type_, name)
+        self.__update_from_cache(info)
+        if info.server is None or not info.addresses:
+            return None
+        return info
+
+    async def resolve(self, type_: str, name: str, timeout: int = 3000) -> Optional[ServiceInfo]:
+        """查询服务的SRV/TXT/A记录, 与ServiceInfo.request的重传间隔相同, 但不阻塞loop
+
+        Args:
+            type_ (str): 服务类型
+            name (str): 服务实例名
+            timeout (int): 超时时间(毫秒)
+
+        Returns:
+            ServiceInfo: 超时时为None
+        """
+        await self.start()
+        self.name_filter.add_type(type_)
+        info = ServiceInfo(type_, name)
+        self.__update_from_cache(info)
+        if _complete(info):
+            return info
+
+        loop = asyncio.get_running_loop()
+        delay = _LISTENER_TIME / 1000
+        deadline = loop.time() + timeout / 1000
+        next_ = loop.time()
+        self.add_listener(info, DNSQuestion(name, _TYPE_ANY, _CLASS_IN))
+        try:
+            while not _complete(info):
+                now = loop.time()
+                if now >= deadline or self.__closed:
+                    return None
+                if now >= next_:
+                    self.send(self.__resolve_query(info))
+                    next_ = now + delay
+                    delay *= 2
+                await self.wait(min(next_, deadline) - now)
+        finally:
+            self.remove_listener(info)
+        return info
+
+    def __update_from_cache(self, info: ServiceInfo):
+        now = current_time_millis()
+        for record_type in (_TYPE_SRV, _TYPE_TXT):
+            info.update_record(self, now, self.cache.get_by_details(info.name, record_type, _CLASS_IN))
+
+    def __resolve_query(self, info: ServiceInfo) -> DNSOutgoing:
+        now = current_time_millis()
+        out = DNSOutgoing(_FLAGS_QR_QUERY)
+        out.add_question(DNSQuestion(info.name, _TYPE_SRV, _CLASS_IN))
+        out.add_answer_at_time(self.cache.get_by_details(info.name, _TYPE_SRV, _CLASS_IN), now)
+        out.add_question(DNSQuestion(info.name, _TYPE_TXT, _CLASS_IN))
+        out.add_answer_at_time(self.cache.get_by_details(info.name, _TYPE_TXT, _CLASS_IN), now)
+        if info.server is not None:
+            out.add_question(DNSQuestion(info.server, _TYPE_A, _CLASS_IN))
+            out.add_answer_at_time(self.cache.get_by_details(info.server, _TYPE_A, _CLASS_IN), now)
+            if self.__ip_version != IPVersion.V4Only:
+                out.add_question(DNSQuestion(info.server, _TYPE_AAAA, _CLASS_IN))
+                out.add_answer_at_time(self.cache.get_by_details(info.server, _TYPE_AAAA, _CLASS_IN), now)
+        return out
+
+    async def __reap(self):
+        while True:
+            await asyncio.sleep(_REAPER_INTERVAL)
+            now = current_time_millis()
+            for record in self.cache.expired(now):
+                self.update_record(now, record)
+                self.cache.remove(record)
+
+    def __repr__(self):
+        return '{}(interfaces={}, records={}, closed={})'.format(type(self).__name__, len(self.__senders),
+                                                                len(self.cache),
+                                                                self.__closed)
+
+
+_shared: Dict[asyncio.AbstractEventLoop, AsyncEngine] = {}
+_shared_lock = threading.Lock()
+
+
+def shared() -> AsyncEngine:
+    """当前loop共用的引擎, 第一次使用时创建, 需要在loop中调用
+
+    引擎的socket和task绑定在创建它的loop上, 因此每个loop各有一个引擎, 多个线程各自运行loop时互不影响;
+    loop关闭后, 它的引擎在下一次调用时关闭并移除
+    """
+    loop = asyncio.get_running_loop()
+    with _shared_lock:
+        for other in [other for other in _shared if other.is_closed()]:
+            _shared.pop(other).close()
+        engine = _shared.get(loop)
+        if engine is None or engine.closed:
+            engine = _shared[loop] = AsyncEngine()
+        return engine
+
+
+def close_shared():
+    """关闭共用的引擎并丢弃缓存
+
+    在loop中调用时只关闭当前loop的引擎, 否则关闭所有不在运行的loop的引擎
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _shared_lock:
+        if loop is not None:
+            engines = [_shared.pop(loop)] if loop in _shared else []
+        else:
+            engines = [_shared.pop(other) for other in [other for other in _shared if not other.is_running()]]
+    for engine in engines:
+        engine.close()
+
+
+class AsyncServiceBrowser(RecordUpdateListener):
+    """在loop中浏览一种服务类型
+
+    PTR查询按zeroconf.ServiceBrowser的间隔退避重发, 新发现的服务在各自的task中并发解析,
+    解析完成后依次调用listener的add_service/update_service/remove_service
+    """
+
+    def __init__(self, zc: AsyncEngine, type_: str, listener: ServiceListener, resolve_timeout: int = 3000,
+                 delay: int = _BROWSER_TIME):
+        """
+        Args:
+            zc (AsyncEngine): mDNS引擎
+            type_ (str): 服务类型
+            listener (ServiceListener): 服务变化的监听者
+            resolve_timeout (int): 单个服务的解析超时(毫秒)
+            delay (int): 首次重发PTR查询的间隔(毫秒)
+        """
+        self.zc = zc
+        self.type = type_
+        self.listener = listener
+        self.resolve_timeout = resolve_timeout
+        self.services: Dict[str, DNSPointer] = {}
+        self.next_time = current_time_millis()
+        self.delay = delay
+        self.__resolved: Set[str] = set()
+        self.__resolving: Dict[str, asyncio.Task] = {}
+        self.__task: Optional[asyncio.Task] = asyncio.ensure_future(self.__run())
+        self.done = False
+
+    @property
+    def resolving(self) -> int:
+        """正在解析的服务数
+        """
+        return len(self.__resolving)
+
+    def update_record(self, zc: AsyncEngine, now: float, record: DNSRecord) -> None:
+        if record.type == _TYPE_PTR and record.name == self.type:
+            assert isinstance(record, DNSPointer)
+            key = record.alias.lower()
+            old_record = self.services.get(key)
+            if record.is_expired(now):
+                if old_record is not None:
+                    del self.services[key]
+                    self.__removed(record.alias)
+                return
+            if old_record is None:
+                self.services[key] = record
+                self.__resolve(record.alias, 'add_service')
+            else:
+                old_record.reset_ttl(record)
+            expires = record.get_expiration_time(75)
+            if expires < self.next_time:
+                self.next_time = expires
+
+        elif record.type == _TYPE_A or record.type == _TYPE_AAAA:
+            assert isinstance(record, DNSAddress)
+            if record.is_expired(now):
+                return
+            # 只检查已解析的服务, 不遍历整个缓存
+            for name in tuple(self.__resolved):
+                service = zc.cache.get_by_details(name, _TYPE_SRV, _CLASS_IN)
+                if service is not None and service.server == record.name:
+                    self.__resolve(name, 'update_service')
+
+        elif record.name.endswith(self.type) and not record.is_expired(now):
+            if record.name.lower() in self.services:
+                self.__resolve(record.name, 'update_service')
+
+    def __resolve(self, name: str, method: str):
+        key = name.lower()
+        if key in self.__resolving:
+            # 正在解析的task会取得最新记录
+            return
+        if method == 'update_service' and key not in self.__resolved:
+            return
+        self.__resolving[key] = asyncio.ensure_future(self.__resolve_task(name, key, method))
+
+    async def __resolve_task(self, name: str, key: str, method: str):
+        try:
+            info = await self.zc.resolve(self.type, name, self.resolve_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning('resolve %s failed: %r', name, e)
+            info = None
+        finally:
+            self.__resolving.pop(key, None)
+        if self.done:
+            return
+        if info is None:
+            # 下次收到PTR记录时重新解析
+            log.debug('resolve %s timeout', name)
+            if key not in self.__resolved:
+                self.services.pop(key, None)
+            return
+        self.__resolved.add(key)
+        self.__notify(method, name)
+
+    def __removed(self, name: str):
+        key = name.lower()
+        task = self.__resolving.pop(key, None)
+        if task is not None:
+            task.cancel()
+        if key in self.__resolved:
+            self.__resolved.discard(key)
+            self.__notify('remove_service', name)
+
+    def __notify(self, method: str, name: str):
+        try:
+            getattr(self.listener, method)(self.zc, self.type, name)
+        except Exception as e:
+            log.exception('service listener failed: %s(%s), error=%r', method, name, e)
+
+    def cancel(self):
+        """停止浏览, 取消正在进行的解析
+        """
+        self.done = True
+        self.zc.remove_listener(self)
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        for task in self.__resolving.values():
+            task.cancel()
+        self.__resolving.clear()
+
+    async def __run(self):
+        try:
+            await self.zc.start()
+        except Exception as e:
+            log.error('start mdns engine failed: %r', e)
+            self.done = True
+            return
+        self.zc.name_filter.add_type(self.type)
+        self.zc.add_listener(self, DNSQuestion(self.type, _TYPE_PTR, _CLASS_IN))
+        while not self.done and not self.zc.closed:
+            now = current_time_millis()
+            if self.next_time <= now:
+                out = DNSOutgoing(_FLAGS_QR_QUERY)
+                out.add_question(DNSQuestion(self.type, _TYPE_PTR, _CLASS_IN))
+                for record in self.services.values():
+                    if not record.is_stale(now):
+                        out.add_answer_at_time(record, now)
+                self.zc.send(out)
+                self.next_time = now + self.delay
+                self.delay = min(_BROWSER_BACKOFF_LIMIT * 1000, self.delay * 2)
+            await self.zc.wait((self.next_time - now) / 1000)
+
+    def __repr__(self):
+        return '{}({!r}, services={}, resolving={})'.format(type(self).__name__, self.type, len(self.services),
+                                                           len(self.__resolving))
+
+
+def _complete(info: ServiceInfo) -> bool:
+    return info.server is not None and info.text is not None and bool(info.addresses)
+
+
+def _set_done(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
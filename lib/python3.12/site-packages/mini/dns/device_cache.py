@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""扫描到的机器人设备的本地缓存
+
+按设备名保存地址、端口、服务类型和最后一次看到的时间, 保存在 ~/.alphamini/devices.json,
+get_device_by_name先确认缓存中的地址仍然可用(见probe), 确认失败时才进行mDNS扫描::
+
+    device = device_cache.default().get('0090')
+    if device and await device_cache.probe(device):
+        ...
+
+设置环境变量 ALPHAMINI_DEVICE_CACHE 可以修改文件路径, 设置为空字符串时不使用缓存
+"""
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+from typing import Dict, Optional, Set
+
+import websockets
+import websockets.exceptions
+
+from .. import tracing
+from . import async_engine
+from .dns_browser import WiFiDevice
+from .zeroconf import ServiceInfo
+
+log = tracing.get_logger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.alphamini', 'devices.json')
+
+MAX_AGE = 7 * 24 * 3600
+"""超过该时间(秒)没有再看到的设备不再使用"""
+
+PROBE_TIMEOUT = 0.5
+"""探测缓存地址的超时时间(秒)"""
+
+_DEFAULT_PORT = 8800
+_VERSION = 1
+
+
+class DeviceCache(object):
+    """设备名 -> WiFiDevice 的持久化缓存, 按设备名后缀(序列号)查找
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, max_age: float = MAX_AGE):
+        """
+        Args:
+            path (str): 缓存文件路径, None表示只保存在内存中
+            max_age (float): 设备的有效时间(秒)
+        """
+        self.path = path
+        self.max_age = max_age
+        self.__entries: Optional[Dict[str, dict]] = None
+        self.__removed: Set[str] = set()
+
+    def __load(self) -> Dict[str, dict]:
+        if self.__entries is None:
+            self.__entries = self.__read()
+        return self.__entries
+
+    def __read(self) -> Dict[str, dict]:
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == _VERSION:
+                return dict(data.get('devices', {}))
+        except (OSError, ValueError, AttributeError) as e:
+            log.warning('ignore broken device cache %s: %r', self.path, e)
+        return {}
+
+    def get(self, name: str) -> Optional[WiFiDevice]:
+        """按设备名后缀查找, 有多个匹配时返回最近看到的设备
+
+        Args:
+            name (str): 设备序列号(或其后缀)
+
+        Returns:
+            WiFiDevice: 没有匹配或已过期时为None
+        """
+        oldest = time.time() - self.max_age
+        found = None
+        for device_name, entry in self.__load().items():
+            if not device_name.endswith(name) or entry.get('last_seen', 0) < oldest:
+                continue
+            if found is None or entry['last_seen'] > found[1]['last_seen']:
+                found = device_name, entry
+        if found is None:
+            return None
+        device_name, entry = found
+        return WiFiDevice(address=entry['address'], port=entry['port'], s_type=entry['type'],
+                          server=entry['server'], name=device_name)
+
+    def put(self, device: WiFiDevice, save: bool = True):
+        """记录一个设备, 更新最后看到的时间
+
+        Args:
+            device (WiFiDevice): 扫描到的设备
+            save (bool): 是否立即写入文件
+        """
+        self.__load()[device.name] = {
+            'address': device.address,
+            'port': device.port,
+            'type': device.type,
+            'server': device.server,
+            'last_seen': time.time(),
+        }
+        if save:
+            self.save()
+
+    def remove(self, name: str):
+        """删除设备名完全匹配的记录
+        """
+        if self.__load().pop(name, None) is not None:
+            self.__removed.add(name)
+            self.save()
+
+    def clear(self):
+        self.__removed.update(self.__load())
+        self.__removed.update(self.__read())
+        self.__entries = {}
+        self.save()
+
+    def save(self):
+        """写入文件, 与文件中其它进程写入的记录合并, 同一设备保留最近看到的记录;
+        先写临时文件再替换, 不会留下不完整的文件
+        """
+        if not self.path:
+            return
+        entries = self.__load()
+        for name, entry in self.__read().items():
+            if name not in entries and name not in self.__removed:
+                entries[name] = entry
+            elif name in entries and entry.get('last_seen', 0) > entries[name].get('last_seen', 0):
+                entries[name] = entry
+        self.__removed.clear()
+        oldest = time.time() - self.max_age
+        devices = {k: v for k, v in entries.items() if v.get('last_seen', 0) >= oldest}
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.devices', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'version': _VERSION, 'devices': devices}, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            log.warning('save device cache %s failed: %r', self.path, e)
+
+    def __len__(self):
+        return len(self.__load())
+
+    def __repr__(self):
+        return '{}({!r}, devices={})'.format(type(self).__name__, self.path, len(self))
+
+
+async def probe(device: WiFiDevice, timeout: float = PROBE_TIMEOUT, handshake: bool = False) -> bool:
+    """检查缓存的地址是否仍然可以使用
+
+    可以建立TCP连接(handshake为True时完成websocket握手)即认为可用;
+    同时用mDNS查询该设备名的服务记录, 尽力确认地址没有被DHCP分配给另一台机器人:
+    查到的记录中地址或端口与缓存不一致时认为无效, 组播慢或被过滤而没有应答时不影响结果
+
+    Args:
+        device (WiFiDevice): 设备
+        timeout (float): 超时时间(秒)
+        handshake (bool): 是否完成websocket握手, 默认只建立TCP连接
+
+    Returns:
+        bool: 是否仍然可以使用缓存的地址
+    """
+    port = device.port if device.port > 0 else _DEFAULT_PORT
+    connect = _handshake if handshake else _connect
+    resolving = asyncio.ensure_future(_resolve(device, timeout))
+    try:
+        if not await connect(device.address, port, timeout):
+            return False
+        info = await resolving
+    finally:
+        resolving.cancel()
+    if info is None:
+        log.info('probe %s: no mDNS answer, use the reachable address', device.name)
+        return True
+    try:
+        address = socket.inet_aton(device.address)
+    except OSError:
+        address = None
+    if address not in info.addresses or info.port != port:
+        log.info('probe %s failed: %s:%s now belongs to another device', device.name, device.address, port)
+        return False
+    return True
+
+
+async def _connect(address: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        log.info('probe %s:%s failed: %r', address, port, e)
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _handshake(address: str, port: int, timeout: float) -> bool:
+    try:
+        # 外层wait_for取消握手时会等待close_timeout(默认10秒), 使用库自带的超时
+        ws = await websockets.connect('ws://{}:{!r}'.format(address, port), open_timeout=timeout,
+                                      close_timeout=timeout)
+    except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake) as e:
+        log.info('probe %s:%s failed: %r', address, port, e)
+        return False
+    await ws.close()
+    return True
+
+
+async def _resolve(device: WiFiDevice, timeout: float) -> Optional[ServiceInfo]:
+    try:
+        return await async_engine.shared().resolve(device.type, f'{device.name}.{device.type}', int(timeout * 1000))
+    except OSError as e:
+        log.info('resolve %s failed: %r', device.name, e)
+        return None
+
+
+_default: Optional[DeviceCache] = None
+
+
+def default() -> Optional[DeviceCache]:
+    """进程内的默认缓存, ALPHAMINI_DEVICE_CACHE设置为空字符串时为None
+    """
+    global _default
+    path = os.environ.get('ALPHAMINI_DEVICE_CACHE', DEFAULT_PATH)
+    if not path:
+        return None
+    if _default is None or _default.path != path:
+        _default = DeviceCache(path)
+    return _default
@@ -1,21 +1,16 @@
 #!/usr/bin/env python3
 
-import asyncio.events
-import logging
+import asyncio
 import socket
 from typing import Optional, Type
 
+from .. import tracing
 from ..dns import zeroconf as r
-from ..dns.zeroconf import (
-    ServiceBrowser,
-    ServiceInfo,
-    Zeroconf,
-)
+from ..dns import async_engine
+from ..dns.async_engine import AsyncServiceBrowser
+from ..dns.zeroconf import ServiceInfo
 
-log = logging.getLogger(__name__)
-log.addHandler(logging.StreamHandler())
-if log.level == logging.NOTSET:
-    log.setLevel(logging.WARNING)
+log = tracing.get_logger(__name__)
 
 service_type = "_Dedu_mini_channel_server._tcp.local."
 
@@ -50,7 +45,7 @@ class WiFiDeviceListener:
 
 
 class _InnerServiceListener(r.ServiceListener):
-    # ServiceListener
+    # ServiceListener, 由AsyncServiceBrowser在服务解析完成后调用, zc.get_service_info只读取缓存
 
     def __init__(self):
         self._listeners = set()
@@ -78,7 +73,7 @@ class _InnerServiceListener(r.ServiceListener):
         info = zc.get_service_info(type_, name)
         device = _WiFiBrowser.device_from_info(info)
         if device:
-            log.info(f"Find Device:  {device}")
+            log.info('Find Device:  %s', device)
             self._found_devices[device.name] = device
             for listener in self._listeners:
                 listener.on_device_found(device)
@@ -87,7 +82,7 @@ class _InnerServiceListener(r.ServiceListener):
         info = zc.get_service_info(type_, name)
         device = _WiFiBrowser.device_from_info(info)
         if device:
-            log.info(f"Update Device: {device}")
+            log.info('Update Device: %s', device)
             self._found_devices[device.name] = device
             for listener in self._listeners:
                 listener.on_device_updated(device)
@@ -96,13 +91,19 @@ class _InnerServiceListener(r.ServiceListener):
         info = zc.get_service_info(type_, name)
         device = _WiFiBrowser.device_from_info(info)
         if device:
-            log.info(f"remove Device: {device}")
+            log.info('remove Device: %s', device)
             del self._found_devices[device.name]
             for listener in self._listeners:
                 listener.on_device_removed(device)
 
 
 class _WiFiBrowser(object):
+    """局域网内机器人的扫描器, 扫描在调用start_scan时的事件循环中进行, 监听器也在该loop中被调用
+
+    各次扫描共用async_engine.shared(), stop_scan只停止浏览, 引擎和记录缓存保留,
+    再次扫描时缓存中的设备立即通知
+    """
+
     __init_flag = False
 
     # 单例
@@ -116,8 +117,14 @@ class _WiFiBrowser(object):
             _WiFiBrowser.__init_flag = True
             log.info(f'init _WiFiBrowser')
             self._proxy = _InnerServiceListener()
-            self._browser = None
-            self._zc = None
+            self._browser: Optional[AsyncServiceBrowser] = None
+            self._timer = None
+
+    @classmethod
+    def default(cls) -> '_WiFiBrowser':
+        """进程内的默认扫描器, 与_WiFiBrowser()相同
+        """
+        return cls()
 
     @property
     def found_devices(self):
@@ -125,7 +132,7 @@ class _WiFiBrowser(object):
 
     @property
     def scanning(self) -> bool:
-        return self._browser and self._browser.is_alive()
+        return self._browser is not None and not self._browser.done
 
     @staticmethod
     def device_from_info(info: ServiceInfo) -> Optional[WiFiDevice]:
@@ -148,29 +155,33 @@ class _WiFiBrowser(object):
         return self._start_scan(service_type, timeout)
 
     def stop_scan(self) -> bool:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
         if self._browser:
             log.debug(f'browser cancel.')
             self._browser.cancel()
             self._browser = None
 
-        if self._zc:
-            log.debug(f'zc close.')
-            self._zc.close()
-            self._zc = None
-
         return True
 
+    def close(self):
+        """停止扫描并关闭共用的mDNS引擎, 丢弃记录缓存
+        """
+        self.stop_scan()
+        async_engine.close_shared()
+
     def _start_scan(self, s_type: str, timeout: int = 0) -> bool:
         # 开始扫描前先停止扫描
         self.stop_scan()
         log.debug('start scanner.')
         # 清空数据
         self._proxy.clear_devices()
-        self._zc = Zeroconf()
-        self._browser = ServiceBrowser(self._zc, s_type, listener=self._proxy)
+        self._browser = AsyncServiceBrowser(async_engine.shared(), s_type, listener=self._proxy)
 
         if timeout > 0:
-            asyncio.get_event_loop().call_later(timeout, lambda: self.stop_scan())
+            self._timer = asyncio.get_running_loop().call_later(timeout, self.stop_scan)
 
         return True
 
@@ -22,6 +22,7 @@
 
 import enum
 import errno
+import heapq
 import ipaddress
 import itertools
 import logging
@@ -683,11 +684,59 @@ class DNSService(DNSRecord):
         return self.to_string("%s:%s" % (self.server, self.port))
 
 
+_HEADER = struct.Struct('!6H')
+_QUESTION = struct.Struct('!HH')
+_RECORD = struct.Struct('!HHiH')
+_UNSIGNED_SHORT = struct.Struct('!H')
+_SERVICE = struct.Struct('!HHH')
+_STRUCTS = {}  # type: Dict[bytes, struct.Struct]
+
+
+class NameFilter:
+    """The names a browser is interested in: everything under the
+    browsed service types.
+
+    Passed to DNSIncoming, records with other names are skipped
+    without being decoded. Address records are not filtered by name,
+    see DNSIncoming.read_others."""
+
+    def __init__(self, types: Sequence[str] = ()) -> None:
+        self.types = set()  # type: Set[str]
+        for type_ in types:
+            self.add_type(type_)
+
+    def add_type(self, type_: str) -> None:
+        self.types.add(type_.lower())
+
+    def clear(self) -> None:
+        self.types.clear()
+
+    def __bool__(self) -> bool:
+        return bool(self.types)
+
+    def __call__(self, name: str) -> bool:
+        key = name.lower()
+        if key in self.types:
+            return True
+        # instance names are <instance>.<type>
+        dot = key.find('.')
+        while dot >= 0:
+            if key[dot + 1:] in self.types:
+                return True
+            dot = key.find('.', dot + 1)
+        return False
+
+
 class DNSIncoming(QuietLogger):
     """Object representation of an incoming DNS packet"""
 
-    def __init__(self, data: bytes) -> None:
-        """Constructor from string holding bytes of packet"""
+    def __init__(self, data: bytes, name_filter: Optional[NameFilter] = None) -> None:
+        """Constructor from string holding bytes of packet
+
+        With a name_filter, answers whose names it rejects are skipped
+        and counted in num_skipped. A and AAAA records are always kept:
+        their names are host names, and the SRV record naming the host
+        may come later in the packet or in another packet."""
         self.offset = 0
         self.data = data
         self.questions = []  # type: List[DNSQuestion]
@@ -698,7 +747,10 @@ class DNSIncoming(QuietLogger):
         self.num_answers = 0
         self.num_authorities = 0
         self.num_additionals = 0
+        self.num_skipped = 0
         self.valid = False
+        self._names = {}  # type: Dict[int, str]
+        self._name_filter = name_filter
 
         try:
             self.read_header()
@@ -710,9 +762,11 @@ class DNSIncoming(QuietLogger):
             self.log_exception_warning(('Choked at offset %d while unpacking %r', self.offset, data))
 
     def unpack(self, format_: bytes) -> tuple:
-        length = struct.calcsize(format_)
-        info = struct.unpack(format_, self.data[self.offset: self.offset + length])
-        self.offset += length
+        unpacker = _STRUCTS.get(format_)
+        if unpacker is None:
+            unpacker = _STRUCTS[format_] = struct.Struct(format_)
+        info = unpacker.unpack_from(self.data, self.offset)
+        self.offset += unpacker.size
         return info
 
     def read_header(self) -> None:
@@ -724,13 +778,15 @@ class DNSIncoming(QuietLogger):
             self.num_answers,
             self.num_authorities,
             self.num_additionals,
-        ) = self.unpack(b'!6H')
+        ) = _HEADER.unpack_from(self.data, self.offset)
+        self.offset += _HEADER.size
 
     def read_questions(self) -> None:
         """Reads questions section of packet"""
         for i in range(self.num_questions):
             name = self.read_name()
-            type_, class_ = self.unpack(b'!HH')
+            type_, class_ = _QUESTION.unpack_from(self.data, self.offset)
+            self.offset += _QUESTION.size
 
             question = DNSQuestion(name, type_, class_)
             self.questions.append(question)
@@ -753,15 +809,30 @@ class DNSIncoming(QuietLogger):
 
     def read_unsigned_short(self) -> int:
         """Reads an unsigned short from the packet"""
-        return cast(int, self.unpack(b'!H')[0])
+        value = _UNSIGNED_SHORT.unpack_from(self.data, self.offset)[0]
+        self.offset += _UNSIGNED_SHORT.size
+        return cast(int, value)
 
     def read_others(self) -> None:
         """Reads the answers, authorities and additionals section of the
         packet"""
         n = self.num_answers + self.num_authorities + self.num_additionals
+        name_filter = self._name_filter
         for i in range(n):
             domain = self.read_name()
-            type_, class_, ttl, length = self.unpack(b'!HHiH')
+            type_, class_, ttl, length = _RECORD.unpack_from(self.data, self.offset)
+            self.offset += _RECORD.size
+            end = self.offset + length
+
+            if (
+                    name_filter is not None
+                    and type_ != _TYPE_A
+                    and type_ != _TYPE_AAAA
+                    and not name_filter(domain)
+            ):
+                self.num_skipped += 1
+                self.offset = end
+                continue
 
             rec = None  # type: Optional[DNSRecord]
             if type_ == _TYPE_A:
@@ -771,27 +842,19 @@ class DNSIncoming(QuietLogger):
             elif type_ == _TYPE_TXT:
                 rec = DNSText(domain, type_, class_, ttl, self.read_string(length))
             elif type_ == _TYPE_SRV:
-                rec = DNSService(
-                    domain,
-                    type_,
-                    class_,
-                    ttl,
-                    self.read_unsigned_short(),
-                    self.read_unsigned_short(),
-                    self.read_unsigned_short(),
-                    self.read_name(),
-                )
+                priority, weight, port = _SERVICE.unpack_from(self.data, self.offset)
+                self.offset += _SERVICE.size
+                rec = DNSService(domain, type_, class_, ttl, priority, weight, port, self.read_name())
             elif type_ == _TYPE_HINFO:
                 rec = DNSHinfo(
                     domain, type_, class_, ttl, self.read_character_string(), self.read_character_string()
                 )
             elif type_ == _TYPE_AAAA:
                 rec = DNSAddress(domain, type_, class_, ttl, self.read_string(16))
-            else:
-                # Try to ignore types we don't know about
-                # Skip the payload for the resource record so the next
-                # records can be parsed correctly
-                self.offset += length
+            # Types we don't know about are ignored, skip the payload
+            # for the resource record so the next records can be parsed
+            # correctly
+            self.offset = end
 
             if rec is not None:
                 self.answers.append(rec)
@@ -809,36 +872,50 @@ class DNSIncoming(QuietLogger):
         return str(self.data[offset: offset + length], 'utf-8', 'replace')
 
     def read_name(self) -> str:
-        """Reads a domain name from the packet"""
-        result = ''
+        """Reads a domain name from the packet
+
+        Every label start is remembered with the name that follows it,
+        so compression pointers to an already decoded name don't walk
+        the labels again."""
+        data = self.data
+        names = self._names
         off = self.offset
         next_ = -1
         first = off
+        labels = []  # type: List[Tuple[int, str]]
+        result = ''
 
         while True:
-            length = self.data[off]
-            off += 1
+            length = data[off]
             if length == 0:
+                off += 1
                 break
             t = length & 0xC0
             if t == 0x00:
-                result = ''.join((result, self.read_utf(off, length) + '.'))
-                off += length
+                labels.append((off, str(data[off + 1: off + 1 + length], 'utf-8', 'replace') + '.'))
+                off += 1 + length
             elif t == 0xC0:
                 if next_ < 0:
-                    next_ = off + 1
-                off = ((length & 0x3F) << 8) | self.data[off]
+                    next_ = off + 2
+                off = ((length & 0x3F) << 8) | data[off + 1]
                 if off >= first:
                     raise IncomingDecodeError("Bad domain name (circular) at %s" % (off,))
                 first = off
+                cached = names.get(off)
+                if cached is not None:
+                    result = cached
+                    break
             else:
-                raise IncomingDecodeError("Bad domain name at %s" % (off,))
+                raise IncomingDecodeError("Bad domain name at %s" % (off + 1,))
 
         if next_ >= 0:
             self.offset = next_
         else:
             self.offset = off
 
+        for start, label in reversed(labels):
+            result = label + result
+            names[start] = result
         return result
 
 
@@ -1102,48 +1179,114 @@ class DNSOutgoing:
         return b''.join(self.data)
 
 
+def _rdata(record: DNSEntry) -> Optional[Tuple]:
+    """Returns the fields compared by the record's __eq__, or None
+    for entries (questions) and unknown record types."""
+    if isinstance(record, DNSPointer):
+        return (record.alias,)
+    if isinstance(record, DNSAddress):
+        return (record.address,)
+    if isinstance(record, DNSService):
+        return (record.priority, record.weight, record.port, record.server)
+    if isinstance(record, DNSText):
+        return (record.text,)
+    if isinstance(record, DNSHinfo):
+        return (record.cpu, record.os)
+    return None
+
+
 class DNSCache:
-    """A cache of DNS entries"""
+    """A cache of DNS entries
+
+    Records are indexed by name, by (name, type, class) and by
+    (name, type, class, rdata), so lookups don't scan the records
+    sharing a name. Expiration times are kept in a min-heap, so
+    expired() only touches the records that actually expire."""
 
     def __init__(self) -> None:
         self.cache = {}  # type: Dict[str, List[DNSRecord]]
+        self._details = {}  # type: Dict[Tuple[str, int, int], List[DNSRecord]]
+        self._records = {}  # type: Dict[Tuple, List[DNSRecord]]
+        self._expirations = []  # type: List[Tuple[float, int, DNSRecord]]
+        self._counter = itertools.count()
+        self._members = {}  # type: Dict[int, DNSRecord]
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    @staticmethod
+    def _details_key(entry: DNSEntry) -> Tuple[str, int, int]:
+        return entry.name, entry.type, entry.class_
+
+    def _record_key(self, entry: DNSEntry) -> Optional[Tuple]:
+        rdata = _rdata(entry)
+        if rdata is None:
+            return None
+        return (entry.name, entry.type, entry.class_) + rdata
 
     def add(self, entry: DNSRecord) -> None:
         """Adds an entry"""
         # Insert last in list, get will return newest entry
         # iteration will result in last update winning
         self.cache.setdefault(entry.key, []).append(entry)
+        self._details.setdefault(self._details_key(entry), []).append(entry)
+        key = self._record_key(entry)
+        if key is not None:
+            self._records.setdefault(key, []).append(entry)
+        heapq.heappush(self._expirations, (entry._expiration_time, next(self._counter), entry))
+        self._members[id(entry)] = entry
+
+    @staticmethod
+    def _discard(index: Dict, key: Any, entry: DNSRecord) -> bool:
+        list_ = index.get(key)
+        if list_ is None:
+            return False
+        for i, cached_entry in enumerate(list_):
+            if cached_entry is entry:
+                del list_[i]
+                # If we remove the last entry in the list
+                # we remove the key from the dict in order
+                # to avoid leaking memory
+                if not list_:
+                    del index[key]
+                return True
+        return False
 
     def remove(self, entry: DNSRecord) -> None:
         """Removes an entry"""
-        try:
-            list_ = self.cache[entry.key]
-            list_.remove(entry)
-            # If we remove the last entry in the list
-            # we remove the key from the dict in order
-            # to avoid leaking memory
-            if not list_:
-                del self.cache[entry.key]
-        except (KeyError, ValueError):
-            pass
+        # callers may pass an equal record instead of the cached one
+        cached_entry = entry if self._contains(entry) else self.get(entry)
+        if cached_entry is None or not self._discard(self.cache, cached_entry.key, cached_entry):
+            return
+        self._discard(self._details, self._details_key(cached_entry), cached_entry)
+        key = self._record_key(cached_entry)
+        if key is not None:
+            self._discard(self._records, key, cached_entry)
+        del self._members[id(cached_entry)]
+
+    def _contains(self, entry: DNSEntry) -> bool:
+        return self._members.get(id(entry)) is entry
 
     def get(self, entry: DNSEntry) -> Optional[DNSRecord]:
         """Gets an entry by key.  Will return None if there is no
         matching entry."""
-        try:
-            list_ = self.cache[entry.key]
-            for cached_entry in reversed(list_):
-                if entry.__eq__(cached_entry):
-                    return cached_entry
-            return None
-        except (KeyError, ValueError):
-            return None
+        if not isinstance(entry, DNSRecord):
+            list_ = self._details.get(self._details_key(entry))
+            return list_[-1] if list_ else None
+        key = self._record_key(entry)
+        if key is not None:
+            list_ = self._records.get(key)
+            return list_[-1] if list_ else None
+        for cached_entry in reversed(self._details.get(self._details_key(entry), ())):
+            if entry.__eq__(cached_entry):
+                return cached_entry
+        return None
 
     def get_by_details(self, name: str, type_: int, class_: int) -> Optional[DNSRecord]:
         """Gets an entry by details.  Will return None if there is
         no matching entry."""
-        entry = DNSEntry(name, type_, class_)
-        return self.get(entry)
+        list_ = self._details.get((name, type_, class_ & _CLASS_MASK))
+        return list_[-1] if list_ else None
 
     def entries_with_name(self, name: str) -> List[DNSRecord]:
         """Returns a list of entries whose key matches the name."""
@@ -1172,6 +1315,29 @@ class DNSCache:
             values = list(self.cache.values())
             return list(itertools.chain.from_iterable(values))
 
+    def next_expiration(self) -> Optional[float]:
+        """Returns the earliest expiration time in the heap, which may
+        belong to a record already removed or refreshed."""
+        return self._expirations[0][0] if self._expirations else None
+
+    def expired(self, now: float) -> List[DNSRecord]:
+        """Returns the cached records that have expired by now, without
+        removing them. Records whose TTL was reset are rescheduled."""
+        result = []
+        expirations = self._expirations
+        while expirations and expirations[0][0] <= now:
+            _, _, record = heapq.heappop(expirations)
+            if not self._contains(record):
+                continue
+            if record.is_expired(now):
+                result.append(record)
+            else:
+                heapq.heappush(expirations, (record._expiration_time, next(self._counter), record))
+        for record in result:
+            # keep them scheduled until the caller removes them
+            heapq.heappush(expirations, (record._expiration_time, next(self._counter), record))
+        return result
+
 
 class Engine(threading.Thread):
     """An engine wraps read access to sockets, allowing objects that
@@ -1303,10 +1469,9 @@ class Reaper(threading.Thread):
             if self.zc.done:
                 return
             now = current_time_millis()
-            for record in self.zc.cache.entries():
-                if record.is_expired(now):
-                    self.zc.update_record(now, record)
-                    self.zc.cache.remove(record)
+            for record in self.zc.cache.expired(now):
+                self.zc.update_record(now, record)
+                self.zc.cache.remove(record)
 
 
 class Signal:
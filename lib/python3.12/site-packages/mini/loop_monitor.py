@@ -0,0 +1,149 @@
+"""事件循环阻塞监测
+
+loop内的心跳task测量调度延迟, 后台线程在心跳停止超过阈值时记录当时正在分发的处理器和loop线程的调用栈,
+把阻塞归因到具体的监听器或回调::
+
+    monitor = loop_monitor.LoopMonitor(threshold=0.2)
+    monitor.start()
+
+调度延迟记录在metrics的loop_lag中, 阻塞次数按来源记录在stalls中, 同时输出warning日志
+"""
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+from typing import Deque, Optional, Tuple
+
+from . import metrics as _metrics
+from . import tracing
+
+log = tracing.get_logger(__name__)
+
+_current = None
+"""正在分发消息的处理器, 由_MessageDispatcher设置"""
+
+
+def enter(handler) -> object:
+    """标记开始分发给handler, 返回之前的标记, 供leave恢复
+    """
+    global _current
+    previous = _current
+    _current = handler
+    return previous
+
+
+def leave(previous):
+    global _current
+    _current = previous
+
+
+def describe(handler) -> str:
+    """处理器的简短描述, 监听器会带上用户设置的回调
+    """
+    name = type(handler).__name__
+    runner = getattr(handler, 'runner', None)
+    callback = getattr(runner, 'handler', None)
+    if callback is not None:
+        return '{}({})'.format(name, getattr(callback, '__qualname__', repr(callback)))
+    return name
+
+
+class LoopMonitor(object):
+    """事件循环阻塞监测器
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, registry: _metrics.MetricsRegistry = None,
+                 stack_depth: int = 4):
+        """
+        Args:
+            interval (float): 心跳间隔(秒)
+            threshold (float): 调度延迟超过该值时认为loop被阻塞(秒)
+            registry (MetricsRegistry): 统计表, 默认为metrics.registry
+            stack_depth (int): 日志中输出的调用栈帧数
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.registry = registry or _metrics.registry
+        self.stack_depth = stack_depth
+        self.recent: Deque[Tuple[float, str, float]] = collections.deque(maxlen=32)
+        """最近的阻塞 (time.time(), 来源, 秒)"""
+        self.__beat = time.monotonic()
+        self.__culprit: Optional[str] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__stopped = threading.Event()
+        self.__loop_thread: Optional[int] = None
+        self.__running = False
+
+    @property
+    def running(self) -> bool:
+        return self.__running
+
+    def start(self):
+        """在当前loop中启动监测, 需要在loop中调用
+        """
+        if self.__running:
+            return
+        self.__join()
+        self.__running = True
+        self.__beat = time.monotonic()
+        self.__loop_thread = threading.get_ident()
+        self.__task = asyncio.create_task(self.__heartbeat())
+        # 每个监测线程有自己的停止事件, stop后立即start不会让旧线程继续运行
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__watch, args=(self.__stopped,), name='mini-loop-monitor',
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """停止监测, 等待监测线程退出
+        """
+        self.__running = False
+        self.__stopped.set()
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        self.__join()
+
+    def __join(self):
+        thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    async def __heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while self.__running:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.__beat = time.monotonic()
+            self.registry.record_loop_lag(lag)
+            if lag >= self.threshold:
+                culprit, self.__culprit = self.__culprit or 'unknown', None
+                self.registry.record_stall(culprit, lag)
+                self.recent.append((time.time(), culprit, lag))
+                log.warning('event loop blocked for %.3fs by %s', lag, culprit)
+
+    def __watch(self, stopped: threading.Event):
+        reported = None
+        while not stopped.wait(self.interval / 2):
+            beat = self.__beat
+            if beat == reported or time.monotonic() - beat < self.threshold:
+                continue
+            # loop仍被阻塞, 在阻塞期间记录当时的处理器和调用栈
+            reported = beat
+            handler = _current
+            frame = sys._current_frames().get(self.__loop_thread)
+            stack = traceback.extract_stack(frame)[-self.stack_depth:] if frame is not None else []
+            if handler is not None:
+                self.__culprit = describe(handler)
+            elif stack:
+                self.__culprit = '{}:{}'.format(stack[-1].filename, stack[-1].name)
+            log.warning('event loop blocked for more than %.3fs, dispatching=%s\n%s', self.threshold,
+                        describe(handler) if handler is not None else None, ''.join(traceback.format_list(stack)))
+
+    def __repr__(self):
+        return '{}(interval={}, threshold={}, running={})'.format(type(self).__name__, self.interval, self.threshold,
+                                                                 self.__running)
@@ -0,0 +1,406 @@
+import asyncio
+import json
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+_SUB_BITS = 5
+_SUB_COUNT = 1 << _SUB_BITS
+_MAX_VALUE = (1 << 36) - 1
+_BUCKET_COUNT = (_MAX_VALUE.bit_length() - _SUB_BITS) * _SUB_COUNT + _SUB_COUNT
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _index(value: int) -> int:
+    if value < 2 * _SUB_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BITS - 1
+    return (shift + 1) * _SUB_COUNT + (value >> shift) - _SUB_COUNT
+
+
+def _lower_bound(index: int) -> int:
+    if index < 2 * _SUB_COUNT:
+        return index
+    shift = index // _SUB_COUNT - 1
+    return (index % _SUB_COUNT + _SUB_COUNT) << shift
+
+
+class Histogram(object):
+    """固定大小的HDR风格延迟直方图, 以微秒为单位记录, 相对误差约3%
+
+    每个2的幂区间划分为32个子桶, 覆盖1微秒到约19小时, 内存固定, 记录为O(1)
+    """
+
+    def __init__(self):
+        self.__buckets = array('Q', bytes(8 * _BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, seconds: float):
+        """记录一个耗时
+
+        Args:
+            seconds (float): 耗时(秒)
+        """
+        value = min(max(int(seconds * 1e6), 0), _MAX_VALUE)
+        self.__buckets[_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        """估算分位数
+
+        Args:
+            q (float): 0~1之间的分位
+
+        Returns:
+            float: 分位数(秒)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.__buckets):
+            seen += count
+            if seen >= rank:
+                return min(max(_lower_bound(index), self.min), self.max) / 1e6
+        return self.max / 1e6
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e6 if self.count else 0.0
+
+    def snapshot(self) -> dict:
+        result = {'count': self.count, 'mean': self.mean, 'min': self.min / 1e6, 'max': self.max / 1e6}
+        for q in QUANTILES:
+            result[f'p{int(q * 100)}'] = self.percentile(q)
+        return result
+
+
+class CommandMetrics(object):
+    """单个命令的统计
+
+    send: 从调用到帧写入连接
+    first_byte: 从调用到收到回复帧
+    completion: 从调用到请求返回(含解析与分发)
+    dispatch: 事件从收到到处理器开始执行
+    """
+
+    def __init__(self):
+        self.send = Histogram()
+        self.first_byte = Histogram()
+        self.completion = Histogram()
+        self.dispatch = Histogram()
+        self.requests = 0
+        self.timeouts = 0
+        self.unsupported = 0
+        self.events = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error_codes: Dict[int, int] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            'requests': self.requests,
+            'timeouts': self.timeouts,
+            'unsupported': self.unsupported,
+            'events': self.events,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'error_codes': dict(self.error_codes),
+            'send': self.send.snapshot(),
+            'first_byte': self.first_byte.snapshot(),
+            'completion': self.completion.snapshot(),
+            'dispatch': self.dispatch.snapshot(),
+        }
+
+
+class MetricsRegistry(object):
+    """按命令id汇总的统计表, 由_UBTWebSocketClient和BaseApi写入
+
+    默认所有连接共用registry, RobotPool为每台机器人创建带robot标识的统计表
+    """
+
+    def __init__(self, robot: str = None):
+        """
+        Args:
+            robot (str): 机器人标识(设备名称), 设置后导出的每条指标都带robot标签
+        """
+        self.robot = robot
+        self.enabled = True
+        self.orphaned = 0
+        self.started = time.time()
+        self.loop_lag = Histogram()
+        """事件循环调度延迟, 由loop_monitor记录"""
+        self.stalls: Dict[str, int] = {}
+        """事件循环阻塞次数, 按来源(处理器或函数)统计"""
+        self.stall_seconds: Dict[str, float] = {}
+        self.__commands: Dict[int, CommandMetrics] = {}
+
+    def command(self, cmd: int) -> CommandMetrics:
+        metrics = self.__commands.get(cmd)
+        if metrics is None:
+            metrics = self.__commands[cmd] = CommandMetrics()
+        return metrics
+
+    def get(self, cmd: int) -> Optional[CommandMetrics]:
+        """命令的统计, 没有记录过时返回None
+        """
+        return self.__commands.get(cmd)
+
+    def record_request(self, cmd: int, send: float, first_byte: Optional[float], completion: float,
+                       bytes_sent: int = 0, bytes_received: int = 0):
+        """记录一次完成的请求, 时间均为相对于调用开始的秒数
+        """
+        if not self.enabled:
+            return
+        metrics = self.command(cmd)
+        metrics.requests += 1
+        metrics.bytes_sent += bytes_sent
+        metrics.bytes_received += bytes_received
+        metrics.send.record(send)
+        if first_byte is not None:
+            metrics.first_byte.record(first_byte)
+        metrics.completion.record(completion)
+
+    def record_sent(self, cmd: int, bytes_sent: int):
+        """记录一次无需回复的发送
+        """
+        if self.enabled:
+            metrics = self.command(cmd)
+            metrics.requests += 1
+            metrics.bytes_sent += bytes_sent
+
+    def record_event(self, cmd: int, bytes_received: int):
+        if self.enabled:
+            metrics = self.command(cmd)
+            metrics.events += 1
+            metrics.bytes_received += bytes_received
+
+    def record_timeout(self, cmd: int):
+        if self.enabled:
+            metrics = self.command(cmd)
+            metrics.requests += 1
+            metrics.timeouts += 1
+
+    def record_dispatch(self, cmd: int, latency: float):
+        """记录一个事件从收到到处理器开始执行的延迟
+        """
+        if self.enabled:
+            self.command(cmd).dispatch.record(latency)
+
+    def record_unsupported(self, cmd: int):
+        if self.enabled:
+            self.command(cmd).unsupported += 1
+
+    def record_error(self, cmd: int, code: int):
+        if self.enabled:
+            codes = self.command(cmd).error_codes
+            codes[code] = codes.get(code, 0) + 1
+
+    def record_loop_lag(self, lag: float):
+        if self.enabled:
+            self.loop_lag.record(lag)
+
+    def record_stall(self, source: str, seconds: float):
+        """记录一次事件循环阻塞
+
+        Args:
+            source (str): 阻塞时正在执行的处理器或函数
+            seconds (float): 阻塞时长(秒)
+        """
+        if self.enabled:
+            self.stalls[source] = self.stalls.get(source, 0) + 1
+            self.stall_seconds[source] = self.stall_seconds.get(source, 0.0) + seconds
+
+    def record_orphaned(self, count: int):
+        self.orphaned += count
+
+    def reset(self):
+        self.__commands.clear()
+        self.orphaned = 0
+        self.loop_lag = Histogram()
+        self.stalls.clear()
+        self.stall_seconds.clear()
+        self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """当前统计的快照
+
+        Returns:
+            dict: {'uptime': 秒, 'orphaned': 回收的请求数, 'loop_lag': 调度延迟, 'stalls': {来源: 次数},
+            'commands': {命令名: 统计}}
+        """
+        return {
+            'uptime': time.time() - self.started,
+            'orphaned': self.orphaned,
+            'loop_lag': self.loop_lag.snapshot(),
+            'stalls': dict(self.stalls),
+            'commands': {_command_name(cmd): metrics.snapshot() for cmd, metrics in tuple(self.__commands.items())},
+        }
+
+    def to_prometheus(self) -> str:
+        """导出为Prometheus文本格式
+        """
+        return to_prometheus([self])
+
+    def to_json_lines(self) -> str:
+        """导出为JSON lines, 每个命令一行
+        """
+        return to_json_lines([self])
+
+    def _families(self) -> Dict[str, List[str]]:
+        """按指标名分组的样本行, 由to_prometheus合并多个统计表
+        """
+        families: Dict[str, List[str]] = {}
+
+        def add(name: str, kind: str, sample: str, value, **labels):
+            lines = families.setdefault(f'{name} {kind}', [])
+            if self.robot is not None:
+                labels = {'robot': self.robot, **labels}
+            text = ','.join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            lines.append(f'{sample}{{{text}}} {value}' if text else f'{sample} {value}')
+
+        add('mini_orphaned_requests_total', 'counter', 'mini_orphaned_requests_total', self.orphaned)
+        commands = tuple(self.__commands.items())
+        for name in ('requests', 'timeouts', 'unsupported', 'events', 'bytes_sent', 'bytes_received'):
+            for cmd, metrics in commands:
+                add(f'mini_{name}_total', 'counter', f'mini_{name}_total', getattr(metrics, name),
+                    cmd=_command_name(cmd))
+        for cmd, metrics in commands:
+            for code, count in metrics.error_codes.items():
+                add('mini_errors_total', 'counter', 'mini_errors_total', count, cmd=_command_name(cmd), code=code)
+        for name in ('send', 'first_byte', 'completion', 'dispatch'):
+            family = f'mini_{name}_seconds'
+            for cmd, metrics in commands:
+                histogram: Histogram = getattr(metrics, name)
+                label = _command_name(cmd)
+                for q in QUANTILES:
+                    add(family, 'summary', family, histogram.percentile(q), cmd=label, quantile=q)
+                add(family, 'summary', f'{family}_sum', histogram.total / 1e6, cmd=label)
+                add(family, 'summary', f'{family}_count', histogram.count, cmd=label)
+        # 调度延迟由loop_monitor写入默认统计表, 机器人的统计表没有记录时不导出
+        if self.robot is None or self.loop_lag.count:
+            for q in QUANTILES:
+                add('mini_loop_lag_seconds', 'summary', 'mini_loop_lag_seconds', self.loop_lag.percentile(q),
+                    quantile=q)
+            add('mini_loop_lag_seconds', 'summary', 'mini_loop_lag_seconds_sum', self.loop_lag.total / 1e6)
+            add('mini_loop_lag_seconds', 'summary', 'mini_loop_lag_seconds_count', self.loop_lag.count)
+        for source, count in tuple(self.stalls.items()):
+            add('mini_loop_stalls_total', 'counter', 'mini_loop_stalls_total', count, source=source)
+        for source, seconds in tuple(self.stall_seconds.items()):
+            add('mini_loop_stall_seconds_total', 'counter', 'mini_loop_stall_seconds_total', seconds, source=source)
+        return families
+
+
+_Sources = Union[MetricsRegistry, Iterable[MetricsRegistry], Callable[[], Iterable[MetricsRegistry]]]
+
+
+def _registries(sources: _Sources) -> List[MetricsRegistry]:
+    if isinstance(sources, MetricsRegistry):
+        return [sources]
+    if callable(sources):
+        sources = sources()
+    return list(sources)
+
+
+def to_prometheus(sources: _Sources) -> str:
+    """把多个统计表导出为一份Prometheus文本, 同名指标只声明一次类型, 各统计表以robot标签区分
+
+    Args:
+        sources: 统计表, 统计表列表, 或返回统计表列表的函数(例如lambda: pool.metrics)
+    """
+    families: Dict[str, List[str]] = {}
+    for source in _registries(sources):
+        for family, lines in source._families().items():
+            families.setdefault(family, []).extend(lines)
+    lines = []
+    for family, samples in families.items():
+        lines.append(f'# TYPE {family}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def to_json_lines(sources: _Sources) -> str:
+    """把多个统计表导出为JSON lines, 每个命令一行, 带robot标识的统计表在每行加上robot字段
+    """
+    now = time.time()
+    lines = []
+    for source in _registries(sources):
+        extra = {} if source.robot is None else {'robot': source.robot}
+        for cmd, stats in source.snapshot()['commands'].items():
+            lines.append(json.dumps({'ts': now, **extra, 'cmd': cmd, **stats}) + '\n')
+    return ''.join(lines)
+
+
+def _escape(label: str) -> str:
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _command_name(cmd: int) -> str:
+    from .apis.cmdid import _PCProgramCmdId
+    try:
+        return _PCProgramCmdId(cmd).name
+    except ValueError:
+        return str(cmd)
+
+
+registry = MetricsRegistry()
+"""sdk默认的统计表
+"""
+
+
+def snapshot() -> dict:
+    """默认统计表的快照, 见MetricsRegistry.snapshot
+    """
+    return registry.snapshot()
+
+
+def reset():
+    registry.reset()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 9464, source: _Sources = None) -> asyncio.AbstractServer:
+    """启动本地HTTP导出端点
+
+    GET /metrics 返回Prometheus文本, GET /metrics.json 返回JSON lines
+
+    Args:
+        host (str): 监听地址, 默认只监听本机
+        port (int): 监听端口
+        source: 统计表, 统计表列表, 或每次请求时调用的返回统计表列表的函数, 默认为registry,
+            例如导出连接池: source=lambda: [registry, *pool.metrics]
+
+    Returns:
+        asyncio.AbstractServer: 调用close()停止
+    """
+    source = source or registry
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            if path == '/metrics':
+                status, content_type, body = '200 OK', 'text/plain; version=0.0.4', to_prometheus(source)
+            elif path == '/metrics.json':
+                status, content_type, body = '200 OK', 'application/x-ndjson', to_json_lines(source)
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain', 'not found\n'
+            data = body.encode('utf-8')
+            writer.write(f'HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n'
+                         f'Content-Length: {len(data)}\r\n\r\n'.encode('latin-1') + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
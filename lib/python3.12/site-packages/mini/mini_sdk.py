@@ -4,7 +4,7 @@ from asyncio.futures import Future
 
 import enum
 from google.protobuf import message as _message
-from typing import Any, Set, Optional
+from typing import Any, Dict, List, Set, Optional
 
 from mini import MoveRobotDirection, MiniApiResultType, MouthLampMode, \
     MouthLampColor, ServicePlatform, LanType
@@ -21,14 +21,20 @@ from .channels.websocket_client import AbstractMsgHandler as _AbstractMsgHandler
 from .channels.websocket_client import ubt_websocket as _websocket
 from .dns.dns_browser import WiFiDeviceListener, WiFiDevice
 from .dns.dns_browser import browser as _browser
+from .dns import device_cache as _device_cache
+from . import metrics as _metrics
+from . import tracing as _tracing
 
-_log = logging.getLogger(__name__)
-_log.addHandler(logging.StreamHandler())
-if _log.level == logging.NOTSET:
-    _log.setLevel(logging.INFO)
+_log = _tracing.get_logger(__name__, logging.INFO)
 
-browser = _browser()
-websocket = _websocket()
+
+def __getattr__(name: str):
+    # 默认扫描器与连接在第一次使用时才创建
+    if name == 'browser':
+        return _browser.default()
+    if name == 'websocket':
+        return _websocket.default()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def set_log_level(level: int, save_file: str = None):
@@ -49,13 +55,15 @@ def set_log_level(level: int, save_file: str = None):
 
     from .dns.zeroconf import log as log3
     log3.setLevel(level)
-    log3.addHandler(logging.StreamHandler())
+    _tracing.attach(log3)
+
+    from .apis.base_api import log as log4
+    log4.setLevel(level)
 
     if save_file is not None:
         file_handler = logging.FileHandler(save_file)
-        _log.addHandler(file_handler)
-        log1.addHandler(file_handler)
-        log2.addHandler(file_handler)
+        for logger in (_log, log1, log2, log4):
+            _tracing.attach(logger, file_handler)
 
 
 @enum.unique
@@ -111,7 +119,7 @@ class _GetWiFiDeviceListListener(WiFiDeviceListener):
     devices: Set[WiFiDevice]
 
     def __init__(self, devices):
-        self.devices: Set[WiFiDevice] = devices or set()
+        self.devices: Set[WiFiDevice] = devices if devices is not None else set()
 
     def on_device_updated(self, device: WiFiDevice) -> None:
         """
@@ -176,29 +184,39 @@ def _start_scan(loop: asyncio.AbstractEventLoop, name: str) -> Future:
             if device.name.endswith(name):
                 if fut.cancelled() or fut.done():
                     return
-                loop.run_in_executor(None, browser.stop_scan)
-                loop.call_soon(_InnerLister.set_result, fut, device)
+                loop.call_soon(_browser.default().stop_scan)
+                _InnerLister.set_result(fut, device)
 
         def on_device_updated(self, device: WiFiDevice) -> None:
             if device.name.endswith(name):
                 if fut.cancelled() or fut.done():
                     return
-                loop.run_in_executor(None, browser.stop_scan)
-                loop.call_soon(_InnerLister.set_result, fut, device)
+                loop.call_soon(_browser.default().stop_scan)
+                _InnerLister.set_result(fut, device)
 
         def on_device_removed(self, device: WiFiDevice) -> None:
             if device.name.endswith(name):
                 if fut.cancelled() or fut.done():
                     return
-                loop.call_soon(_InnerLister.set_result, fut, device)
+                _InnerLister.set_result(fut, device)
 
     _log.info("start scanning...")
-    browser.add_listener(_InnerLister())
-    browser.start_scan(0)
+    _browser.default().add_listener(_InnerLister())
+    _browser.default().start_scan(0)
 
     return fut
 
 
+def _within_deadline(timeout: float) -> float:
+    """用timeout_policy.deadline()的剩余时间限制timeout
+    """
+    from .apis.timeout_policy import remaining
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0, min(timeout, left))
+
+
 async def _get_device_by_name(name: str, timeout: int) -> Optional[WiFiDevice]:
     """
     获取当前局域网内，指定名字的机器人设备信息
@@ -210,17 +228,27 @@ async def _get_device_by_name(name: str, timeout: int) -> Optional[WiFiDevice]:
         Optional[WiFiDevice]
     """
 
+    cache = _device_cache.default()
+    if cache is not None:
+        device = cache.get(name)
+        if device is not None and await _device_cache.probe(device, min(_device_cache.PROBE_TIMEOUT,
+                                                                       _within_deadline(timeout))):
+            _log.info(f"found cached device : {device}")
+            return device
+
     async def start_scan_async():
         return await _start_scan(asyncio.get_running_loop(), name)
 
     try:
-        device: WiFiDevice = await asyncio.wait_for(start_scan_async(), timeout)
+        device: WiFiDevice = await asyncio.wait_for(start_scan_async(), _within_deadline(timeout))
+        if cache is not None:
+            cache.put(device)
         return device
     except asyncio.TimeoutError:
         _log.warning(f'scan device timeout')
         return None
     finally:
-        browser.stop_scan()
+        _browser.default().stop_scan()
         _log.info("stop scan finished.")
 
 
@@ -234,11 +262,16 @@ async def _get_device_list(timeout: int) -> tuple:
         Optional[WiFiDevice]
     """
     devices: Set[WiFiDevice] = set()
-    browser.add_listener(_GetWiFiDeviceListListener(devices))
-    browser.start_scan(0)
-    await asyncio.sleep(timeout)
-    browser.remove_all_listener()
-    browser.stop_scan()
+    _browser.default().add_listener(_GetWiFiDeviceListListener(devices))
+    _browser.default().start_scan(0)
+    await asyncio.sleep(_within_deadline(timeout))
+    _browser.default().remove_all_listener()
+    _browser.default().stop_scan()
+    cache = _device_cache.default()
+    if cache is not None and devices:
+        for device in devices:
+            cache.put(device, save=False)
+        cache.save()
     return tuple(devices)
 
 
@@ -253,7 +286,7 @@ async def _connect(device: WiFiDevice) -> bool:
         bool: 是否连接设备成功
 
     """
-    return await websocket.connect(device.address)
+    return await _websocket.default().connect(device.address)
 
 
 def _register_msg_handler(cmd: int, handler: _AbstractMsgHandler):
@@ -265,7 +298,7 @@ def _register_msg_handler(cmd: int, handler: _AbstractMsgHandler):
         handler: 命令处理器
 
     """
-    websocket.register_msg_handler(cmd, handler)
+    _websocket.default().register_msg_handler(cmd, handler)
 
 
 def _unregister_msg_handler(cmd: int, handler: _AbstractMsgHandler):
@@ -276,7 +309,7 @@ def _unregister_msg_handler(cmd: int, handler: _AbstractMsgHandler):
         cmd: 支持的命令请查看: mini.apis.cmdid
         handler: 命令处理器
     """
-    websocket.unregister_msg_handler(cmd, handler)
+    _websocket.default().unregister_msg_handler(cmd, handler)
 
 
 async def _send_msg(cmd: int, message: _message.Message, timeout: int) -> Any:
@@ -288,14 +321,14 @@ async def _send_msg(cmd: int, message: _message.Message, timeout: int) -> Any:
         message:  消息类在: mini.pb2 包内
         timeout: 超时时间
     """
-    return await websocket.send_msg(cmd, message, timeout)
+    return await _websocket.default().send_msg(cmd, message, _within_deadline(timeout))
 
 
 async def _release():
     """
     断开链接，释放资源
     """
-    await websocket.shutdown()
+    await _websocket.default().shutdown()
 
 
 # -----------------------------------------------------------------#
@@ -303,6 +336,8 @@ async def get_device_by_name(name: str, timeout: int) -> Optional[WiFiDevice]:
     """
     获取当前局域网内，指定名字的机器人设备信息
 
+    先使用本地缓存中的设备地址, 确认该地址仍属于这台设备时直接返回, 否则扫描局域网, 见mini.dns.device_cache.probe
+
     Args:
         name: 设备序列号
         timeout: 扫描超时时间
@@ -344,6 +379,113 @@ async def release():
     await _release()
 
 
+class RobotPool(object):
+    """机器人连接池
+
+    一个事件loop内同时连接多台机器人, 每台机器人拥有独立的连接、消息分发器、消息id生成器和统计表
+
+    例如:
+
+        pool = RobotPool()
+
+        robot = await pool.connect(device)
+
+        await PlayAction(action_name='011').execute(robot=robot)
+
+        await pool.release_all()
+
+    导出所有机器人的统计: await metrics.serve(source=lambda: [metrics.registry, *pool.metrics])
+
+    """
+
+    def __init__(self):
+        self.__robots: Dict[str, _websocket] = {}
+
+    @property
+    def robots(self) -> Dict[str, _websocket]:
+        """已连接的机器人, {设备名称: 连接}
+        """
+        return dict(self.__robots)
+
+    @property
+    def metrics(self) -> List[_metrics.MetricsRegistry]:
+        """各机器人的统计表, 以设备名称作为robot标签
+        """
+        return [robot.metrics for robot in self.__robots.values()]
+
+    def get(self, name: str) -> Optional[_websocket]:
+        """获取指定设备名称的连接
+
+        Args:
+            name: 设备名称(序列号)
+
+        Returns:
+            Optional[_UBTWebSocketClient]
+        """
+        return self.__robots.get(name)
+
+    def __getitem__(self, name: str) -> _websocket:
+        return self.__robots[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__robots
+
+    def __len__(self):
+        return len(self.__robots)
+
+    def __iter__(self):
+        return iter(tuple(self.__robots.values()))
+
+    async def connect(self, device: WiFiDevice) -> Optional[_websocket]:
+        """连接一台机器人设备, 并加入连接池
+
+        Args:
+            device (WiFiDevice): 机器人设备对象
+
+        Returns:
+            Optional[_UBTWebSocketClient]: 连接成功返回该机器人的连接, 失败返回None
+        """
+        robot = self.__robots.get(device.name)
+        if robot is None:
+            robot = _websocket.create()
+            robot.metrics = _metrics.MetricsRegistry(robot=device.name)
+        if not await robot.connect(device.address):
+            return None
+        self.__robots[device.name] = robot
+        return robot
+
+    async def connect_all(self, devices) -> Dict[str, _websocket]:
+        """并发连接多台机器人设备
+
+        Args:
+            devices: [WiFiDevice]
+
+        Returns:
+            {设备名称: 连接}, 仅包含连接成功的设备
+        """
+        devices = tuple(devices)
+        results = await asyncio.gather(*[self.connect(device) for device in devices], return_exceptions=True)
+        return {device.name: robot for device, robot in zip(devices, results)
+                if isinstance(robot, _websocket)}
+
+    async def release(self, name: str):
+        """断开指定设备的连接, 并移出连接池
+
+        Args:
+            name: 设备名称(序列号)
+        """
+        robot = self.__robots.pop(name, None)
+        if robot is not None:
+            await robot.shutdown()
+
+    async def release_all(self):
+        """断开连接池内所有连接
+        """
+        robots = tuple(self.__robots.values())
+        self.__robots.clear()
+        await asyncio.gather(*[robot.shutdown() for robot in robots], return_exceptions=True)
+
+
 async def enter_program() -> bool:
     """进入编程模式api
 
@@ -355,7 +497,7 @@ async def enter_program() -> bool:
 
     from mini.apis.api_setup import StartRunProgram
     (resultType, response) = await StartRunProgram().execute()
-    await asyncio.sleep(6)
+    await asyncio.sleep(_within_deadline(6))
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -388,7 +530,7 @@ async def play_action(action_name: str = None) -> bool:
     from mini.apis.api_action import PlayAction
     block: PlayAction = PlayAction(True, action_name)
     (resultType, response) = await block.execute()
-    _log.info(f'play_action result:{response}')
+    _log.info('play_action result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -403,7 +545,7 @@ async def stop_action() -> bool:
     from mini.apis.api_action import StopAllAction
     block: StopAllAction = StopAllAction()
     (resultType, response) = await block.execute()
-    _log.info(f'stop_action result:{response}')
+    _log.info('stop_action result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -423,7 +565,7 @@ async def play_custom_action(action_name: str = None) -> bool:
     from mini.apis.api_action import PlayCustomAction
     block: PlayCustomAction = PlayCustomAction(True, action_name)
     (resultType, response) = await block.execute()
-    _log.info(f'play_custom_action result:{response}')
+    _log.info('play_custom_action result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -439,7 +581,7 @@ async def stop_custom_action() -> bool:
     from mini.apis.api_action import StopCustomAction
     block: StopCustomAction = StopCustomAction()
     (resultType, response) = await block.execute()
-    _log.info(f'stop_custom_action result:{response}')
+    _log.info('stop_custom_action result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -460,7 +602,7 @@ async def move(direction: MoveRobotDirection = MoveRobotDirection.FORWARD,
     from mini.apis.api_action import MoveRobot
     block: MoveRobot = MoveRobot(True, direction, step)
     (resultType, response) = await block.execute()
-    _log.info(f'move result:{response}')
+    _log.info('move result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -516,7 +658,7 @@ async def wiki(query: str) -> bool:
     from mini.apis.api_content import QueryWiKi
     block: QueryWiKi = QueryWiKi(True, query)
     (resultType, response) = await block.execute()
-    _log.info(f'wiki result:{response}')
+    _log.info('wiki result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -542,7 +684,7 @@ async def translate(query: str,
     from mini.apis.api_content import StartTranslate
     block: StartTranslate = StartTranslate(True, query, from_lan=from_lan, to_lan=to_lan, platform=platform)
     (resultType, response) = await block.execute()
-    _log.info(f'translate result:{response}')
+    _log.info('translate result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -560,7 +702,7 @@ async def play_expression(express_name: str) -> bool:
     from mini.apis.api_expression import PlayExpression
     block: PlayExpression = PlayExpression(True, express_name)
     (resultType, response) = await block.execute()
-    _log.info(f'play expression result:{response}')
+    _log.info('play expression result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -579,7 +721,7 @@ async def play_behavior(behavior_name: str) -> bool:
     from mini.apis.api_behavior import StartBehavior
     block: StartBehavior = StartBehavior(True, behavior_name)
     (resultType, response) = await block.execute()
-    _log.info(f'play behavior result:{response}')
+    _log.info('play behavior result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -592,7 +734,7 @@ async def stop_behavior() -> bool:
     from mini.apis.api_behavior import StopBehavior
     block: StopBehavior = StopBehavior(True)
     (resultType, response) = await block.execute()
-    _log.info(f'stop behavior result:{response}')
+    _log.info('stop behavior result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -654,7 +796,7 @@ async def _set_mouthlamp_mode(mode: MouthLampMode = MouthLampMode.NORMAL, color:
     from mini.apis.api_expression import SetMouthLamp
     block: SetMouthLamp = SetMouthLamp(True, mode, color, duration, breath_duration)
     (resultType, response) = await block.execute()
-    _log.info(f'set MouthLamp mode result:{response}')
+    _log.info('set MouthLamp mode result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -673,7 +815,7 @@ async def switch_MouthLamp(is_open: bool = True) -> bool:
     from mini.apis.api_expression import ControlMouthLamp
     block: ControlMouthLamp = ControlMouthLamp(True, is_open)
     (resultType, response) = await block.execute()
-    _log.info(f'switch MouthLamp result:{response}')
+    _log.info('switch MouthLamp result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -692,7 +834,7 @@ async def play_tts(text: str) -> bool:
     from mini.apis.api_sound import StartPlayTTS
     block: StartPlayTTS = StartPlayTTS(True, text)
     (resultType, response) = await block.execute()
-    _log.info(f'play tts result:{response}')
+    _log.info('play tts result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -706,7 +848,7 @@ async def stop_tts() -> bool:
     from mini.apis.api_sound import StopPlayTTS
     block: StopPlayTTS = StopPlayTTS(True)
     (resultType, response) = await block.execute()
-    _log.info(f'stop tts result:{response}')
+    _log.info('stop tts result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -730,7 +872,7 @@ async def play_online_audio(url: str) -> bool:
                                  url,
                                  AudioStorageType.NET_PUBLIC)
     (resultType, response) = await block.execute()
-    _log.info(f'play online audio result:{response}')
+    _log.info('play online audio result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -752,7 +894,7 @@ async def play_local_audio(local_file: str) -> bool:
                                  local_file,
                                  AudioStorageType.PRESET_LOCAL)
     (resultType, response) = await block.execute()
-    _log.info(f'play local audio result:{response}')
+    _log.info('play local audio result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -768,7 +910,7 @@ async def stop_audio() -> bool:
     from mini.apis.api_sound import StopAllAudio
     block: StopAllAudio = StopAllAudio(True)
     (resultType, response) = await block.execute()
-    _log.info(f'stop audio result:{response}')
+    _log.info('stop audio result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -795,7 +937,7 @@ async def get_system_audio_list() -> GetAudioListResponse:
     from mini import AudioSearchType
     block: FetchAudioList = FetchAudioList(True, search_type=AudioSearchType.INNER)
     (resultType, response) = await block.execute()
-    _log.info(f'stop audio result:{response}')
+    _log.info('stop audio result:%s', response)
     return response
 
 
@@ -822,7 +964,7 @@ async def get_custom_audio_list() -> GetAudioListResponse:
     from mini import AudioSearchType
     block: FetchAudioList = FetchAudioList(True, search_type=AudioSearchType.CUSTOM)
     (resultType, response) = await block.execute()
-    _log.info(f'stop audio result:{response}')
+    _log.info('stop audio result:%s', response)
     return response
 
 
@@ -841,7 +983,7 @@ async def change_volume(volume: float = 0.5) -> bool:
     from mini.apis.api_sound import ChangeRobotVolume
     block: ChangeRobotVolume = ChangeRobotVolume(True, volume)
     (resultType, response) = await block.execute()
-    _log.info(f'change volume result:{response}')
+    _log.info('change volume result:%s', response)
     return resultType == MiniApiResultType.Success and response.isSuccess
 
 
@@ -863,7 +1005,7 @@ async def face_detect() -> FaceDetectResponse:
     from mini.apis.api_sence import FaceDetect
     block: FaceDetect = FaceDetect(True, 10)
     (resultType, response) = await block.execute()
-    _log.info(f'face detect result:{response}')
+    _log.info('face detect result:%s', response)
     return response
 
 
@@ -905,7 +1047,7 @@ async def face_analysis() -> FaceAnalyzeResponse:
     from mini.apis.api_sence import FaceAnalysis
     block: FaceAnalysis = FaceAnalysis(True, 10)
     (resultType, response) = await block.execute()
-    _log.info(f'face analysis result:{response}')
+    _log.info('face analysis result:%s', response)
     return response
 
 
@@ -934,7 +1076,7 @@ async def face_recognise() -> FaceRecogniseResponse:
 
     from mini.apis.api_sence import FaceRecognise
     (resultType, response) = await FaceRecognise(True, 10).execute()
-    _log.info(f'face recognise result:{response}')
+    _log.info('face recognise result:%s', response)
     return response
 
 
@@ -957,7 +1099,7 @@ async def flower_recognise() -> RecogniseObjectResponse:
     from mini import ObjectRecogniseType
     block: ObjectRecognise = ObjectRecognise(True, ObjectRecogniseType.FLOWER, 10)
     (resultType, response) = await block.execute()
-    _log.info(f'flower_recognise result:{response}')
+    _log.info('flower_recognise result:%s', response)
     return response
 
 
@@ -980,7 +1122,7 @@ async def fruit_recognise() -> RecogniseObjectResponse:
     from mini import ObjectRecogniseType
     block: ObjectRecognise = ObjectRecognise(True, ObjectRecogniseType.FRUIT, 10)
     (resultType, response) = await block.execute()
-    _log.info(f'fruit_recognize result:{response}')
+    _log.info('fruit_recognize result:%s', response)
     return response
 
 
@@ -1003,7 +1145,7 @@ async def gesture_recognise() -> RecogniseObjectResponse:
     from mini import ObjectRecogniseType
     block: ObjectRecognise = ObjectRecognise(True, ObjectRecogniseType.GESTURE, 10)
     (resultType, response) = await block.execute()
-    _log.info(f'gesture_recognize result:{response}')
+    _log.info('gesture_recognize result:%s', response)
     return response
 
 
@@ -1025,7 +1167,7 @@ async def take_picture_immediately() -> TakePictureResponse:
     from mini.apis.api_sence import TakePicture
     from mini import TakePictureType
     (resultType, response) = await TakePicture(take_picture_type=TakePictureType.IMMEDIATELY).execute()
-    _log.info(f'take picture immediately result:{response}')
+    _log.info('take picture immediately result:%s', response)
     return response
 
 
@@ -1047,7 +1189,7 @@ async def take_picture() -> TakePictureResponse:
     from mini.apis.api_sence import TakePicture
     from mini import TakePictureType
     (resultType, response) = await TakePicture(take_picture_type=TakePictureType.FINDFACE).execute()
-    _log.info(f'take picture result:{response}')
+    _log.info('take picture result:%s', response)
     return response
 
 
@@ -1077,7 +1219,7 @@ async def get_register_faces() -> GetRegisterFacesResponse:
 
     from mini.apis.api_sence import GetRegisterFaces
     (resultType, response) = await GetRegisterFaces().execute()
-    _log.info(f'get register faces result:{response}')
+    _log.info('get register faces result:%s', response)
     return response
 
 
@@ -1094,7 +1236,7 @@ async def get_infrared_distance() -> GetInfraredDistanceResponse:
 
     from mini.apis.api_sence import GetInfraredDistance
     (resultType, response) = await GetInfraredDistance().execute()
-    _log.info(f'get infrared distance result:{response}')
+    _log.info('get infrared distance result:%s', response)
     return response
 
 
@@ -1111,5 +1253,5 @@ async def speech_recognise(timeout: int) -> SpeechRecogniseResponse:
     from mini.apis.api_sence import StartSpeechRecognise
     block: StartSpeechRecognise = StartSpeechRecognise(True, timeout)
     (resultType, response) = await block.execute()
-    _log.info(f'speech_recognise result:{response}')
+    _log.info('speech_recognise result:%s', response)
     return response
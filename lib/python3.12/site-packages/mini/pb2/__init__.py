@@ -1 +1,102 @@
-from ..pb2 import *
+"""protobuf消息模块
+
+按需加载: 访问 mini.pb2.PlayActionRequest 时才导入 codemao_playaction_pb2,
+访问 mini.pb2.codemao_playaction_pb2 时导入该模块
+"""
+import importlib
+
+_MODULES = {
+    'blebindorswitchwifi_pb2': ('BindOrSwitchWifiRequest', 'BindOrSwitchWifiResponse'),
+    'bthandshake_pb2': ('BtHandShakeRequest', 'BtHandShakeResponse'),
+    'cloudstorageurls_pb2': ('CloudStorage', 'UrlType'),
+    'cloudtranslate_pb2': ('Translate', 'LanguageType', 'Platform'),
+    'cloudwiki_pb2': ('WiKi',),
+    'cmprivacymode_pb2': ('CmPrivacyModeRequest', 'CmPrivacyModeResponse', 'PrivacyModeType'),
+    'codemao_actioninfo_pb2': ('ActionInfoRequest', 'ActionInfoResponse'),
+    'codemao_changerobotvolume_pb2': ('ChangeRobotVolumeRequest', 'ChangeRobotVolumeResponse'),
+    'codemao_controlbehavior_pb2': ('ControlBehaviorRequest', 'ControlBehaviorResponse'),
+    'codemao_controlfindface_pb2': ('ControlFindFaceRequest', 'ControlFindFaceResponse'),
+    'codemao_controlmouthlamp_pb2': ('ControlMouthRequest', 'ControlMouthResponse'),
+    'codemao_controlregisterface_pb2': ('ControlRegisterFaceRequest', 'ControlRegisterFaceResponse'),
+    'codemao_controlrobotrecord_pb2': ('ControlRobotRecordRequest', 'ControlRobotRecordResponse'),
+    'codemao_controlrunningprogram_pb2': ('ControlRunningProgramRequest', 'ControlRunningProgramResponse'),
+    'codemao_controltts_pb2': ('ControlTTSRequest', 'ControlTTSResponse'),
+    'codemao_expressioninfo_pb2': ('ExpressionInfoRequest', 'ExpressionInfoResponse'),
+    'codemao_faceanalyze_pb2': ('FaceAnalyzeRequest', 'FaceAnalyzeResponse'),
+    'codemao_facedetect_pb2': ('FaceDetectRequest', 'FaceDetectResponse'),
+    'codemao_facedetecttask_pb2': ('FaceDetectTaskRequest', 'FaceDetectTaskResponse'),
+    'codemao_faceinfo_pb2': ('FaceInfoRequest', 'FaceInfoResponse'),
+    'codemao_facerecognise_pb2': ('FaceRecogniseRequest', 'FaceRecogniseResponse'),
+    'codemao_facerecognisetask_pb2': ('FaceRecogniseTaskRequest', 'FaceRecogniseTaskResponse'),
+    'codemao_getactionlist_pb2': ('GetActionListRequest', 'GetActionListResponse'),
+    'codemao_getaudiolist_pb2': ('GetAudioListRequest', 'GetAudioListResponse', 'Audio'),
+    'codemao_getinfrareddistance_pb2': ('GetInfraredDistanceRequest', 'GetInfraredDistanceResponse'),
+    'codemao_getregisterfaces_pb2': ('GetRegisterFacesRequest', 'GetRegisterFacesResponse'),
+    'codemao_getrobotexpression_pb2': ('GetRobotExpressionRequest', 'GetRobotExpressionResponse'),
+    'codemao_getrobotsid_pb2': ('GetRobotSidRequest', 'GetRobotSidResponse'),
+    'codemao_getserverinfo_pb2': ('GetServerInfoRequest', 'GetServerInfoResponse'),
+    'codemao_handshake_pb2': ('HandShakeRequest', 'HandShakeResponse'),
+    'codemao_moverobot_pb2': ('MoveRobotRequest', 'MoveRobotResponse'),
+    'codemao_observebutterystatus_pb2': ('ObserveButteryStatusRequest', 'ObserveButteryStatusResponse'),
+    'codemao_observefallclimb_pb2': ('ObserveFallClimbRequest', 'ObserveFallClimbResponse'),
+    'codemao_observeheadracket_pb2': ('ObserveHeadRacketRequest', 'ObserveHeadRacketResponse'),
+    'codemao_observeinfrareddistance_pb2': ('ObserveInfraredDistanceRequest', 'ObserveInfraredDistanceResponse'),
+    'codemao_observevolumekeypress_pb2': ('ObserveVolumeKeyPressRequest', 'ObserveVolumeKeyPressResponse'),
+    'codemao_playaction_pb2': ('PlayActionRequest', 'PlayActionResponse'),
+    'codemao_playaudio_pb2': ('PlayAudioRequest', 'PlayAudioResponse'),
+    'codemao_playcustomaction_pb2': ('PlayCustomActionRequest', 'PlayCustomActionResponse'),
+    'codemao_playexpression_pb2': ('PlayExpressionRequest', 'PlayExpressionResponse'),
+    'codemao_playonlinemusic_pb2': ('MusicRequest', 'MusicResponse'),
+    'codemao_recogniseobject_pb2': ('RecogniseObjectRequest', 'RecogniseObjectResponse'),
+    'codemao_revertorigin_pb2': ('RevertOriginRequest', 'RevertOriginResponse'),
+    'codemao_searchfaces_pb2': ('SearchFacesRequest', 'SearchFacesResponse'),
+    'codemao_setmouthlamp_pb2': ('SetMouthLampRequest', 'SetMouthLampResponse'),
+    'codemao_speechrecognise_pb2': ('SpeechRecogniseRequest', 'SpeechRecogniseResponse'),
+    'codemao_stopaction_pb2': ('StopActionRequest', 'StopActionResponse'),
+    'codemao_stopaudio_pb2': ('StopAudioRequest', 'StopAudioResponse'),
+    'codemao_stopcustomaction_pb2': ('StopCustomActionRequest', 'StopCustomActionResponse'),
+    'codemao_stopspeechrecognise_pb2': ('StopSpeechRecogniseRequest', 'StopSpeechRecogniseResponse'),
+    'codemao_switchtranslatemodel_pb2': ('SwitchTranslateModelRequest', 'SwitchTranslateModelResponse'),
+    'codemao_takepicture_pb2': ('TakePictureRequest', 'TakePictureResponse'),
+    'codemao_translate_pb2': ('TranslateRequest', 'TranslateResponse'),
+    'codemao_wiki_pb2': ('WikiRequest', 'WikiResponse'),
+    'detectconfig_pb2': ('Config', 'DetectLevel'),
+    'httpserverconfig_pb2': ('ServerConfig',),
+    'pccodemao_disconnection_pb2': ('DisconnectionRequest', 'DisconnectionResponse'),
+    'pccodemao_getappversion_pb2': ('GetAppVersionRequest', 'GetAppVersionResponse'),
+    'pccodemao_getrobotlanguage_pb2': ('GetRobotLanguageRequest', 'GetRobotLanguageResponse'),
+    'pccodemao_message_pb2': ('Message',),
+    'pccodemao_messageheader_pb2': ('MessageHeader',),
+    'pccodemao_setrobotlanguage_pb2': ('SetRobotLanguageRequest', 'SetRobotLanguageResponse', 'SET_LANGUAGE_STATE'),
+    'pccodemao_takepicture_pb2': ('PcTakePictureRequest', 'PcTakePictureResponse'),
+    'programme_facedetecting_pb2': ('FaceDetectingRequest', 'FaceDetectingResponse'),
+    'programme_facetrack_pb2': ('FaceTrackRequest', 'FaceTrackResponse'),
+    'programme_resource_pb2': ('Resource',),
+    'programme_startrun_pb2': ('StartRunRequest', 'StartRunResponse'),
+    'receiver_udpdata_pb2': ('UdpDataPacket',),
+    'robotpushmessage_pb2': ('PushBody',),
+    'terminaltype_pb2': ('TerminalType',),
+}
+"""模块名 -> 模块内定义的消息与枚举名
+"""
+
+_INDEX = {name: module for module, names in _MODULES.items() for name in names}
+
+
+def __getattr__(name: str):
+    module = _INDEX.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    elif name in _MODULES or name.endswith('_pb2'):
+        try:
+            value = importlib.import_module(f'{__name__}.{name}')
+        except ModuleNotFoundError:
+            raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_INDEX) | set(_MODULES))
@@ -6,6 +6,7 @@ import websockets
 
 import mini
 from mini import WiFiDevice as _WiFiDevice
+from mini.channels import frame_codec
 from mini.channels import msg_utils
 from mini.pb2.pccodemao_message_pb2 import Message as _Message
 from mini.pb2.pccodemao_messageheader_pb2 import MessageHeader as _MessageHeader
@@ -80,12 +81,12 @@ def _read_into_buffer(filename) -> bytes:
 
 
 async def _send_msg1(websocket, message: _Message) -> str:
-    await websocket.send(msg_utils.base64_encode(message.SerializeToString()))
+    await websocket.send(frame_codec.encode_text(message.SerializeToString()))
     result: str = ""
     while True:
         try:
             _data = await websocket.recv()
-            _bytes = msg_utils.base64_decode(_data)
+            _bytes = frame_codec.decode(_data)
             msg: _Message = msg_utils.parse_msg(_bytes)
             header: _MessageHeader = msg.header
             if header.command == _PCPyCmdId.PYPI_INSTALL_WHEEL_REQUEST.value:
@@ -160,6 +161,25 @@ async def _send_msg1(websocket, message: _Message) -> str:
     return result
 
 
+def _find_device(robot_id: str) -> _WiFiDevice:
+    """查找机器人, 依次使用本进程已找到的设备、本地设备缓存和局域网扫描
+
+    Args:
+        robot_id: 机器人序列号
+
+    Returns:
+        WiFiDevice: 找不到时为None
+    """
+    device: _WiFiDevice = _found_devices.get(robot_id)
+    if device is None:
+        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
+        if device is None:
+            print(f"Can't find AlphaMini of id (:{robot_id})")
+        else:
+            _found_devices[robot_id] = device
+    return device
+
+
 async def _send_msg0(message: _Message, device: _WiFiDevice) -> str:
     try:
         async with websockets.connect('ws://{}:{!r}'.format(device.address, 8801)) as websocket:
@@ -291,15 +311,10 @@ def install_py_pkg(package_path: str, robot_id: str, debug: bool = False):
         print(f'Not a PiPy package  ')
         return
 
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return
-        else:
-            _found_devices[robot_id] = device
+        return
     # 上传
     asyncio.run(_send_msg0(_build_install_py_pkg_msg(package_path, debug), device))
 
@@ -338,15 +353,10 @@ def uninstall_py_pkg(pkg_name: str, robot_id: str, debug: bool = False):
         None
 
     """
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return
-        else:
-            _found_devices[robot_id] = device
+        return
     # 卸载
     asyncio.run(_send_msg0(_build_uninstall_py_pkg_msg(pkg_name, debug), device))
 
@@ -439,15 +449,10 @@ def query_py_pkg(pkg_name: str, robot_id: str) -> str:
     Returns:
         str : 安装包相信信息
     """
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return ""
-        else:
-            _found_devices[robot_id] = device
+        return ""
     # 查询
     return asyncio.run(_send_msg0(_build_query_py_pkg_msg(pkg_name), device))
 
@@ -493,15 +498,10 @@ def list_py_pkg(robot_id: str) -> str:
     Returns:
         str : 所有py程序名称-版本号
     """
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return ""
-        else:
-            _found_devices[robot_id] = device
+        return ""
     # 查询
     return asyncio.run(_send_msg0(_build_list_py_pkg_msg(), device))
 
@@ -539,15 +539,10 @@ def run_py_pkg(entry_point: str, robot_id: str, debug: bool = False):
     Returns:
         None
     """
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return
-        else:
-            _found_devices[robot_id] = device
+        return
     # 触发
     asyncio.run(_send_msg0(_build_run_py_pkg_msg(entry_point, debug), device))
 
@@ -573,15 +568,10 @@ def switch_adb(robot_id: str, switch: bool = True):
     Returns:
         None
     """
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return
-        else:
-            _found_devices[robot_id] = device
+        return
     # 触发
     asyncio.run(_send_msg0(_build_switch_adb_msg(switch), device))
 
@@ -613,14 +603,9 @@ def upload_script(cmd_id: int, robot_id: str, file_name: str = None, content: by
     else:
         py_cmd_id = _PCPyCmdId.PYPI_LIST_UPLOAD_SCRIPT_REQUEST.value
 
-    device: _WiFiDevice = _found_devices.get(robot_id)
     # 搜索设备
+    device: _WiFiDevice = _find_device(robot_id)
     if device is None:
-        device = asyncio.get_event_loop().run_until_complete(mini.get_device_by_name(robot_id, 10))
-        if device is None:
-            print(f"Can't find AlphaMini of id (:{robot_id})")
-            return
-        else:
-            _found_devices[robot_id] = device
+        return
     # 触发
     return asyncio.run(_send_msg0(_build_upload_script_msg(file_name, content, py_cmd_id), device))
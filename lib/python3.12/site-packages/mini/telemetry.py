@@ -0,0 +1,267 @@
+"""传感器历史数据
+
+按机器人连接保存固定容量、带时间戳的环形缓冲区, 由api_observe中的监听器写入,
+支持按最近N秒查询最小值、均值、分位数和变化率::
+
+    store = telemetry.enable()
+    ObserveInfraredDistance().start()
+    ...
+    store['infrared_distance'].mean(2.0)
+
+安装了numpy时窗口计算使用numpy, 否则使用array和内置函数
+"""
+import bisect
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_CAPACITY = 1024
+
+
+class _Times(object):
+    """按时间先后顺序访问环形缓冲区的时间戳, 供bisect使用
+    """
+    __slots__ = ('__buffer',)
+
+    def __init__(self, buffer: 'RingBuffer'):
+        self.__buffer = buffer
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def __getitem__(self, index: int) -> float:
+        return self.__buffer.time_at(index)
+
+
+class RingBuffer(object):
+    """固定容量的带时间戳的数值序列, 写满后覆盖最早的数据
+
+    时间戳和数值分别保存在array中, 追加为O(1), 窗口查找为O(log n)
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, typecode: str = 'd'):
+        """
+        Args:
+            capacity (int): 容量
+            typecode (str): 数值的array类型码, 默认为'd'(float)
+        """
+        assert capacity > 0, 'capacity should be positive in RingBuffer'
+        self.capacity = capacity
+        self.__times = array('d', bytes(8 * capacity))
+        self.__values = array(typecode, [0] * capacity)
+        self.__start = 0
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def append(self, value, timestamp: float = None):
+        """追加一个数据
+
+        Args:
+            value: 数值
+            timestamp (float): time.monotonic()时间, 默认为当前时间
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.__count < self.capacity:
+            index = (self.__start + self.__count) % self.capacity
+            self.__count += 1
+        else:
+            index = self.__start
+            self.__start = (self.__start + 1) % self.capacity
+        self.__times[index] = timestamp
+        self.__values[index] = value
+
+    def clear(self):
+        self.__start = 0
+        self.__count = 0
+
+    def time_at(self, index: int) -> float:
+        return self.__times[(self.__start + index) % self.capacity]
+
+    @property
+    def last(self) -> Optional[Tuple[float, float]]:
+        """最新的(时间戳, 数值), 没有数据时为None
+        """
+        if self.__count == 0:
+            return None
+        index = (self.__start + self.__count - 1) % self.capacity
+        return self.__times[index], self.__values[index]
+
+    def window(self, seconds: float = None, now: float = None) -> Tuple[array, array]:
+        """最近一段时间的数据
+
+        Args:
+            seconds (float): 时间窗口(秒), None表示全部数据
+            now (float): 窗口结束时间, 默认为当前time.monotonic()
+
+        Returns:
+            (array, array): 按时间先后排列的时间戳和数值, 安装了numpy时为numpy数组
+        """
+        first = 0
+        if seconds is not None:
+            if now is None:
+                now = time.monotonic()
+            first = bisect.bisect_left(_Times(self), now - seconds)
+        return self.__slice(self.__times, first), self.__slice(self.__values, first)
+
+    def __slice(self, data: array, first: int):
+        begin = self.__start + first
+        end = self.__start + self.__count
+        if end <= self.capacity:
+            ranges = ((begin, end),)
+        elif begin >= self.capacity:
+            ranges = ((begin - self.capacity, end - self.capacity),)
+        else:
+            ranges = ((begin, self.capacity), (0, end - self.capacity))
+        if numpy is not None:
+            # 直接引用array的内存, 不逐个转换
+            dtype = numpy.dtype(data.typecode)
+            parts = [numpy.frombuffer(data, dtype, stop - start, start * data.itemsize) for start, stop in ranges]
+            return parts[0].copy() if len(parts) == 1 else numpy.concatenate(parts)
+        if len(ranges) == 1:
+            return data[ranges[0][0]:ranges[0][1]]
+        return data[ranges[0][0]:ranges[0][1]] + data[ranges[1][0]:ranges[1][1]]
+
+    def min(self, seconds: float = None, now: float = None) -> Optional[float]:
+        """窗口内的最小值, 没有数据时为None
+        """
+        values = self.window(seconds, now)[1]
+        return min(values) if len(values) else None
+
+    def max(self, seconds: float = None, now: float = None) -> Optional[float]:
+        """窗口内的最大值, 没有数据时为None
+        """
+        values = self.window(seconds, now)[1]
+        return max(values) if len(values) else None
+
+    def mean(self, seconds: float = None, now: float = None) -> Optional[float]:
+        """窗口内的均值, 没有数据时为None
+        """
+        values = self.window(seconds, now)[1]
+        if not len(values):
+            return None
+        if numpy is not None:
+            return float(values.mean())
+        return sum(values) / len(values)
+
+    def percentile(self, q: float, seconds: float = None, now: float = None) -> Optional[float]:
+        """窗口内的分位数, 没有数据时为None
+
+        Args:
+            q (float): 0~1之间的分位
+            seconds (float): 时间窗口(秒), None表示全部数据
+            now (float): 窗口结束时间, 默认为当前time.monotonic()
+        """
+        values = self.window(seconds, now)[1]
+        if not len(values):
+            return None
+        if numpy is not None:
+            return float(numpy.quantile(values, q, method='nearest'))
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+    def rate(self, seconds: float = None, now: float = None) -> Optional[float]:
+        """窗口内数值的变化率(每秒), 按最小二乘拟合, 少于两个数据时为None
+        """
+        times, values = self.window(seconds, now)
+        n = len(values)
+        if n < 2:
+            return None
+        if numpy is not None:
+            times = times - times.mean()
+            denominator = float((times * times).sum())
+            return float((times * (values - values.mean())).sum()) / denominator if denominator else None
+        mean_t = sum(times) / n
+        mean_v = sum(values) / n
+        numerator = 0.0
+        denominator = 0.0
+        for t, v in zip(times, values):
+            numerator += (t - mean_t) * (v - mean_v)
+            denominator += (t - mean_t) * (t - mean_t)
+        return numerator / denominator if denominator else None
+
+    def __repr__(self):
+        return '{}({}/{}, last={!r})'.format(type(self).__name__, self.__count, self.capacity, self.last)
+
+
+class TelemetryStore(object):
+    """一个机器人连接的所有传感器历史, 按名称保存RingBuffer
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Args:
+            capacity (int): 每个序列的容量
+        """
+        self.capacity = capacity
+        self.__series: Dict[str, RingBuffer] = {}
+
+    def series(self, name: str) -> RingBuffer:
+        """名称对应的序列, 不存在时创建
+        """
+        buffer = self.__series.get(name)
+        if buffer is None:
+            buffer = self.__series[name] = RingBuffer(self.capacity)
+        return buffer
+
+    __getitem__ = series
+
+    def record(self, name: str, value, timestamp: float = None):
+        """记录一个数据, 见RingBuffer.append
+        """
+        self.series(name).append(value, timestamp)
+
+    def names(self):
+        return tuple(self.__series)
+
+    def clear(self):
+        self.__series.clear()
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.__series)
+
+
+_stores: Dict[object, TelemetryStore] = {}
+
+
+def enable(robot=None, capacity: int = DEFAULT_CAPACITY) -> TelemetryStore:
+    """为机器人连接开启传感器历史记录, 已开启时返回已有的记录
+
+    Args:
+        robot (_UBTWebSocketClient): 机器人连接,默认为None,表示使用默认连接
+        capacity (int): 每个序列的容量
+
+    Returns:
+        TelemetryStore
+    """
+    robot = robot or _default_robot()
+    store = _stores.get(robot)
+    if store is None:
+        store = _stores[robot] = TelemetryStore(capacity)
+    return store
+
+
+def disable(robot=None):
+    """关闭机器人连接的传感器历史记录并丢弃已有数据
+    """
+    _stores.pop(robot or _default_robot(), None)
+
+
+def get(robot=None) -> Optional[TelemetryStore]:
+    """机器人连接的传感器历史, 未开启时返回None
+    """
+    if not _stores:
+        return None
+    return _stores.get(robot or _default_robot())
+
+
+def _default_robot():
+    from .channels.websocket_client import ubt_websocket
+    return ubt_websocket.default()
@@ -0,0 +1,104 @@
+import logging
+from typing import Callable, Set
+
+_handler = logging.StreamHandler()
+"""所有sdk logger共用的输出handler, 只创建一次
+"""
+
+_payload_log = logging.getLogger('mini.payload')
+_payload_log.propagate = False
+_payload_log.setLevel(logging.DEBUG)
+
+_dump_cmds: Set[int] = set()
+_dump_all = False
+
+
+def get_logger(name: str, level: int = logging.WARNING) -> logging.Logger:
+    """获取sdk内部使用的logger
+
+    共用同一个StreamHandler, 多次调用不会重复添加handler
+
+    Args:
+        name (str): logger名称, 一般为__name__
+        level (int): 未设置级别时使用的默认级别
+
+    Returns:
+        logging.Logger
+    """
+    logger = logging.getLogger(name)
+    attach(logger)
+    if logger.level == logging.NOTSET:
+        logger.setLevel(level)
+    return logger
+
+
+def attach(logger: logging.Logger, handler: logging.Handler = _handler):
+    """给logger添加handler, 已添加过的不再重复添加
+
+    Args:
+        logger (logging.Logger): 目标logger
+        handler (logging.Handler): 要添加的handler, 默认为共用的StreamHandler
+    """
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+
+
+class Lazy:
+    """延迟求值的日志参数, 只有日志真正输出时才调用func
+
+    用法: log.debug('state: %s', Lazy(lambda: expensive()))
+    """
+    __slots__ = ('__func',)
+
+    def __init__(self, func: Callable[[], object]):
+        self.__func = func
+
+    def __str__(self):
+        return str(self.__func())
+
+    __repr__ = __str__
+
+
+def enable_payload_dump(*cmds: int):
+    """运行时打开指定命令的消息内容输出, 不传参数时输出所有命令
+
+    Args:
+        *cmds (int): 命令id
+    """
+    global _dump_all
+    if cmds:
+        _dump_cmds.update(cmds)
+    else:
+        _dump_all = True
+    attach(_payload_log)
+
+
+def disable_payload_dump(*cmds: int):
+    """关闭指定命令的消息内容输出, 不传参数时全部关闭
+
+    Args:
+        *cmds (int): 命令id
+    """
+    global _dump_all
+    if cmds:
+        _dump_cmds.difference_update(cmds)
+    else:
+        _dump_cmds.clear()
+        _dump_all = False
+
+
+def dump_enabled(cmd: int) -> bool:
+    return _dump_all or cmd in _dump_cmds
+
+
+def dump_payload(direction: str, cmd: int, identify, message):
+    """输出一条消息的完整内容, 只在该命令打开了dump时格式化
+
+    Args:
+        direction (str): 'send' 或 'recv'
+        cmd (int): 命令id
+        identify: 消息id
+        message: protobuf消息
+    """
+    if _dump_all or cmd in _dump_cmds:
+        _payload_log.debug('%s cmd=%s id=%s payload=%s', direction, cmd, identify, message)
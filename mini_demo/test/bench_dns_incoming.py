@@ -0,0 +1,178 @@
+import struct
+import sys
+import timeit
+
+from mini.dns.zeroconf import (
+    DNSAddress,
+    DNSIncoming,
+    DNSOutgoing,
+    DNSPointer,
+    DNSQuestion,
+    DNSService,
+    DNSText,
+    IncomingDecodeError,
+    NameFilter,
+    _CLASS_IN,
+    _CLASS_UNIQUE,
+    _FLAGS_AA,
+    _FLAGS_QR_QUERY,
+    _FLAGS_QR_RESPONSE,
+    _TYPE_A,
+    _TYPE_AAAA,
+    _TYPE_CNAME,
+    _TYPE_PTR,
+    _TYPE_SRV,
+    _TYPE_TXT,
+)
+
+MINI_TYPE = '_Dedu_mini_channel_server._tcp.local.'
+
+# 局域网中常见的其它广播
+OTHER_TYPES = ('_googlecast._tcp.local.', '_airplay._tcp.local.', '_raop._tcp.local.', '_ipp._tcp.local.',
+               '_spotify-connect._tcp.local.', '_companion-link._tcp.local.')
+
+
+# 旧实现, 仅用于对比
+class _LegacyIncoming(DNSIncoming):
+
+    def unpack(self, format_: bytes) -> tuple:
+        length = struct.calcsize(format_)
+        info = struct.unpack(format_, self.data[self.offset: self.offset + length])
+        self.offset += length
+        return info
+
+    def read_header(self) -> None:
+        (self.id, self.flags, self.num_questions, self.num_answers, self.num_authorities,
+         self.num_additionals) = self.unpack(b'!6H')
+
+    def read_questions(self) -> None:
+        for i in range(self.num_questions):
+            name = self.read_name()
+            type_, class_ = self.unpack(b'!HH')
+            self.questions.append(DNSQuestion(name, type_, class_))
+
+    def read_unsigned_short(self) -> int:
+        return self.unpack(b'!H')[0]
+
+    def read_others(self) -> None:
+        n = self.num_answers + self.num_authorities + self.num_additionals
+        for i in range(n):
+            domain = self.read_name()
+            type_, class_, ttl, length = self.unpack(b'!HHiH')
+            rec = None
+            if type_ == _TYPE_A:
+                rec = DNSAddress(domain, type_, class_, ttl, self.read_string(4))
+            elif type_ == _TYPE_CNAME or type_ == _TYPE_PTR:
+                rec = DNSPointer(domain, type_, class_, ttl, self.read_name())
+            elif type_ == _TYPE_TXT:
+                rec = DNSText(domain, type_, class_, ttl, self.read_string(length))
+            elif type_ == _TYPE_SRV:
+                rec = DNSService(domain, type_, class_, ttl, self.read_unsigned_short(),
+                                 self.read_unsigned_short(), self.read_unsigned_short(), self.read_name())
+            elif type_ == _TYPE_AAAA:
+                rec = DNSAddress(domain, type_, class_, ttl, self.read_string(16))
+            else:
+                self.offset += length
+            if rec is not None:
+                self.answers.append(rec)
+
+    def read_name(self) -> str:
+        result = ''
+        off = self.offset
+        next_ = -1
+        first = off
+        while True:
+            length = self.data[off]
+            off += 1
+            if length == 0:
+                break
+            t = length & 0xC0
+            if t == 0x00:
+                result = ''.join((result, self.read_utf(off, length) + '.'))
+                off += length
+            elif t == 0xC0:
+                if next_ < 0:
+                    next_ = off + 1
+                off = ((length & 0x3F) << 8) | self.data[off]
+                if off >= first:
+                    raise IncomingDecodeError("Bad domain name (circular) at %s" % (off,))
+                first = off
+            else:
+                raise IncomingDecodeError("Bad domain name at %s" % (off,))
+        self.offset = next_ if next_ >= 0 else off
+        return result
+
+
+def _announcement(type_: str, index: int) -> bytes:
+    """一个设备的广播: PTR应答, 附带SRV/TXT/A/AAAA
+    """
+    name = f'Device-{index:04d}.{type_}'
+    server = f'host-{index:04d}.local.'
+    out = DNSOutgoing(_FLAGS_QR_RESPONSE | _FLAGS_AA)
+    out.add_answer_at_time(DNSPointer(type_, _TYPE_PTR, _CLASS_IN, 4500, name), 0)
+    out.add_additional_answer(DNSService(name, _TYPE_SRV, _CLASS_IN | _CLASS_UNIQUE, 120, 0, 0, 8800 + index,
+                                         server))
+    out.add_additional_answer(DNSText(name, _TYPE_TXT, _CLASS_IN | _CLASS_UNIQUE, 4500,
+                                      b'\x0fmodel=AlphaMini\x0bversion=1.2\x12id=' + b'%015d' % index))
+    out.add_additional_answer(DNSAddress(server, _TYPE_A, _CLASS_IN | _CLASS_UNIQUE, 120,
+                                         bytes([192, 168, index // 256, index % 256])))
+    out.add_additional_answer(DNSAddress(server, _TYPE_AAAA, _CLASS_IN | _CLASS_UNIQUE, 120,
+                                         b'\xfe\x80' + bytes(12) + struct.pack('!H', index)))
+    return out.packet()
+
+
+def _query(type_: str) -> bytes:
+    out = DNSOutgoing(_FLAGS_QR_QUERY)
+    out.add_question(DNSQuestion(type_, _TYPE_PTR, _CLASS_IN))
+    return out.packet()
+
+
+def generated_packets(devices: int = 200, minis: int = 20) -> list:
+    """模拟一个繁忙教室网络的mDNS流量
+    """
+    packets = [_announcement(MINI_TYPE, i) for i in range(minis)]
+    packets += [_announcement(OTHER_TYPES[i % len(OTHER_TYPES)], i) for i in range(devices)]
+    packets += [_query(type_) for type_ in OTHER_TYPES]
+    return packets
+
+
+def captured_packets(path: str) -> list:
+    """读取抓包数据, 每行一个十六进制编码的UDP负载
+    """
+    with open(path) as f:
+        return [bytes.fromhex(line.strip()) for line in f if line.strip()]
+
+
+def bench(packets: list, number: int):
+    """Measure parse throughput of a set of packets
+
+    Args:
+        packets (list): UDP payloads
+        number (int): iterations
+    """
+    for data in packets:
+        legacy, new = _LegacyIncoming(data), DNSIncoming(data)
+        assert [(r.name, r.type, r.class_, r.ttl) for r in legacy.answers] == \
+               [(r.name, r.type, r.class_, r.ttl) for r in new.answers]
+        assert all(a == b for a, b in zip(legacy.answers, new.answers))
+
+    name_filter = NameFilter([MINI_TYPE])
+    kept = sum(len(DNSIncoming(data, name_filter).answers) for data in packets)
+    total = sum(len(DNSIncoming(data).answers) for data in packets)
+    print(f'{len(packets)} packets, {total} records, {kept} kept by the filter')
+
+    cases = [
+        ('legacy', lambda: [_LegacyIncoming(data) for data in packets]),
+        ('struct+memo', lambda: [DNSIncoming(data) for data in packets]),
+        ('filtered', lambda: [DNSIncoming(data, name_filter) for data in packets]),
+    ]
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        print(f'{name:<12} {len(packets) * number / seconds:10.0f} packets/s')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        bench(captured_packets(sys.argv[1]), 20)
+    else:
+        bench(generated_packets(), 20)
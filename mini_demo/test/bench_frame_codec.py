@@ -0,0 +1,43 @@
+import base64
+import os
+import timeit
+
+from mini.channels import frame_codec
+
+
+# 旧实现, 仅用于对比
+def _legacy_encode(b: bytes) -> str:
+    return "{0}&".format(str(base64.b64encode(b))[2:-1])
+
+
+def _legacy_decode(b: str) -> bytes:
+    return base64.b64decode(b[:-1])
+
+
+def bench(size: int, number: int):
+    """Measure encode/decode throughput of one frame size
+
+    Args:
+        size (int): payload size in bytes
+        number (int): iterations
+    """
+    payload = os.urandom(size)
+    legacy_frame = _legacy_encode(payload)
+    frame = frame_codec.encode(payload)
+    assert frame_codec.decode(frame) == _legacy_decode(legacy_frame) == payload
+
+    cases = [
+        ('legacy encode', lambda: _legacy_encode(payload)),
+        ('codec encode', lambda: frame_codec.encode(payload)),
+        ('legacy decode', lambda: _legacy_decode(legacy_frame)),
+        ('codec decode', lambda: frame_codec.decode(frame)),
+    ]
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        print(f'{size:>10} bytes  {name:<14} {size * number / seconds / 1e6:10.1f} MB/s')
+
+
+if __name__ == '__main__':
+    bench(1024, 20000)
+    bench(100 * 1024, 500)
+    bench(10 * 1024 * 1024, 5)
@@ -0,0 +1,44 @@
+import statistics
+import subprocess
+import sys
+
+# 每个入口在新进程中导入, 统计冷启动耗时
+ENTRY_POINTS = (
+    'import mini',
+    'from mini.pb2 import PlayActionRequest',
+    'from mini.apis.api_action import PlayAction',
+    'import mini.mini_sdk',
+    'from mini import query_py_pkg',
+    'from mini.tool.script.cli import cli_list_py_pkg',
+)
+
+_PROBE = '''
+import time
+start = time.perf_counter()
+{statement}
+print((time.perf_counter() - start) * 1000)
+'''
+
+
+def measure(statement: str, repeat: int = 10) -> float:
+    """Median cold-start import time of one statement
+
+    Args:
+        statement (str): import statement
+        repeat (int): number of fresh interpreters
+
+    Returns:
+        float: milliseconds, nan if the statement fails
+    """
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement)], capture_output=True)
+        if result.returncode != 0:
+            return float('nan')
+        samples.append(float(result.stdout.decode().strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+if __name__ == '__main__':
+    for entry in ENTRY_POINTS:
+        print(f'{measure(entry):8.1f} ms  {entry}')
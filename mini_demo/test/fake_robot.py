@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""测试用的本地机器人websocket服务
+
+收到请求后按原header回复, 回复的bodyData与请求相同, 可以设置延迟、不回复的命令, 以及主动关闭连接
+"""
+import asyncio
+import base64
+
+import websockets
+
+from mini.pb2.pccodemao_message_pb2 import Message
+
+
+class FakeRobot(object):
+
+    def __init__(self, delay: float = 0.01, host: str = 'localhost'):
+        """
+        Args:
+            delay (float): 回复延迟(秒)
+            host (str): 监听地址
+        """
+        self.delay = delay
+        self.host = host
+        self.port = 0
+        self.received = []
+        """收到的请求Message"""
+        self.silent = set()
+        """不回复的命令id"""
+        self.sockets = set()
+        self.__server = None
+
+    async def start(self) -> 'FakeRobot':
+        self.__server = await websockets.serve(self.__handle, self.host, 0)
+        self.port = self.__server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.abort_all()
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def close_all(self):
+        """正常关闭所有连接(发送close帧)
+        """
+        for ws in tuple(self.sockets):
+            await ws.close()
+
+    def abort_all(self):
+        """直接断开所有连接(不发送close帧)
+        """
+        for ws in tuple(self.sockets):
+            ws.transport.abort()
+
+    async def push(self, data: str):
+        """向所有连接发送一帧原始数据
+        """
+        for ws in tuple(self.sockets):
+            await ws.send(data)
+
+    def pause_all(self):
+        """不再读取所有连接, 心跳收不到pong
+        """
+        for ws in tuple(self.sockets):
+            ws.transport.pause_reading()
+
+    def resume_all(self):
+        for ws in tuple(self.sockets):
+            ws.transport.resume_reading()
+
+    async def __handle(self, ws, path=None):
+        self.sockets.add(ws)
+        try:
+            async for data in ws:
+                message = Message()
+                message.ParseFromString(base64.b64decode(data[:-1]))
+                self.received.append(message)
+                if message.header.command not in self.silent:
+                    asyncio.get_running_loop().call_later(self.delay, asyncio.ensure_future, self.__reply(ws, message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.sockets.discard(ws)
+
+    @staticmethod
+    async def __reply(ws, request: Message):
+        response = Message()
+        response.header.CopyFrom(request.header)
+        response.bodyData = request.bodyData
+        try:
+            await ws.send(base64.b64encode(response.SerializeToString()).decode() + '&')
+        except websockets.ConnectionClosed:
+            pass
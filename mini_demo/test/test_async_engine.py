@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""asyncio mDNS引擎: 每个loop共用一个引擎, 不同loop(线程)之间互不影响, loop关闭后引擎被回收;
+
+服务浏览器为每个服务并发解析, 停止浏览或服务移除时取消对应的解析
+"""
+import asyncio
+import threading
+import unittest
+
+from mini.dns import async_engine
+from mini.dns.async_engine import AsyncEngine, AsyncServiceBrowser
+from mini.dns.zeroconf import DNSPointer, ServiceListener, _CLASS_IN, _TYPE_PTR, current_time_millis
+
+_TYPE = '_Mini_mini_channel_server._tcp.local.'
+
+
+async def _shared() -> async_engine.AsyncEngine:
+    return async_engine.shared()
+
+
+class SharedEngineTest(unittest.TestCase):
+
+    def tearDown(self):
+        async_engine.close_shared()
+
+    def test_same_loop_same_engine(self):
+        async def run():
+            engine = async_engine.shared()
+            self.assertIs(async_engine.shared(), engine)
+            engine.close()
+            # 关闭后重新创建
+            self.assertIsNot(async_engine.shared(), engine)
+
+        asyncio.run(run())
+
+    def test_loops_in_threads(self):
+        started, finished = threading.Barrier(2), threading.Barrier(2)
+        engines, closed = {}, {}
+
+        async def run(name: str):
+            engines[name] = async_engine.shared()
+            # 两个loop同时在使用各自的引擎
+            started.wait(5)
+            engines[name + '_again'] = async_engine.shared()
+            finished.wait(5)
+            closed[name] = [engine.closed for engine in (engines['a'], engines['b'])]
+
+        threads = [threading.Thread(target=asyncio.run, args=(run(name),)) for name in ('a', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertIsNot(engines['a'], engines['b'])
+        self.assertIs(engines['a_again'], engines['a'])
+        self.assertIs(engines['b_again'], engines['b'])
+        self.assertEqual(closed, {'a': [False, False], 'b': [False, False]})
+
+    def test_closed_loop_is_released(self):
+        loop = asyncio.new_event_loop()
+        first = loop.run_until_complete(_shared())
+        second = loop.run_until_complete(_shared())
+        self.assertIs(first, second)
+        loop.close()
+        other = asyncio.run(_shared())
+        self.assertIsNot(other, first)
+        self.assertTrue(first.closed)
+        self.assertNotIn(loop, async_engine._shared)
+
+    def test_close_shared_in_loop(self):
+        loop = asyncio.new_event_loop()
+        idle = loop.run_until_complete(_shared())
+
+        async def run():
+            engine = async_engine.shared()
+            async_engine.close_shared()
+            return engine
+
+        engine = asyncio.run(run())
+        self.assertTrue(engine.closed)
+        # 其它loop的引擎不受影响
+        self.assertFalse(idle.closed)
+        # 不在loop中调用时关闭不在运行的loop的引擎
+        async_engine.close_shared()
+        self.assertTrue(idle.closed)
+        loop.close()
+
+
+class _Engine(AsyncEngine):
+    """不打开socket, resolve等待测试给出结果
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.cancelled = []
+        self.__results = {}
+
+    async def start(self):
+        pass
+
+    async def resolve(self, type_: str, name: str, timeout: int = 3000):
+        self.requests.append(name)
+        future = self.__results[name] = asyncio.get_running_loop().create_future()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+
+    def answer(self, name: str, info=True):
+        self.__results.pop(name).set_result(info)
+
+    def announce(self, name: str, ttl: int = 120):
+        record = DNSPointer(_TYPE, _TYPE_PTR, _CLASS_IN, ttl, name)
+        self.update_record(current_time_millis(), record)
+
+
+class _Listener(ServiceListener):
+
+    def __init__(self):
+        self.calls = []
+
+    def add_service(self, zc, type_, name):
+        self.calls.append(('add', name))
+
+    def remove_service(self, zc, type_, name):
+        self.calls.append(('remove', name))
+
+    def update_service(self, zc, type_, name):
+        self.calls.append(('update', name))
+
+
+class ServiceBrowserTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine, self.listener = _Engine(), _Listener()
+        self.browser = AsyncServiceBrowser(self.engine, _TYPE, self.listener)
+        await asyncio.sleep(0)
+
+    async def asyncTearDown(self):
+        self.browser.cancel()
+        self.engine.close()
+
+    async def test_services_resolve_concurrently(self):
+        first, second = f'Mini_A.{_TYPE}', f'Mini_B.{_TYPE}'
+        self.engine.announce(first)
+        self.engine.announce(second)
+        # 重复的PTR记录不会再次解析
+        self.engine.announce(first)
+        await asyncio.sleep(0)
+        self.assertEqual(self.engine.requests, [first, second])
+        self.assertEqual(self.browser.resolving, 2)
+        # 后发现的服务先解析完成时先通知
+        self.engine.answer(second)
+        await asyncio.sleep(0)
+        self.assertEqual(self.listener.calls, [('add', second)])
+        self.assertEqual(self.browser.resolving, 1)
+        self.engine.answer(first)
+        await asyncio.sleep(0)
+        self.assertEqual(self.listener.calls, [('add', second), ('add', first)])
+        self.assertEqual(self.browser.resolving, 0)
+
+    async def test_cancel_stops_resolving(self):
+        names = [f'Mini_{i}.{_TYPE}' for i in range(3)]
+        for name in names:
+            self.engine.announce(name)
+        await asyncio.sleep(0)
+        self.assertEqual(self.browser.resolving, 3)
+        self.browser.cancel()
+        await asyncio.sleep(0)
+        self.assertEqual(self.engine.cancelled, names)
+        self.assertEqual(self.browser.resolving, 0)
+        self.assertEqual(self.listener.calls, [])
+
+    async def test_removed_while_resolving(self):
+        name, other = f'Mini_A.{_TYPE}', f'Mini_B.{_TYPE}'
+        self.engine.announce(name)
+        self.engine.announce(other)
+        await asyncio.sleep(0)
+        # ttl为0的PTR记录表示服务下线
+        self.engine.announce(name, ttl=0)
+        await asyncio.sleep(0)
+        self.assertEqual(self.engine.cancelled, [name])
+        self.assertEqual(self.browser.resolving, 1)
+        self.assertNotIn(name.lower(), self.browser.services)
+        self.engine.answer(other)
+        await asyncio.sleep(0)
+        self.engine.announce(other, ttl=0)
+        self.assertEqual(self.listener.calls, [('add', other), ('remove', other)])
+
+    async def test_failed_resolve_retries_on_next_announce(self):
+        name = f'Mini_A.{_TYPE}'
+        self.engine.announce(name)
+        await asyncio.sleep(0)
+        self.engine.answer(name, None)
+        await asyncio.sleep(0)
+        self.assertEqual(self.listener.calls, [])
+        self.assertNotIn(name.lower(), self.browser.services)
+        self.engine.announce(name)
+        await asyncio.sleep(0)
+        self.assertEqual(self.engine.requests, [name, name])
+        self.engine.answer(name)
+        await asyncio.sleep(0)
+        self.assertEqual(self.listener.calls, [('add', name)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""设备缓存: 按序列号后缀查找、过期、多进程合并写入, 以及缓存地址的探测(可以连接即可用, mDNS记录尽力确认身份)
+"""
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+
+from mini.dns import async_engine, device_cache
+from mini.dns.dns_browser import WiFiDevice
+from mini.dns.zeroconf import DNSAddress, DNSService, DNSText, _CLASS_IN, _TYPE_A, _TYPE_SRV, _TYPE_TXT
+from test.fake_robot import FakeRobot
+
+_TYPE = '_minitest._tcp.local.'
+
+
+def _device(name: str, address: str = '192.168.1.2', port: int = 8800) -> WiFiDevice:
+    return WiFiDevice(f'{name}.{_TYPE}', address, port, _TYPE, f'{name.lower()}.local.')
+
+
+class DeviceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'sub', 'devices.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_and_miss(self):
+        cache = device_cache.DeviceCache(self.path)
+        cache.put(_device('Mini_00AB12'))
+        self.assertTrue(os.path.isfile(self.path))
+
+        found = device_cache.DeviceCache(self.path).get('AB12')
+        self.assertEqual((found.name, found.address, found.port, found.type),
+                         ('Mini_00AB12', '192.168.1.2', 8800, _TYPE))
+        self.assertIsNone(cache.get('CD34'))
+
+    def test_most_recent_match(self):
+        cache = device_cache.DeviceCache(self.path)
+        cache.put(_device('Mini_0012', '192.168.1.2'), save=False)
+        cache.put(_device('Mini_1012', '192.168.1.3'), save=False)
+        self.assertEqual(cache.get('12').name, 'Mini_1012')
+
+    def test_stale_entries(self):
+        old = time.time() - device_cache.MAX_AGE - 1
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            json.dump({'version': 1, 'devices': {'Mini_00AB12': {
+                'address': '192.168.1.2', 'port': 8800, 'type': _TYPE, 'server': 's.local.', 'last_seen': old}}}, f)
+        cache = device_cache.DeviceCache(self.path)
+        self.assertIsNone(cache.get('AB12'))
+        cache.put(_device('Mini_00CD34'))
+        with open(self.path) as f:
+            self.assertEqual(list(json.load(f)['devices']), ['Mini_00CD34'])
+
+    def test_broken_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertIsNone(device_cache.DeviceCache(self.path).get('AB12'))
+
+    def test_merge_and_remove(self):
+        first, second = device_cache.DeviceCache(self.path), device_cache.DeviceCache(self.path)
+        first.put(_device('Mini_1'))
+        second.put(_device('Mini_2'))
+        first.put(_device('Mini_3'))
+        with open(self.path) as f:
+            self.assertEqual(sorted(json.load(f)['devices']), ['Mini_1', 'Mini_2', 'Mini_3'])
+        first.remove('Mini_2')
+        with open(self.path) as f:
+            self.assertEqual(sorted(json.load(f)['devices']), ['Mini_1', 'Mini_3'])
+        first.clear()
+        self.assertEqual(len(device_cache.DeviceCache(self.path)), 0)
+
+    def test_default_disabled_by_env(self):
+        saved = os.environ.get('ALPHAMINI_DEVICE_CACHE')
+        try:
+            os.environ['ALPHAMINI_DEVICE_CACHE'] = ''
+            self.assertIsNone(device_cache.default())
+            os.environ['ALPHAMINI_DEVICE_CACHE'] = self.path
+            self.assertEqual(device_cache.default().path, self.path)
+        finally:
+            if saved is None:
+                os.environ.pop('ALPHAMINI_DEVICE_CACHE', None)
+            else:
+                os.environ['ALPHAMINI_DEVICE_CACHE'] = saved
+
+
+class ProbeTest(unittest.IsolatedAsyncioTestCase):
+    """probe先查共用引擎的记录缓存, 这里直接写入记录, 模拟扫描时收到的mDNS应答
+    """
+
+    async def asyncSetUp(self):
+        self.servers = []
+        for _ in range(2):
+            server = socket.socket()
+            server.bind(('127.0.0.1', 0))
+            server.listen()
+            self.servers.append(server)
+        self.ports = [server.getsockname()[1] for server in self.servers]
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            server.close()
+        async_engine.close_shared()
+
+    @staticmethod
+    def announce(name: str, port: int):
+        cache = async_engine.shared().cache
+        full_name, host = f'{name}.{_TYPE}', f'{name.lower()}.local.'
+        cache.add(DNSService(full_name, _TYPE_SRV, _CLASS_IN, 120, 0, 0, port, host))
+        cache.add(DNSText(full_name, _TYPE_TXT, _CLASS_IN, 120, b''))
+        cache.add(DNSAddress(host, _TYPE_A, _CLASS_IN, 120, socket.inet_aton('127.0.0.1')))
+
+    async def test_same_device(self):
+        self.announce('Mini_A', self.ports[0])
+        self.assertTrue(await device_cache.probe(_device('Mini_A', '127.0.0.1', self.ports[0])))
+
+    async def test_address_reassigned(self):
+        # 缓存的地址可以连接, 但该设备现在的记录指向另一个端口
+        self.announce('Mini_A', self.ports[0])
+        self.assertFalse(await device_cache.probe(_device('Mini_A', '127.0.0.1', self.ports[1])))
+
+    async def test_unreachable(self):
+        self.announce('Mini_A', self.ports[0])
+        self.servers[0].close()
+        self.assertFalse(await device_cache.probe(_device('Mini_A', '127.0.0.1', self.ports[0])))
+
+    async def test_no_answer(self):
+        # 组播慢或被过滤时, 可以连接的地址仍然可用
+        self.assertTrue(await device_cache.probe(_device('Mini_B', '127.0.0.1', self.ports[0]), timeout=0.2))
+
+    async def test_unreachable_does_not_wait_for_mdns(self):
+        self.servers[0].close()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.assertFalse(await device_cache.probe(_device('Mini_B', '127.0.0.1', self.ports[0]), timeout=2))
+        self.assertLess(loop.time() - start, 1)
+
+    async def test_handshake(self):
+        robot = await FakeRobot().start()
+        try:
+            self.assertTrue(await device_cache.probe(_device('Mini_B', '127.0.0.1', robot.port), timeout=0.5,
+                                                     handshake=True))
+        finally:
+            await robot.stop()
+        # 端口可以连接, 但不是websocket服务
+        self.assertFalse(await device_cache.probe(_device('Mini_B', '127.0.0.1', self.ports[0]), timeout=0.3,
+                                                  handshake=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""mDNS记录缓存: 按名字/类型/记录内容的索引, 以及按过期时间堆取出过期记录
+"""
+import socket
+import unittest
+
+from mini.dns.zeroconf import (DNSAddress, DNSCache, DNSEntry, DNSPointer, DNSService, _CLASS_IN, _CLASS_UNIQUE,
+                               _TYPE_A, _TYPE_PTR, _TYPE_SRV)
+
+_TYPE = '_minitest._tcp.local.'
+
+
+def _pointer(index: int, ttl: int = 120) -> DNSPointer:
+    return DNSPointer(_TYPE, _TYPE_PTR, _CLASS_IN, ttl, f'Mini_{index}.{_TYPE}')
+
+
+def _address(host: str, address: str, ttl: int = 120) -> DNSAddress:
+    return DNSAddress(host, _TYPE_A, _CLASS_IN | _CLASS_UNIQUE, ttl, socket.inet_aton(address))
+
+
+class DNSCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DNSCache()
+
+    def test_add_and_get(self):
+        pointers = [_pointer(i) for i in range(3)]
+        for pointer in pointers:
+            self.cache.add(pointer)
+        self.assertEqual(len(self.cache), 3)
+        # 按记录内容查找, 传入相等的新记录时返回缓存中的那一个
+        self.assertIs(self.cache.get(_pointer(1)), pointers[1])
+        self.assertIsNone(self.cache.get(_pointer(9)))
+        self.assertIs(self.cache.get_by_details(_TYPE, _TYPE_PTR, _CLASS_IN), pointers[-1])
+        self.assertIs(self.cache.get(DNSEntry(_TYPE, _TYPE_PTR, _CLASS_IN)), pointers[-1])
+        self.assertEqual(self.cache.entries_with_name(_TYPE.upper()), pointers)
+        self.assertEqual(len(self.cache.entries()), 3)
+
+    def test_unique_class_bit_ignored(self):
+        record = _address('m.local.', '192.168.1.2')
+        self.cache.add(record)
+        self.assertIs(self.cache.get_by_details('m.local.', _TYPE_A, _CLASS_IN | _CLASS_UNIQUE), record)
+        self.assertIs(self.cache.get(_address('m.local.', '192.168.1.2')), record)
+
+    def test_remove(self):
+        first, second = _address('m.local.', '192.168.1.2'), _address('m.local.', '192.168.1.3')
+        self.cache.add(first)
+        self.cache.add(second)
+        # 删除相等的记录对象
+        self.cache.remove(_address('m.local.', '192.168.1.2'))
+        self.assertEqual(len(self.cache), 1)
+        self.assertIsNone(self.cache.get(first))
+        self.assertIs(self.cache.get_by_details('m.local.', _TYPE_A, _CLASS_IN), second)
+        self.cache.remove(second)
+        self.cache.remove(second)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.cache, {})
+        self.assertIsNone(self.cache.get_by_details('m.local.', _TYPE_A, _CLASS_IN))
+
+    def test_remove_record_without_rdata_key(self):
+        service = DNSService(f'Mini_0.{_TYPE}', _TYPE_SRV, _CLASS_IN, 120, 0, 0, 8800, 'm.local.')
+        self.cache.add(service)
+        self.cache.remove(DNSService(f'Mini_0.{_TYPE}', _TYPE_SRV, _CLASS_IN, 120, 0, 0, 8800, 'm.local.'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expired(self):
+        short, long_ = _pointer(0, ttl=1), _pointer(1, ttl=120)
+        self.cache.add(short)
+        self.cache.add(long_)
+        self.assertEqual(self.cache.next_expiration(), short.get_expiration_time(100))
+        self.assertEqual(self.cache.expired(short.created), [])
+        now = short.created + 2000
+        self.assertEqual(self.cache.expired(now), [short])
+        # expired不删除记录, 调用方删除之前再次调用仍会返回
+        self.assertIs(self.cache.get(short), short)
+        self.assertEqual(self.cache.expired(now), [short])
+        self.cache.remove(short)
+        self.assertEqual(self.cache.expired(now), [])
+        self.assertEqual(self.cache.expired(long_.created + 121 * 1000), [long_])
+
+    def test_reset_ttl_reschedules(self):
+        record = _pointer(0, ttl=1)
+        self.cache.add(record)
+        refreshed = _pointer(0, ttl=120)
+        refreshed.created = record.created + 500
+        record.reset_ttl(refreshed)
+        self.assertEqual(self.cache.expired(record.created + 2000), [])
+        self.assertIs(self.cache.get(record), record)
+        self.assertEqual(self.cache.next_expiration(), record.get_expiration_time(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""mDNS报文解析: 与原实现结果一致, 按服务类型过滤时地址记录不受记录顺序影响
+"""
+import socket
+import unittest
+
+from mini.dns.zeroconf import (DNSAddress, DNSIncoming, DNSOutgoing, DNSPointer, DNSService, DNSText, NameFilter,
+                               _CLASS_IN, _FLAGS_QR_RESPONSE, _TYPE_A, _TYPE_PTR, _TYPE_SRV, _TYPE_TXT)
+from test.bench_dns_incoming import MINI_TYPE, _LegacyIncoming, generated_packets
+
+_OTHER_TYPE = '_googlecast._tcp.local.'
+
+
+def _packet(*records) -> bytes:
+    out = DNSOutgoing(_FLAGS_QR_RESPONSE)
+    for record in records:
+        out.add_answer_at_time(record, 0)
+    return out.packet()
+
+
+def _address(host: str) -> DNSAddress:
+    return DNSAddress(host, _TYPE_A, _CLASS_IN, 120, socket.inet_aton('192.168.1.2'))
+
+
+def _service(name: str, host: str) -> DNSService:
+    return DNSService(name, _TYPE_SRV, _CLASS_IN, 120, 0, 0, 8800, host)
+
+
+class DNSIncomingTest(unittest.TestCase):
+
+    def test_same_records_as_legacy_parser(self):
+        for data in generated_packets(devices=20, minis=5):
+            legacy, parsed = _LegacyIncoming(data), DNSIncoming(data)
+            self.assertEqual(parsed.answers, legacy.answers)
+            self.assertEqual(len(parsed.questions), len(legacy.questions))
+
+    def test_filter_skips_other_types(self):
+        name = f'Mini_0.{MINI_TYPE}'
+        data = _packet(DNSPointer(MINI_TYPE, _TYPE_PTR, _CLASS_IN, 120, name),
+                       DNSText(name, _TYPE_TXT, _CLASS_IN, 120, b'\x03a=b'),
+                       DNSPointer(_OTHER_TYPE, _TYPE_PTR, _CLASS_IN, 120, f'tv.{_OTHER_TYPE}'),
+                       _service(f'tv.{_OTHER_TYPE}', 'tv.local.'))
+        parsed = DNSIncoming(data, NameFilter([MINI_TYPE]))
+        self.assertEqual([record.name for record in parsed.answers], [MINI_TYPE, name])
+        self.assertEqual(parsed.num_skipped, 2)
+
+    def test_address_before_service_is_kept(self):
+        name_filter = NameFilter([MINI_TYPE])
+        parsed = DNSIncoming(_packet(_address('m.local.'), _service(f'Mini_0.{MINI_TYPE}', 'm.local.')),
+                             name_filter)
+        self.assertEqual([record.type for record in parsed.answers], [_TYPE_A, _TYPE_SRV])
+
+    def test_address_in_earlier_packet_is_kept(self):
+        name_filter = NameFilter([MINI_TYPE])
+        first = DNSIncoming(_packet(_address('m.local.')), name_filter)
+        self.assertEqual(len(first.answers), 1)
+        self.assertEqual(first.num_skipped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""事件流的缓冲策略: DROP_OLDEST的丢弃计数, LATEST只保留最新事件, BLOCK暂停并恢复读取连接
+"""
+import asyncio
+import base64
+import unittest
+
+from mini.apis.api_observe import ObserveHeadRacket
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.apis.event_stream import EventStream, StreamPolicy
+from mini.channels.websocket_client import ubt_websocket
+from mini.pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketResponse
+from mini.pb2.pccodemao_message_pb2 import Message
+from test.fake_robot import FakeRobot
+
+_CMD = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
+
+
+def _event_frame(racket_type: int) -> str:
+    response = ObserveHeadRacketResponse()
+    response.type = racket_type
+    message = Message()
+    message.header.command = _CMD
+    message.header.id = '0'
+    message.bodyData = response.SerializeToString()
+    return base64.b64encode(message.SerializeToString()).decode() + '&'
+
+
+class EventStreamTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_drop_oldest(self):
+        stream = EventStream(3)
+        for i in range(5):
+            stream.put(i)
+        self.assertEqual((stream.received, stream.dropped, stream.high_watermark), (5, 2, 3))
+        stream.close()
+        self.assertEqual([event async for event in stream], [2, 3, 4])
+
+    async def test_latest(self):
+        stream = EventStream(8, 'latest')
+        for i in range(4):
+            stream.put(i)
+        self.assertEqual(len(stream), 1)
+        self.assertEqual(stream.dropped, 3)
+        self.assertEqual(await stream.get(), 3)
+        stream.put(4)
+        self.assertEqual(await stream.get(), 4)
+        self.assertEqual(stream.dropped, 3)
+
+    async def test_get_waits_and_close_ends(self):
+        stream = EventStream(policy=StreamPolicy.DROP_OLDEST)
+        getter = asyncio.create_task(stream.get())
+        await asyncio.sleep(0)
+        self.assertFalse(getter.done())
+        stream.put('a')
+        self.assertEqual(await getter, 'a')
+        closed = []
+        stream = EventStream(on_close=closed.append)
+        async with stream:
+            pass
+        self.assertEqual(closed, [stream])
+        with self.assertRaises(StopAsyncIteration):
+            await stream.get()
+
+    async def test_block_holds_until_taken(self):
+        holds = []
+        stream = EventStream(2, 'block', hold=holds.append)
+        stream.put(1)
+        self.assertEqual(holds, [])
+        stream.put(2)
+        stream.put(3)
+        self.assertEqual(len(holds), 1)
+        self.assertEqual(stream.paused, 1)
+        self.assertEqual(await stream.get(), 1)
+        # 缓冲区仍为满, 保持暂停
+        self.assertFalse(holds[0].done())
+        self.assertEqual(await stream.get(), 2)
+        self.assertTrue(holds[0].done())
+        self.assertEqual(stream.dropped, 0)
+
+
+class BlockingStreamTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+        # 订阅请求不回显, 只收到push的事件
+        self.robot.silent.add(_CMD)
+        self.client = ubt_websocket.create()
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+
+    async def asyncTearDown(self):
+        await self.client.shutdown()
+        await self.robot.stop()
+
+    async def test_block_pauses_receive_loop(self):
+        observer = ObserveHeadRacket()
+        async with observer.stream(maxsize=2, policy='block', robot=self.client) as stream:
+            for i in range(1, 6):
+                await self.robot.push(_event_frame(i))
+            await asyncio.sleep(0.1)
+            # 缓冲区满后接收循环停止读取, 其余事件留在连接中
+            self.assertEqual(len(stream), 2)
+            self.assertEqual(stream.paused, 1)
+            types = [(await stream.get()).type for _ in range(5)]
+        self.assertEqual(types, [1, 2, 3, 4, 5])
+        self.assertEqual(stream.dropped, 0)
+        self.assertGreaterEqual(stream.paused, 2)
+        self.assertEqual(self.client.subscriber_count(_CMD), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
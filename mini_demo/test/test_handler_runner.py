@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""事件处理器的执行方式: 异常不影响接收循环, 有界队列的丢弃策略, 分发延迟从收到帧时开始计算
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from mini.apis.api_observe import ObserveHeadRacket
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.apis.handler_runner import HandlerPolicy, HandlerRunner
+from mini.channels.websocket_client import _MessageDispatcher
+from mini.pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketResponse
+from mini.pb2.codemao_playaction_pb2 import PlayActionResponse
+from mini.pb2.pccodemao_message_pb2 import Message
+
+
+def _write_result(response: PlayActionResponse):
+    # PROCESS方式在子进程中执行, 需要是模块级函数
+    with open(os.environ['MINI_RUNNER_RESULT'], 'w') as f:
+        f.write(f'{response.resultCode} {os.getpid()}')
+
+
+class HandlerRunnerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_inline_error_is_contained(self):
+        def handler(event):
+            raise ValueError(event)
+
+        runner = HandlerRunner(handler)
+        runner.submit(1)
+        runner.submit(2)
+        self.assertEqual(runner.errors, 2)
+        self.assertEqual(runner.duration.count, 2)
+
+    async def test_latency_starts_at_receive(self):
+        runner = HandlerRunner(lambda event: None)
+        runner.submit(1, asyncio.get_running_loop().time() - 0.5)
+        self.assertGreaterEqual(runner.latency.max, 0.5)
+
+    async def test_event_api_passes_receive_time(self):
+        cmd = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
+        seen = []
+        observer = ObserveHeadRacket()
+        observer.set_handler(seen.append, 'thread')
+        dispatcher = _MessageDispatcher()
+        dispatcher.add_handler(cmd, observer)
+        message = Message()
+        message.header.command = cmd
+        message.header.id = '0'
+        message.bodyData = ObserveHeadRacketResponse().SerializeToString()
+        dispatcher.dispatch(message, asyncio.get_running_loop().time() - 0.5)
+        await self.__drained(observer.runner, lambda: seen)
+        self.assertGreaterEqual(observer.runner.latency.max, 0.5)
+
+    async def test_thread_keeps_order(self):
+        seen, threads = [], set()
+
+        def handler(event):
+            seen.append(event)
+            threads.add(threading.get_ident())
+
+        runner = HandlerRunner(handler, 'thread')
+        for i in range(10):
+            runner.submit(i)
+        await self.__drained(runner, lambda: len(seen) == 10)
+        self.assertEqual(seen, list(range(10)))
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ['MINI_RUNNER_RESULT'] = path = os.path.join(directory, 'result')
+            try:
+                runner = HandlerRunner(_write_result, HandlerPolicy.PROCESS)
+                response = PlayActionResponse()
+                response.resultCode = 7
+                runner.submit(response)
+                await self.__drained(runner, lambda: runner.duration.count == 1, timeout=30)
+                self.assertEqual(runner.errors, 0)
+                with open(path) as f:
+                    code, pid = f.read().split()
+            finally:
+                del os.environ['MINI_RUNNER_RESULT']
+        self.assertEqual(code, '7')
+        self.assertNotEqual(int(pid), os.getpid())
+
+    async def test_async_drop_oldest(self):
+        seen = []
+        release = asyncio.Event()
+
+        async def handler(event):
+            await release.wait()
+            if event == 'bad':
+                raise ValueError(event)
+            seen.append(event)
+
+        runner = HandlerRunner(handler, 'async', maxsize=3)
+        runner.submit(0)
+        await asyncio.sleep(0)
+        for i in range(1, 6):
+            runner.submit(i)
+        # 0已经开始执行, 队列中最早的1和2被丢弃
+        self.assertEqual(runner.backlog, 3)
+        self.assertEqual(runner.dropped, 2)
+        release.set()
+        await self.__drained(runner, lambda: seen[-1:] == [5])
+        self.assertEqual(seen, [0, 3, 4, 5])
+
+        runner.submit('bad')
+        await self.__drained(runner, lambda: runner.errors == 1)
+
+    async def test_latest(self):
+        seen = []
+        release = asyncio.Event()
+
+        async def handler(event):
+            await release.wait()
+            seen.append(event)
+
+        runner = HandlerRunner(handler, 'async', overflow='latest')
+        runner.submit(0)
+        await asyncio.sleep(0)
+        for i in range(1, 5):
+            runner.submit(i)
+        self.assertEqual(runner.backlog, 1)
+        release.set()
+        await self.__drained(runner, lambda: seen[-1:] == [4])
+        self.assertEqual(seen, [0, 4])
+        self.assertEqual(runner.dropped, 3)
+
+    def test_block_is_rejected(self):
+        with self.assertRaises(AssertionError):
+            HandlerRunner(print, 'thread', overflow='block')
+
+    @staticmethod
+    async def __drained(runner: HandlerRunner, condition, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError(f'{runner!r} not drained')
+            await asyncio.sleep(0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""心跳: 连续无回复时断开并重连, 新连接上重新计数
+"""
+import asyncio
+import unittest
+
+from mini.channels.link_quality import LinkState, RttEstimator
+from mini.channels.websocket_client import ubt_websocket
+from test.fake_robot import FakeRobot
+
+
+class RttEstimatorTest(unittest.TestCase):
+
+    def test_update_and_miss(self):
+        link = RttEstimator()
+        self.assertIsNone(link.suggested_timeout(default=None))
+        link.update(0.1)
+        self.assertAlmostEqual(link.srtt, 0.1)
+        self.assertAlmostEqual(link.rto, 0.3)
+        link.miss()
+        link.miss()
+        self.assertEqual(link.missed, 2)
+        link.update(0.1)
+        self.assertEqual(link.missed, 0)
+
+
+class KeepaliveTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+        self.client = ubt_websocket.create()
+        self.client.keepalive_interval = 0.05
+        self.client.keepalive_timeout = 0.05
+        self.client.reconnect_base_delay = 0.01
+        self.states = []
+        self.client.add_link_listener(lambda state, link: self.states.append((state, link.missed)))
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+
+    async def asyncTearDown(self):
+        # 暂停读取的连接无法完成close握手
+        self.robot.resume_all()
+        await self.client.shutdown()
+        await self.robot.stop()
+
+    async def test_lost_link_reconnects_with_reset_counter(self):
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.client.link_state, LinkState.GOOD)
+        self.robot.pause_all()
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if (LinkState.LOST, self.client.lost_after) in self.states and self.client.alive:
+                break
+        self.assertIn((LinkState.LOST, self.client.lost_after), self.states)
+        self.assertTrue(self.client.alive)
+        # 新连接建立时立即恢复, 不等待第一次pong, 旧连接上的未回复心跳不计入
+        self.assertEqual(self.states[-1], (LinkState.GOOD, 0))
+        self.assertEqual(self.client.link.missed, 0)
+
+        # 新连接上第一次心跳无回复只是DEGRADED, 不会立即断开
+        self.robot.pause_all()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if self.client.link.missed:
+                break
+        self.assertEqual(self.client.link.missed, 1)
+        self.assertEqual(self.client.link_state, LinkState.DEGRADED)
+        self.assertTrue(self.client.alive)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""mini包的按需加载: import mini不导入子模块, 旧版本可以访问的名字仍然可以访问
+"""
+import subprocess
+import sys
+import unittest
+
+# 旧版本经由星号导入带到mini下的名字(标准库和第三方名字除外)
+_BASELINE_NAMES = (
+    'api_action', 'api_config', 'api_expression', 'api_observe', 'api_sence', 'api_sound', 'base_api', 'cmdid',
+    'errors', 'msg_utils', 'websocket_client', 'dns_browser', 'zeroconf',
+    'FaceAnalyzeResponse', 'FaceDetectResponse', 'FaceRecogniseResponse', 'GetAudioListResponse',
+    'GetInfraredDistanceResponse', 'GetRegisterFacesResponse', 'RecogniseObjectResponse', 'SpeechRecogniseResponse',
+    'TakePictureResponse', 'GetRobotLanguageResponse', 'SetRobotLanguageResponse', 'DEFAULT_TIMEOUT',
+    'Message', 'MessageHeader', 'RobotPool', 'WiFiDevice', 'service_type', 'connect', 'install_py_pkg',
+    'MiniApiResultType', 'get_common_error_str',
+)
+
+
+def _run(code: str) -> str:
+    return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout.strip()
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_import_loads_no_submodule(self):
+        loaded = _run("import sys, mini; print(sorted(m for m in sys.modules if m.startswith('mini.')))")
+        self.assertEqual(loaded, '[]')
+
+    def test_submodule_loaded_on_access(self):
+        loaded = _run("import sys, mini; mini.metrics; "
+                      "print('mini.pb2' in sys.modules, 'mini.metrics' in sys.modules)")
+        self.assertEqual(loaded, 'False True')
+
+    def test_subpackage_modules(self):
+        loaded = _run("import mini.apis; "
+                      "print([m.__name__ for m in (mini.apis.cmdid, mini.apis.api_action, mini.apis.errors, "
+                      "mini.apis.base_api)])")
+        self.assertEqual(loaded, "['mini.apis.cmdid', 'mini.apis.api_action', 'mini.apis.errors', "
+                                 "'mini.apis.base_api']")
+        loaded = _run("import mini; print(mini.channels.websocket_client.__name__, mini.dns.device_cache.__name__)")
+        self.assertEqual(loaded, 'mini.channels.websocket_client mini.dns.device_cache')
+        import mini.apis
+        with self.assertRaises(AttributeError):
+            getattr(mini.apis, 'no_such_module')
+
+    def test_baseline_names(self):
+        import mini
+        for name in _BASELINE_NAMES:
+            with self.subTest(name=name):
+                self.assertIsNotNone(getattr(mini, name))
+        self.assertEqual(mini.api_sence.__name__, 'mini.apis.api_sence')
+        self.assertIs(mini.FaceDetectResponse, mini.api_sence.FaceDetectResponse)
+        self.assertIn('websocket_client', dir(mini))
+
+    def test_api_modules_reexport_responses(self):
+        from mini.apis.api_sence import FaceDetect, FaceDetectResponse  # noqa: F401
+        from mini.apis.api_sound import StopAllAudio, StopAudioResponse  # noqa: F401
+        from mini.apis.api_action import PlayAction, PlayActionResponse  # noqa: F401
+
+    def test_unknown_name(self):
+        import mini
+        with self.assertRaises(AttributeError):
+            getattr(mini, 'no_such_name')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""延迟解析的事件和解析前的事件过滤
+"""
+import unittest
+
+from mini.apis.api_observe import ObserveHeadRacket
+from mini.apis.base_api import LazyResponse
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketResponse
+from mini.pb2.pccodemao_message_pb2 import Message
+
+_CMD = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
+
+
+def _message(racket_type: int) -> Message:
+    response = ObserveHeadRacketResponse()
+    response.type = racket_type
+    message = Message()
+    message.header.command = _CMD
+    message.header.id = '0'
+    message.bodyData = response.SerializeToString()
+    return message
+
+
+class LazyResponseTest(unittest.TestCase):
+
+    def test_decode_once(self):
+        calls = []
+
+        def parse(message):
+            calls.append(message)
+            return ObserveHeadRacketResponse.FromString(message.bodyData)
+
+        event = LazyResponse(_message(2), parse)
+        self.assertFalse(event.decoded)
+        self.assertIn('bytes', repr(event))
+        self.assertEqual(event.type, 2)
+        self.assertEqual(event.decode().type, 2)
+        self.assertTrue(event.decoded)
+        self.assertEqual(len(calls), 1)
+
+    def test_decode_to_none(self):
+        # 未登记回复类型的命令解析结果为None, 再次访问不能重新解析
+        calls = []
+        event = LazyResponse(_message(1), lambda message: calls.append(message))
+        self.assertIsNone(event.decode())
+        self.assertTrue(event.decoded)
+        self.assertIsNone(event.decode())
+        self.assertEqual(repr(event), 'None')
+        self.assertEqual(len(calls), 1)
+
+
+class EventFilterTest(unittest.TestCase):
+
+    def test_lazy_events_and_filter(self):
+        events = []
+        observer = ObserveHeadRacket()
+        observer.set_handler(events.append)
+        observer.set_lazy()
+        observer.set_event_filter(lambda message: message.header.command == _CMD and len(message.bodyData) > 0)
+        # type为0时消息体为空, 被过滤器丢弃且不解析
+        observer.handle_msg(_message(0))
+        observer.handle_msg(_message(3))
+        self.assertEqual(len(events), 1)
+        self.assertIsInstance(events[0], LazyResponse)
+        self.assertFalse(events[0].decoded)
+        self.assertEqual(events[0].type, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""事件循环阻塞监测: 阻塞归因, 以及stop/start后只保留一个监测线程
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from mini import loop_monitor, metrics
+
+
+def _watchers():
+    return [thread for thread in threading.enumerate() if thread.name == 'mini-loop-monitor']
+
+
+class _Handler(object):
+    pass
+
+
+class LoopMonitorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.monitor = loop_monitor.LoopMonitor(interval=0.02, threshold=0.1, registry=self.registry)
+
+    async def asyncTearDown(self):
+        self.monitor.stop()
+
+    async def test_stop_joins_watcher(self):
+        self.monitor.start()
+        self.assertTrue(self.monitor.running)
+        self.assertEqual(len(_watchers()), 1)
+        self.monitor.stop()
+        self.assertFalse(self.monitor.running)
+        self.assertEqual(_watchers(), [])
+
+    async def test_restart_keeps_one_watcher(self):
+        for _ in range(5):
+            self.monitor.start()
+            self.monitor.stop()
+        self.monitor.start()
+        await asyncio.sleep(0.1)
+        self.assertEqual(len(_watchers()), 1)
+
+    async def test_stall_attributed_to_handler(self):
+        self.monitor.start()
+        await asyncio.sleep(0.05)
+        previous = loop_monitor.enter(_Handler())
+        try:
+            time.sleep(0.3)
+        finally:
+            loop_monitor.leave(previous)
+        await asyncio.sleep(0.05)
+        self.assertEqual([culprit for _, culprit, _ in self.monitor.recent], ['_Handler'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""请求统计: 直方图的分桶与分位数, Prometheus/JSON导出(多台机器人以robot标签区分), 以及HTTP导出端点
+"""
+import asyncio
+import json
+import random
+import unittest
+
+from mini import metrics
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.metrics import Histogram, MetricsRegistry, _BUCKET_COUNT, _MAX_VALUE, _SUB_COUNT, _index, _lower_bound
+
+_PLAY = _PCProgramCmdId.PLAY_ACTION_REQUEST.value
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_bucket_bounds(self):
+        for index in range(_BUCKET_COUNT):
+            self.assertEqual(_index(_lower_bound(index)), index)
+        self.assertEqual(_index(_MAX_VALUE), _BUCKET_COUNT - 1)
+
+    def test_bucket_relative_error(self):
+        for value in range(2 * _SUB_COUNT):
+            self.assertEqual(_lower_bound(_index(value)), value)
+        values = [random.randrange(2 * _SUB_COUNT, _MAX_VALUE) for _ in range(10000)]
+        for value in values + [1 << n for n in range(6, 36)]:
+            index = _index(value)
+            self.assertLessEqual(_lower_bound(index), value)
+            self.assertLess(value, _lower_bound(index + 1))
+            self.assertLessEqual(value - _lower_bound(index), value / _SUB_COUNT)
+
+    def test_percentile(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.percentile(0.5), 0.0)
+        values = [n / 1000 for n in range(1, 1001)]
+        random.shuffle(values)
+        for value in values:
+            histogram.record(value)
+        for q in (0.5, 0.9, 0.99):
+            self.assertAlmostEqual(histogram.percentile(q), q, delta=q / _SUB_COUNT)
+        self.assertEqual(histogram.percentile(0), 0.001)
+        # 分位数取所在桶的下界
+        self.assertEqual(histogram.percentile(1), _lower_bound(_index(1000000)) / 1e6)
+        self.assertAlmostEqual(histogram.mean, 0.5005)
+
+    def test_clamped(self):
+        histogram = Histogram()
+        histogram.record(-1)
+        histogram.record(10 ** 9)
+        self.assertEqual((histogram.min, histogram.max), (0, _MAX_VALUE))
+        self.assertEqual(histogram.percentile(0.99), _lower_bound(_BUCKET_COUNT - 1) / 1e6)
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.first, self.second = MetricsRegistry(robot='Mini_0'), MetricsRegistry(robot='Mini_1')
+        self.first.record_request(_PLAY, 0.001, 0.01, 0.02, 10, 20)
+        self.second.record_request(_PLAY, 0.001, 0.01, 0.04, 10, 20)
+        self.second.record_error(_PLAY, 3)
+
+    def test_prometheus_single_registry(self):
+        registry = MetricsRegistry()
+        registry.record_request(_PLAY, 0.001, 0.01, 0.02, 10, 20)
+        registry.record_loop_lag(0.002)
+        registry.record_stall('handler "x"', 0.3)
+        lines = registry.to_prometheus().splitlines()
+        self.assertIn('# TYPE mini_requests_total counter', lines)
+        self.assertIn('mini_requests_total{cmd="PLAY_ACTION_REQUEST"} 1', lines)
+        self.assertIn('mini_completion_seconds_count{cmd="PLAY_ACTION_REQUEST"} 1', lines)
+        self.assertIn('mini_loop_lag_seconds_count 1', lines)
+        self.assertIn('mini_loop_stalls_total{source="handler \\"x\\""} 1', lines)
+
+    def test_prometheus_robot_labels(self):
+        text = metrics.to_prometheus([self.first, self.second])
+        lines = text.splitlines()
+        types = [line for line in lines if line.startswith('# TYPE ')]
+        self.assertEqual(len(types), len(set(types)))
+        self.assertIn('mini_requests_total{robot="Mini_0",cmd="PLAY_ACTION_REQUEST"} 1', lines)
+        self.assertIn('mini_requests_total{robot="Mini_1",cmd="PLAY_ACTION_REQUEST"} 1', lines)
+        self.assertIn('mini_errors_total{robot="Mini_1",cmd="PLAY_ACTION_REQUEST",code="3"} 1', lines)
+        # 同一指标的样本紧跟在它的TYPE之后
+        start = lines.index('# TYPE mini_requests_total counter')
+        self.assertEqual([line.split('{')[0] for line in lines[start + 1:start + 3]], ['mini_requests_total'] * 2)
+        # 机器人的统计表没有调度延迟时不导出
+        self.assertNotIn('mini_loop_lag_seconds', text)
+
+    def test_json_lines(self):
+        rows = [json.loads(line) for line in metrics.to_json_lines(lambda: [self.first, self.second]).splitlines()]
+        self.assertEqual([(row['robot'], row['cmd']) for row in rows],
+                         [('Mini_0', 'PLAY_ACTION_REQUEST'), ('Mini_1', 'PLAY_ACTION_REQUEST')])
+        self.assertEqual(rows[1]['error_codes'], {'3': 1})
+        self.assertNotIn('robot', json.loads(MetricsRegistry().to_json_lines() or '{}'))
+
+
+class ServeTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_endpoints(self):
+        first, second = MetricsRegistry(robot='Mini_0'), MetricsRegistry(robot='Mini_1')
+        sources = [first]
+        server = await metrics.serve(port=0, source=lambda: sources)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            first.record_request(_PLAY, 0.001, 0.01, 0.02)
+            status, body = await self.__get(port, '/metrics')
+            self.assertEqual(status, '200')
+            self.assertIn('mini_requests_total{robot="Mini_0",cmd="PLAY_ACTION_REQUEST"} 1', body)
+            # 每次请求时重新取统计表
+            sources.append(second)
+            second.record_sent(_PLAY, 10)
+            status, body = await self.__get(port, '/metrics.json')
+            self.assertEqual(status, '200')
+            self.assertEqual([json.loads(line)['robot'] for line in body.splitlines()], ['Mini_0', 'Mini_1'])
+            status, _ = await self.__get(port, '/other')
+            self.assertEqual(status, '404')
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @staticmethod
+    async def __get(port: int, path: str):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET {path} HTTP/1.0\r\nHost: localhost\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        response = (await reader.read()).decode('utf-8')
+        writer.close()
+        head, body = response.split('\r\n\r\n', 1)
+        return head.split()[1], body
+
+
+if __name__ == '__main__':
+    unittest.main()
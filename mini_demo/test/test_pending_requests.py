@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""等待回复的请求表: 并发同命令请求按id匹配回复, 超时和取消后注销
+"""
+import asyncio
+import unittest
+
+from mini.channels.websocket_client import _CoroutineHandler, ubt_websocket
+from mini.pb2.codemao_playaction_pb2 import PlayActionRequest
+from test.fake_robot import FakeRobot
+
+_CMD = 1
+
+
+def _request(name: str) -> PlayActionRequest:
+    request = PlayActionRequest()
+    request.actionName = name
+    return request
+
+
+class PendingRequestTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+        self.client = ubt_websocket.create()
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+
+    async def asyncTearDown(self):
+        await self.client.shutdown()
+        await self.robot.stop()
+
+    async def test_concurrent_replies_resolve_by_id(self):
+        names = [f'{i:03d}' for i in range(20)]
+        results = await asyncio.gather(*[self.client.send_msg(_CMD, _request(name), 5) for name in names])
+        self.assertEqual([PlayActionRequest.FromString(r.bodyData).actionName for r in results], names)
+        self.assertEqual(self.client.pending_count, 0)
+
+    async def test_timeout_removes_pending(self):
+        self.robot.silent.add(_CMD)
+        results = await asyncio.gather(*[self.client.send_msg(_CMD, _request('a'), 0.1) for _ in range(5)])
+        self.assertEqual(results, [None] * 5)
+        self.assertEqual(self.client.pending_count, 0)
+
+    async def test_cancel_removes_pending(self):
+        self.robot.silent.add(_CMD)
+        task = asyncio.create_task(self.client.send_msg(_CMD, _request('a'), 10))
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.client.pending_count, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.client.pending_count, 0)
+
+    async def test_sweeper_reclaims_leaked_handler(self):
+        self.client.sweep_interval = 0.05
+        # 重新连接以按新的周期启动清理器
+        await self.client.shutdown()
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+        loop = asyncio.get_running_loop()
+        self.client._UBTWebSocketClient__dispatcher.add_pending(
+            _CoroutineHandler(999, loop.create_future(), _CMD, deadline=loop.time()))
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.client.pending_count, 0)
+        self.assertEqual(self.client.orphaned_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
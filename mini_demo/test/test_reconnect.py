@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""连接断开后的处理: 异常断开和机器人正常关闭连接都会重连(或只标记本连接断开), 不停止事件循环, 主动关闭不重连;
+
+单帧的解析失败或监听器异常不算连接断开, 重连前断开旧连接
+"""
+import asyncio
+import unittest
+
+from mini.channels.link_quality import LinkState
+from mini.channels.websocket_client import DefaultMsgHandler, ubt_websocket
+from mini.pb2.codemao_playaction_pb2 import PlayActionRequest
+from test.fake_robot import FakeRobot
+
+_CMD = 1
+
+
+class _FailingHandler(DefaultMsgHandler):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def handle_msg(self, message):
+        self.calls += 1
+        raise ValueError('handler failure')
+
+
+class ReconnectTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+
+    async def asyncTearDown(self):
+        await self.robot.stop()
+
+    async def test_reconnects_after_clean_close(self):
+        client = ubt_websocket.create()
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        await self.robot.close_all()
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if client.alive and self.robot.sockets:
+                break
+        self.assertTrue(client.alive)
+        self.assertIsNotNone(await client.send_msg(_CMD, PlayActionRequest(), 5))
+        await client.shutdown()
+
+    async def test_reconnects_after_drop(self):
+        client = ubt_websocket.create()
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        self.robot.abort_all()
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if client.alive and self.robot.sockets:
+                break
+        self.assertTrue(client.alive)
+        self.assertIsNotNone(await client.send_msg(_CMD, PlayActionRequest(), 5))
+        await client.shutdown()
+
+    async def test_clean_close_without_reconnect_fails_pending(self):
+        other = ubt_websocket.create()
+        self.assertTrue(await other.connect('localhost', self.robot.port))
+        client = ubt_websocket.create(auto_reconnect=False)
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        self.robot.silent.add(_CMD)
+        request = asyncio.create_task(client.send_msg(_CMD, PlayActionRequest(), 10))
+        await asyncio.sleep(0.05)
+
+        closing = [ws for ws in self.robot.sockets if ws.remote_address[1] == client._client.local_address[1]]
+        await closing[0].close()
+        self.assertIsNone(await asyncio.wait_for(request, 1))
+        self.assertFalse(client.alive)
+        self.assertEqual(client.link_state, LinkState.LOST)
+        self.assertEqual(client.pending_count, 0)
+
+        # 旧版本在3秒后停止事件循环, 同一个loop中的其它连接也随之停止
+        await asyncio.sleep(3.2)
+        self.assertTrue(other.alive)
+        self.robot.silent.clear()
+        self.assertIsNotNone(await other.send_msg(_CMD, PlayActionRequest(), 5))
+        await other.shutdown()
+
+    async def test_bad_frame_and_handler_error_keep_connection(self):
+        client = ubt_websocket.create()
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        handler = _FailingHandler()
+        client.register_msg_handler(_CMD, handler)
+        self.robot.delay = 0.2
+        request = asyncio.create_task(client.send_msg(_CMD, PlayActionRequest(), 5))
+        await asyncio.sleep(0.05)
+        # 机器人回显的id为0的帧作为事件交给监听器
+        self.assertTrue(await client.send_msg0(_CMD, PlayActionRequest()))
+        await self.robot.push('not a frame&')
+        await asyncio.sleep(0.3)
+        self.assertEqual(handler.calls, 1)
+        self.assertIsNotNone(await request)
+        self.assertFalse(client.reconnecting)
+        self.assertEqual(len(self.robot.sockets), 1)
+        await client.shutdown()
+        await asyncio.sleep(0.05)
+        self.assertFalse(self.robot.sockets)
+
+    async def test_reconnect_closes_old_socket(self):
+        client = ubt_websocket.create()
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        self.assertTrue(await client._UBTWebSocketClient__reconnect())
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.robot.sockets), 1)
+        self.assertIsNotNone(await client.send_msg(_CMD, PlayActionRequest(), 5))
+        await client.shutdown()
+
+    async def test_shutdown_does_not_reconnect(self):
+        client = ubt_websocket.create()
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        await client.shutdown()
+        await asyncio.sleep(0.1)
+        self.assertFalse(client.alive)
+        self.assertFalse(client.reconnecting)
+        self.assertFalse(self.robot.sockets)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""命令注册表: 请求/回复类型、回复解析, 以及不等待回复的命令
+"""
+import asyncio
+import unittest
+
+from mini.apis import registry
+from mini.apis.base_api import BaseApi, MiniApiResultType
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.apis.timeout_policy import AUTO_TIMEOUT
+from mini.channels.websocket_client import ubt_websocket
+from mini.pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketRequest, ObserveHeadRacketResponse
+from mini.pb2.codemao_stopaction_pb2 import StopActionRequest, StopActionResponse
+from test.fake_robot import FakeRobot
+
+_STOP = _PCProgramCmdId.STOP_ACTION_REQUEST.value
+_HEAD_RACKET = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
+
+
+class _Api(BaseApi):
+
+    async def execute(self, robot=None):
+        pass
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_spec(self):
+        spec = registry.get(_STOP)
+        self.assertEqual(spec.name, 'STOP_ACTION_REQUEST')
+        self.assertIs(spec.request, StopActionRequest)
+        self.assertIs(spec.response, StopActionResponse)
+        self.assertTrue(spec.idempotent)
+        self.assertTrue(spec.expects_reply)
+        self.assertIsNone(registry.get(-1))
+
+    def test_parse(self):
+        response = StopActionResponse()
+        response.isSuccess = True
+        self.assertTrue(registry.parse(_STOP, response.SerializeToString()).isSuccess)
+        self.assertIsNone(registry.parse(-1, b''))
+
+    def test_no_reply_commands(self):
+        no_reply = {spec.name for spec in registry.specs() if not spec.expects_reply}
+        self.assertEqual(no_reply, {'SUBSCRIBE_INFRARED_DISTANCE_REQUEST', 'SUBSCRIBE_ROBOT_POSTURE_REQUEST',
+                                    'SUBSCRIBE_HEAD_RACKET_REQUEST', 'FACE_DETECT_TASK_REQUEST',
+                                    'FACE_RECOGNISE_TASK_REQUEST', 'STOP_SPEECH_RECOGNISE_REQUEST'})
+        # 语音识别既有一次性api也有事件监听, 一次性api需要等待回复
+        self.assertTrue(registry.get(_PCProgramCmdId.SPEECH_RECOGNISE.value).expects_reply)
+
+
+class SendTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot(delay=0.1).start()
+        self.client = ubt_websocket.create()
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+
+    async def asyncTearDown(self):
+        await self.client.shutdown()
+        await self.robot.stop()
+
+    async def test_no_reply_command_registers_no_pending(self):
+        subscribe = asyncio.create_task(_Api().send(_HEAD_RACKET, ObserveHeadRacketRequest(), AUTO_TIMEOUT,
+                                                    robot=self.client))
+        stop = asyncio.create_task(_Api().send(_STOP, StopActionRequest(), AUTO_TIMEOUT, robot=self.client))
+        await asyncio.sleep(0.05)
+        self.assertTrue(subscribe.done())
+        self.assertEqual(subscribe.result(), (MiniApiResultType.Success, None))
+        self.assertEqual(self.client.pending_count, 1)
+        result_type, response = await stop
+        self.assertEqual(result_type, MiniApiResultType.Success)
+        self.assertIsInstance(response, StopActionResponse)
+        self.assertEqual(self.client.pending_count, 0)
+
+    async def test_explicit_timeout_waits(self):
+        # 明确指定timeout时仍等待回复, 返回值与其它命令一致
+        subscribe = asyncio.create_task(_Api().send(_HEAD_RACKET, ObserveHeadRacketRequest(), 5, robot=self.client))
+        await asyncio.sleep(0.05)
+        self.assertFalse(subscribe.done())
+        self.assertEqual(self.client.pending_count, 1)
+        result_type, response = await subscribe
+        self.assertEqual(result_type, MiniApiResultType.Success)
+        self.assertIsInstance(response, ObserveHeadRacketResponse)
+        # timeout<=0时只发送, 返回是否发送成功
+        self.assertIs(await _Api().send(_HEAD_RACKET, ObserveHeadRacketRequest(), 0, robot=self.client), True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""请求帧模板: 与逐条构造Message再base64编码的结果逐字节相同, 以及模板缓存的淘汰
+"""
+import base64
+import unittest
+
+from mini.channels import msg_utils
+
+
+class _Body(object):
+    """SerializeToString返回指定字节的请求"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def SerializeToString(self) -> bytes:
+        return self.data
+
+
+def _expected(cmd: int, identify: int, request) -> bytes:
+    # 模板之前的发送路径: build_request_msg + SerializeToString + base64 + '&'
+    data = msg_utils.build_request_msg(cmd, send_serial=identify, request=request).SerializeToString()
+    return base64.b64encode(data) + b'&'
+
+
+class RequestFrameTest(unittest.TestCase):
+
+    def setUp(self):
+        msg_utils.clear_templates()
+
+    def tearDown(self):
+        msg_utils.clear_templates()
+
+    def test_same_bytes_as_message_path(self):
+        lengths = list(range(0, 10)) + [126, 127, 128, 129, 300, msg_utils.TEMPLATE_BODY_LIMIT,
+                                         msg_utils.TEMPLATE_BODY_LIMIT + 1]
+        for cmd in (1, 127, 128, 20001):
+            for length in lengths:
+                request = _Body(bytes(i % 251 for i in range(length)))
+                for identify in (0, 1, 9, 10, 99, 100, 12345, 2 ** 31):
+                    with self.subTest(cmd=cmd, length=length, identify=identify):
+                        # 同一模板第二次使用时走缓存
+                        for _ in range(2):
+                            self.assertEqual(msg_utils.build_request_frame(cmd, identify, request),
+                                             _expected(cmd, identify, request))
+
+    def test_fifo_eviction(self):
+        size = msg_utils.TEMPLATE_CACHE_SIZE
+        requests = [_Body(str(i).encode()) for i in range(size + 1)]
+        for request in requests[:size]:
+            msg_utils.build_request_frame(1, 0, request)
+        self.assertEqual(len(msg_utils._templates), size)
+        msg_utils.build_request_frame(1, 0, requests[0])
+        self.assertEqual(len(msg_utils._templates), size)
+
+        msg_utils.build_request_frame(1, 5, requests[size])
+        self.assertEqual(len(msg_utils._templates), size)
+        # 先放入的最先淘汰, 再次使用不会调整顺序
+        self.assertNotIn((1, requests[0].data), msg_utils._templates)
+        self.assertIn((1, requests[1].data), msg_utils._templates)
+        self.assertIn((1, requests[size].data), msg_utils._templates)
+        for identify, request in ((3, requests[0]), (4, requests[size])):
+            self.assertEqual(msg_utils.build_request_frame(1, identify, request), _expected(1, identify, request))
+
+    def test_large_body_is_not_cached(self):
+        request = _Body(b'x' * (msg_utils.TEMPLATE_BODY_LIMIT + 1))
+        self.assertEqual(msg_utils.build_request_frame(1, 7, request), _expected(1, 7, request))
+        self.assertEqual(len(msg_utils._templates), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
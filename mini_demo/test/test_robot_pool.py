@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""默认连接与扫描器的单例用法, 以及RobotPool中的独立连接
+"""
+import asyncio
+import unittest
+
+from mini import mini_sdk
+from mini.apis import base_api
+from mini.channels.websocket_client import ubt_websocket
+from mini.dns.dns_browser import WiFiDevice, browser
+from mini.pb2.codemao_playaction_pb2 import PlayActionRequest
+from test.fake_robot import FakeRobot
+
+
+class SingletonTest(unittest.TestCase):
+
+    def test_websocket_aliases(self):
+        client = ubt_websocket()
+        self.assertIs(client, ubt_websocket())
+        self.assertIs(client, ubt_websocket.default())
+        self.assertIs(client, base_api.socket)
+        self.assertIs(client, mini_sdk.websocket)
+
+    def test_create_is_independent(self):
+        first, second = ubt_websocket.create(), ubt_websocket.create(send_queue_size=8)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first, ubt_websocket())
+        self.assertEqual(second.send_queue_size, 8)
+
+    def test_browser_aliases(self):
+        scanner = browser()
+        self.assertIs(scanner, browser())
+        self.assertIs(scanner, browser.default())
+        self.assertIs(scanner, mini_sdk.browser)
+        scanner.remove_all_listener()
+
+
+class RobotPoolTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_members_are_separate_connections(self):
+        robots = [await FakeRobot().start() for _ in range(2)]
+        clients = [ubt_websocket.create() for _ in robots]
+        for client, robot in zip(clients, robots):
+            self.assertTrue(await client.connect('localhost', robot.port))
+        await asyncio.gather(*[client.send_msg(1, PlayActionRequest(), 5) for client in clients])
+        self.assertEqual([len(robot.received) for robot in robots], [1, 1])
+        self.assertFalse(ubt_websocket().alive)
+        for client in clients:
+            await client.shutdown()
+        for robot in robots:
+            await robot.stop()
+
+    async def test_failed_connection_is_not_pooled(self):
+        pool = mini_sdk.RobotPool()
+        # 本机8800端口没有服务
+        self.assertIsNone(await pool.connect(WiFiDevice('Mini_0', '127.0.0.1')))
+        self.assertEqual(len(pool), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
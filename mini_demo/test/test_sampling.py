@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""检测周期的自适应调整: 拥塞时加倍, 恢复后减半, 变化小于10%时不重新订阅, 只看监听器所在连接的质量
+"""
+import unittest
+
+from mini.apis.base_api import socket
+from mini.apis.event_stream import EventStream
+from mini.apis.sampling import AdaptiveSampler
+from mini.channels.link_quality import LinkState
+from mini.channels.websocket_client import ubt_websocket
+
+
+class _Observer(object):
+    """提供sampling_period和set_sampling_period的监听器
+    """
+
+    def __init__(self, period: int, robot=None, running: bool = True):
+        self.sampling_period = period
+        self.robot = robot
+        self.running = running
+        self.periods = []
+
+    def set_sampling_period(self, period: int):
+        self.sampling_period = period
+        self.periods.append(period)
+
+
+def _set_link_state(client, state: LinkState):
+    client._UBTWebSocketClient__set_link_state(state)
+
+
+class AdaptiveSamplerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = ubt_websocket.create()
+
+    def test_switch_active_and_idle(self):
+        observer = _Observer(5000, self.robot)
+        sampler = AdaptiveSampler(observer, min_period=100, idle_period=5000)
+        self.assertFalse(sampler.update())
+        sampler.active = True
+        self.assertTrue(sampler.update())
+        self.assertEqual(observer.sampling_period, 100)
+        sampler.active = False
+        self.assertTrue(sampler.update())
+        self.assertEqual(observer.periods, [100, 5000])
+
+    async def test_backoff_doubles_then_halves(self):
+        observer = _Observer(100, self.robot)
+        stream = EventStream(4)
+        sampler = AdaptiveSampler(observer, stream=stream, min_period=100, idle_period=1000, max_period=1000)
+        sampler.active = True
+        # 事件流积压超过一半
+        for i in range(3):
+            stream.put(i)
+        for _ in range(5):
+            sampler.update()
+        self.assertEqual(observer.periods, [200, 400, 800, 1000])
+        await stream.get()
+        await stream.get()
+        for _ in range(5):
+            sampler.update()
+        self.assertEqual(observer.periods[4:], [500, 250, 125, 100])
+
+    async def test_dropped_events_count_once(self):
+        observer = _Observer(100, self.robot)
+        stream = EventStream(1)
+        sampler = AdaptiveSampler(observer, stream=stream, min_period=100)
+        sampler.active = True
+        stream.put(0)
+        stream.put(1)
+        self.assertTrue(sampler.congested())
+        await stream.get()
+        self.assertFalse(sampler.congested())
+
+    def test_hysteresis(self):
+        observer = _Observer(1000, self.robot)
+        sampler = AdaptiveSampler(observer, min_period=950, idle_period=1000)
+        sampler.active = True
+        # 变化5%, 不重新订阅
+        self.assertFalse(sampler.update())
+        self.assertEqual(observer.sampling_period, 1000)
+        sampler.min_period = 900
+        # 变化正好10%
+        self.assertTrue(sampler.update())
+        self.assertEqual(observer.periods, [900])
+
+    def test_link_of_own_robot(self):
+        observer = _Observer(100, self.robot)
+        sampler = AdaptiveSampler(observer, min_period=100)
+        self.assertIs(sampler.client, self.robot)
+        _set_link_state(self.robot, LinkState.DEGRADED)
+        self.assertTrue(sampler.congested())
+        _set_link_state(self.robot, LinkState.GOOD)
+        self.assertFalse(sampler.congested())
+        # RTT的4倍超过周期
+        self.robot.link.update(0.03)
+        self.assertTrue(sampler.congested())
+
+    def test_default_link_is_not_borrowed(self):
+        _set_link_state(socket, LinkState.LOST)
+        try:
+            # 连接池中的监听器还没启动, 不应使用默认连接的状态
+            observer = _Observer(100, running=False)
+            sampler = AdaptiveSampler(observer, min_period=100)
+            self.assertIsNone(sampler.client)
+            self.assertFalse(sampler.congested())
+            self.assertIs(AdaptiveSampler(observer, robot=self.robot).client, self.robot)
+            observer.robot = self.robot
+            self.assertFalse(sampler.congested())
+            # 在默认连接上启动的监听器使用默认连接
+            self.assertTrue(AdaptiveSampler(_Observer(100)).congested())
+        finally:
+            _set_link_state(socket, LinkState.GOOD)
+
+
+if __name__ == '__main__':
+    unittest.main()
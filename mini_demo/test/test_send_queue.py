@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""发送队列: 队列满时抛出RobotSaturatedError或等待, 积压的帧合并写出后只drain一次,
+
+RETRY策略下重连时队列中还没写出的帧在新连接上写出, 不丢弃也不重复
+"""
+import asyncio
+import unittest
+
+from mini.channels.websocket_client import PendingPolicy, RobotSaturatedError, ubt_websocket
+from mini.pb2.codemao_playaction_pb2 import PlayActionRequest
+from test.fake_robot import FakeRobot
+
+_CMD = 1
+
+
+def _request(name: str) -> PlayActionRequest:
+    request = PlayActionRequest()
+    request.actionName = name
+    return request
+
+
+class _StalledSocket(object):
+    """让客户端连接的drain一直等待, 直到release, 同时记录写帧和drain的次数
+    """
+
+    def __init__(self, ws):
+        self.writes = 0
+        self.drains = 0
+        self.__gate = asyncio.Event()
+        write_frame_sync, drain = ws.write_frame_sync, ws.drain
+
+        def write(*args):
+            self.writes += 1
+            write_frame_sync(*args)
+
+        async def wait_drain():
+            self.drains += 1
+            await self.__gate.wait()
+            await drain()
+
+        ws.write_frame_sync = write
+        ws.drain = wait_drain
+
+    def release(self):
+        self.__gate.set()
+
+
+class SendQueueTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+
+    async def asyncTearDown(self):
+        await self.robot.stop()
+
+    async def __connect(self, **kwargs):
+        client = ubt_websocket.create(**kwargs)
+        client.reconnect_base_delay = 0.01
+        self.assertTrue(await client.connect('localhost', self.robot.port))
+        return client, _StalledSocket(client._client)
+
+    @staticmethod
+    async def __fill(client, count: int) -> list:
+        # 第一帧被写协程取走后卡在drain, 其余的留在队列中
+        sends = [asyncio.create_task(client.send_msg0(_CMD, _request('in-flight')))]
+        await asyncio.sleep(0.05)
+        sends += [asyncio.create_task(client.send_msg0(_CMD, _request(f'q{i}'))) for i in range(count)]
+        await asyncio.sleep(0.05)
+        return sends
+
+    async def test_saturated_raises(self):
+        client, stalled = await self.__connect(send_queue_size=2, raise_when_saturated=True)
+        sends = await self.__fill(client, 2)
+        self.assertEqual(client.send_queue_depth, 2)
+        with self.assertRaises(RobotSaturatedError):
+            await client.send_msg0(_CMD, _request('over'))
+        with self.assertRaises(RobotSaturatedError):
+            await client.send_msg(_CMD, _request('over'), 5)
+        stalled.release()
+        self.assertEqual(await asyncio.gather(*sends), [True] * 3)
+        await client.shutdown()
+
+    async def test_backpressure_waits(self):
+        client, stalled = await self.__connect(send_queue_size=2)
+        sends = await self.__fill(client, 3)
+        self.assertEqual(client.send_queue_depth, 2)
+        self.assertFalse(any(send.done() for send in sends))
+        stalled.release()
+        self.assertEqual(await asyncio.gather(*sends), [True] * 4)
+        await asyncio.sleep(0.05)
+        self.assertEqual([message.header.command for message in self.robot.received], [_CMD] * 4)
+        await client.shutdown()
+
+    async def test_batch_drains_once(self):
+        client, stalled = await self.__connect()
+        sends = await self.__fill(client, 5)
+        self.assertEqual((stalled.writes, stalled.drains), (1, 1))
+        stalled.release()
+        self.assertEqual(await asyncio.gather(*sends), [True] * 6)
+        # 积压的5帧作为一批写出
+        self.assertEqual((stalled.writes, stalled.drains), (6, 2))
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.robot.received), 6)
+        await client.shutdown()
+
+    async def test_reconnect_keeps_queued_sends(self):
+        client, _ = await self.__connect(send_queue_size=2, pending_policy=PendingPolicy.RETRY)
+        sends = await self.__fill(client, 2)
+        # 队列已满, 请求等待入队
+        request = asyncio.create_task(client.send_msg(_CMD, _request('request'), 5))
+        await asyncio.sleep(0.05)
+        self.robot.abort_all()
+        self.assertEqual(await asyncio.wait_for(asyncio.gather(*sends[1:]), 5), [True] * 2)
+        self.assertIsNotNone(await request)
+        # 卡在旧连接上的那一批按写入失败处理
+        self.assertFalse(await sends[0])
+        await asyncio.sleep(0.05)
+        names = [self.__name(message) for message in self.robot.received]
+        self.assertEqual(names[-3:], ['q0', 'q1', 'request'])
+        self.assertEqual(names.count('request'), 1)
+        await client.shutdown()
+
+    async def test_reconnect_fail_policy_releases_queued(self):
+        client, _ = await self.__connect(send_queue_size=2, pending_policy=PendingPolicy.FAIL)
+        client.reconnect_base_delay = 1
+        sends = await self.__fill(client, 3)
+        self.robot.abort_all()
+        self.assertEqual(await asyncio.wait_for(asyncio.gather(*sends), 0.5), [False] * 4)
+        await client.shutdown()
+
+    @staticmethod
+    def __name(message) -> str:
+        request = PlayActionRequest()
+        request.ParseFromString(message.bodyData)
+        return request.actionName
+
+
+if __name__ == '__main__':
+    unittest.main()
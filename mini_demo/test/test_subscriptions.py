@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""同一连接上同类监听器共用机器人端的订阅: 第一个启动时订阅, 最后一个停止时才发送停止请求
+"""
+import asyncio
+import unittest
+
+from mini.apis.api_observe import ObserveHeadRacket, ObserveInfraredDistance
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.channels.websocket_client import ubt_websocket
+from mini.pb2.codemao_observeheadracket_pb2 import ObserveHeadRacketRequest
+from mini.pb2.codemao_observeinfrareddistance_pb2 import ObserveInfraredDistanceRequest
+from test.fake_robot import FakeRobot
+
+_HEAD_RACKET = _PCProgramCmdId.SUBSCRIBE_HEAD_RACKET_REQUEST.value
+_INFRARED = _PCProgramCmdId.SUBSCRIBE_INFRARED_DISTANCE_REQUEST.value
+
+
+class SubscriptionTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = await FakeRobot().start()
+        self.robot.silent.update((_HEAD_RACKET, _INFRARED))
+        self.client = ubt_websocket.create()
+        self.assertTrue(await self.client.connect('localhost', self.robot.port))
+
+    async def asyncTearDown(self):
+        await self.client.shutdown()
+        await self.robot.stop()
+
+    async def requests(self, cmd: int, request_type) -> list:
+        """机器人收到的某命令的请求, 按收到顺序返回isSubscribe"""
+        await asyncio.sleep(0.1)
+        return [request_type.FromString(message.bodyData).isSubscribe for message in self.robot.received
+                if message.header.command == cmd]
+
+    async def test_stop_sent_by_last_subscriber(self):
+        first, second = ObserveHeadRacket(), ObserveHeadRacket()
+        first.start(self.client)
+        second.start(self.client)
+        self.assertEqual(await self.requests(_HEAD_RACKET, ObserveHeadRacketRequest), [True])
+        self.assertEqual(self.client.subscriber_count(_HEAD_RACKET), 2)
+
+        self.assertFalse(first.stop())
+        self.assertEqual(await self.requests(_HEAD_RACKET, ObserveHeadRacketRequest), [True])
+        self.assertTrue(second.stop())
+        # 停止请求使用拍头事件自己的命令id
+        self.assertEqual(await self.requests(_HEAD_RACKET, ObserveHeadRacketRequest), [True, False])
+        self.assertEqual(self.client.subscriber_count(_HEAD_RACKET), 0)
+
+    async def test_infrared_stop_command(self):
+        observer = ObserveInfraredDistance()
+        observer.start(self.client)
+        self.assertTrue(observer.stop())
+        self.assertEqual(await self.requests(_INFRARED, ObserveInfraredDistanceRequest), [True, False])
+        self.assertEqual([message.header.command for message in self.robot.received], [_INFRARED, _INFRARED])
+
+    async def test_stream_started_observer_stops_with_last_stream(self):
+        observer = ObserveHeadRacket()
+        first = observer.stream(robot=self.client)
+        second = observer.stream()
+        first.close()
+        self.assertEqual(self.client.subscriber_count(_HEAD_RACKET), 1)
+        second.close()
+        self.assertEqual(self.client.subscriber_count(_HEAD_RACKET), 0)
+        self.assertEqual(await self.requests(_HEAD_RACKET, ObserveHeadRacketRequest), [True, False])
+
+    async def test_started_observer_outlives_its_streams(self):
+        observer = ObserveHeadRacket()
+        observer.start(self.client)
+        observer.stream().close()
+        self.assertEqual(self.client.subscriber_count(_HEAD_RACKET), 1)
+        self.assertEqual(await self.requests(_HEAD_RACKET, ObserveHeadRacketRequest), [True])
+        observer.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""按命令决定的请求超时, 以及deadline
+"""
+import time
+import unittest
+
+from mini import metrics
+from mini.apis.cmdid import _PCProgramCmdId
+from mini.apis.timeout_policy import AUTO_TIMEOUT, DEFAULT_TIMEOUT, TimeoutPolicy, deadline, remaining
+
+_STOP = _PCProgramCmdId.STOP_ACTION_REQUEST.value
+_PLAY = _PCProgramCmdId.PLAY_ACTION_REQUEST.value
+
+
+class _Robot(object):
+
+    def __init__(self):
+        self.metrics = metrics.MetricsRegistry(robot='Mini_0')
+
+
+class TimeoutPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        self.policy = TimeoutPolicy(source=self.registry)
+
+    def test_explicit_timeout_is_kept(self):
+        self.assertEqual(self.policy.resolve(_STOP, 7), 7)
+        # 300是普通的超时值, 不再表示由策略决定
+        self.assertEqual(self.policy.resolve(_STOP, DEFAULT_TIMEOUT), DEFAULT_TIMEOUT)
+
+    def test_auto_timeout(self):
+        self.assertEqual(self.policy.resolve(_STOP, AUTO_TIMEOUT), 10)
+        self.assertEqual(self.policy.resolve(_STOP), 10)
+        self.assertEqual(self.policy.resolve(_PLAY), DEFAULT_TIMEOUT)
+
+    def test_override(self):
+        self.policy.set_timeout(_STOP, 2)
+        self.assertEqual(self.policy.resolve(_STOP), 2)
+        self.policy.set_timeout(_STOP, None)
+        self.assertEqual(self.policy.resolve(_STOP), 10)
+
+    def test_learned_timeout(self):
+        for _ in range(self.policy.min_samples):
+            self.registry.record_request(_STOP, 0.001, 0.01, 0.5, 10, 10)
+        self.assertLess(self.policy.resolve(_STOP), 10)
+
+    def test_learned_per_robot(self):
+        robot = _Robot()
+        for _ in range(self.policy.min_samples):
+            robot.metrics.record_request(_STOP, 0.001, 0.01, 0.5, 10, 10)
+        policy = TimeoutPolicy()
+        # 未指定source时使用请求所用连接的统计表
+        self.assertLess(policy.resolve(_STOP, robot=robot), 10)
+        self.assertEqual(policy.resolve(_STOP, robot=_Robot()), 10)
+        self.assertGreaterEqual(self.policy.resolve(_STOP), self.policy.floor)
+
+    def test_deadline(self):
+        self.assertIsNone(remaining())
+        with deadline(1):
+            self.assertLessEqual(self.policy.resolve(_STOP, 7), 1)
+            self.assertLessEqual(self.policy.resolve(_STOP), 1)
+            with deadline(5):
+                self.assertLessEqual(remaining(), 1)
+            time.sleep(0.01)
+            self.assertLess(remaining(), 1)
+        self.assertIsNone(remaining())
+
+
+if __name__ == '__main__':
+    unittest.main()